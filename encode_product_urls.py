@@ -4,67 +4,26 @@ Encode Product Image URLs for Facebook Messenger API
 Converts Georgian Unicode characters in URLs to percent-encoding
 
 Usage:
-    python3 encode_product_urls.py
+    python3 encode_product_urls.py [--changes PATH]
 
-This will update data/products.json with encoded URLs
+This will update data/products.json with encoded URLs (only if any changed)
 """
 
+import argparse
 import json
-from urllib.parse import urlparse, quote, urlunparse
+import sys
 from pathlib import Path
 
-
-def encode_url(url):
-    """
-    Encode a URL by converting non-ASCII characters to percent-encoding
-
-    Example:
-        https://bebias.ge/wp-content/uploads/სტაფილოსფერი-ქუდი.jpg
-        -> https://bebias.ge/wp-content/uploads/%E1%83%A1%E1%83%A2%E1%83%90...
-    """
-    if not url or not url.strip():
-        return url
-
-    try:
-        parsed = urlparse(url)
-
-        # Split path into segments and encode each one
-        path_segments = parsed.path.split('/')
-        encoded_segments = []
-
-        for segment in path_segments:
-            if segment:
-                # Only encode if segment contains non-ASCII characters
-                if any(ord(char) > 127 for char in segment):
-                    # Use quote with safe='-._~' to encode Georgian chars but keep hyphens, dots, etc
-                    encoded_segment = quote(segment, safe='-._~')
-                    encoded_segments.append(encoded_segment)
-                else:
-                    encoded_segments.append(segment)
-            else:
-                encoded_segments.append('')
-
-        # Reconstruct path
-        encoded_path = '/'.join(encoded_segments)
-
-        # Reconstruct full URL
-        encoded_url = urlunparse((
-            parsed.scheme,
-            parsed.netloc,
-            encoded_path,
-            parsed.params,
-            parsed.query,
-            parsed.fragment
-        ))
-
-        return encoded_url
-
-    except Exception as e:
-        print(f"⚠️  Error encoding URL {url}: {e}")
-        return url
+sys.path.insert(0, str(Path(__file__).parent / "scripts"))
+from synclib import describe_changes, encode_url, write_products_json  # noqa: E402
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Percent-encode Georgian image URLs in data/products.json")
+    parser.add_argument('--changes', type=Path, default=None, metavar='PATH',
+                        help="Write the added/removed/changed ID summary here (for deploy steps)")
+    args = parser.parse_args()
+
     products_file = Path(__file__).parent / "data" / "products.json"
 
     if not products_file.exists():
@@ -108,8 +67,8 @@ def main():
     # Save updated products
     print(f"\n💾 Saving updated products...")
 
-    with open(products_file, 'w', encoding='utf-8') as f:
-        json.dump(products, f, ensure_ascii=False, indent=2)
+    changes = write_products_json(products, products_file, args.changes)
+    print(f"   {describe_changes(changes)}")
 
     print(f"\n✅ Success!")
     print(f"   Changed: {changed_count} products")
@@ -3,11 +3,22 @@
 # Auto-Sync Script: Firestore → products.json → Vercel
 # Runs every 15 minutes via cron
 # Created: November 24, 2025
+#
+# The WooCommerce → Firestore side no longer needs a cron tick:
+#   python3 scripts/sync-watch.py --dir ~/Downloads   (or --api --interval 30)
+# keeps a warm client and syncs each new export within seconds.
+# Likewise for Firestore → products.json:
+#   python3 scripts/listen-firestore-products.py
+# holds one snapshot listener and rewrites products.json within seconds of a
+# relevant change, instead of the full collection read below.
 ################################################################################
 
 LOG_FILE="/tmp/bebias-chatbot-sync.log"
 LOCK_FILE="/tmp/bebias-sync.lock"
 PROJECT_DIR="/Users/giorginozadze/Documents/BEBIAS CHATBOT VENERA beta_2"
+REPORTS_DIR="$PROJECT_DIR/.sync/reports"
+REPORT_ARCHIVE_DIR="$REPORTS_DIR/archive"
+REPORT_ARCHIVE_KEEP=2000
 
 # Prevent overlapping syncs
 if [ -f "$LOCK_FILE" ]; then
@@ -48,6 +59,21 @@ else
   echo "$(date): ❌ ERROR - Firestore sync failed" >> "$LOG_FILE"
 fi
 
+# Archive Python sync run reports (.sync/reports/<script>.json) written since the last cycle
+if ls "$REPORTS_DIR"/*.json >/dev/null 2>&1; then
+  mkdir -p "$REPORT_ARCHIVE_DIR"
+  STAMP=$(date +%Y%m%d-%H%M%S)
+  for REPORT in "$REPORTS_DIR"/*.json; do
+    NAME=$(basename "$REPORT" .json)
+    mv "$REPORT" "$REPORT_ARCHIVE_DIR/$STAMP-$NAME.json"
+    echo "$(date): 📊 Archived run report $NAME" >> "$LOG_FILE"
+  done
+  # Keep only the newest reports
+  ls -1t "$REPORT_ARCHIVE_DIR"/*.json 2>/dev/null | tail -n +$((REPORT_ARCHIVE_KEEP + 1)) | while read -r OLD; do
+    rm -f "$OLD"
+  done
+fi
+
 # Cleanup
 rm -f "$LOCK_FILE"
 echo "$(date): Sync cycle completed" >> "$LOG_FILE"
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark the CSV reader engines against the old DictReader path
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from synclib import PROJECT_ROOT, read_records, read_rows, records_from_dicts
+from synclib.synthetic import write_synthetic_export
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = PROJECT_ROOT / '.sync' / 'bench'
+SCRIPTS = {'full': 'sync-woocommerce-full.py', 'csv': 'sync-woocommerce-csv.py'}
+
+ENGINES = {
+    'dictreader': lambda path, fields: records_from_dicts(read_rows(path), fields),
+    'csv': lambda path, fields: read_records(path, fields),
+    'pandas': lambda path, fields: read_records(path, fields, engine='pandas'),
+}
+
+
+def script_fields(name):
+    """FIELDS of a sync script (hyphenated, so loaded by path)"""
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_')[:-3], SCRIPTS_DIR / name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.FIELDS
+
+
+def time_engine(read, path, fields, repeat):
+    """Best wall time over repeat full reads; returns (seconds, records of the last read)"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        records = list(read(path, fields))
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, records
+
+
+def same_records(expected, actual):
+    """Equal values and types, by repr (0 vs 0.0 would change fingerprints and JSON output; nan != nan)"""
+    return len(expected) == len(actual) and all(repr(a) == repr(b) for a, b in zip(expected, actual))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSV reader engines against csv.DictReader")
+    parser.add_argument('--rows', default='400,5000,20000,100000', help="Comma-separated catalog sizes (CSV rows)")
+    parser.add_argument('--export', type=Path, help="Benchmark this export instead of synthetic ones")
+    parser.add_argument('--script', choices=SCRIPTS, default='full', help="Whose FIELDS to read (default: full)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, help="Results JSON (default: .sync/bench/csv-reader-<timestamp>.json)")
+    args = parser.parse_args()
+
+    fields = script_fields(SCRIPTS[args.script])
+    engines = dict(ENGINES)
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        print("pandas not installed: skipping the pandas engine (pip install pandas pyarrow)")
+        del engines['pandas']
+
+    print("=" * 60)
+    print("CSV READER BENCHMARK")
+    print("=" * 60)
+    print(f"Fields: {SCRIPTS[args.script]} ({len(fields)} columns)  Engines: {list(engines)}  Repeat: {args.repeat}")
+
+    runs = []
+    mismatches = 0
+    with tempfile.TemporaryDirectory(prefix='bebias-csv-bench-') as workdir:
+        if args.export:
+            exports = [str(args.export)]
+        else:
+            exports = []
+            for size in (int(n) for n in args.rows.split(',') if n.strip()):
+                path = os.path.join(workdir, f'export-{size}.csv')
+                write_synthetic_export(path, size, seed=args.seed)
+                exports.append(path)
+
+        for path in exports:
+            csv_bytes = os.path.getsize(path)
+            baseline_s, expected = time_engine(engines['dictreader'], path, fields, args.repeat)
+            print(f"\n{len(expected)} rows ({csv_bytes / 1024:.0f} KB export)")
+
+            for engine, read in engines.items():
+                if engine == 'dictreader':
+                    seconds, identical = baseline_s, True
+                else:
+                    seconds, records = time_engine(read, path, fields, args.repeat)
+                    identical = same_records(expected, records)
+                    mismatches += not identical
+                run = {
+                    'engine': engine,
+                    'rows': len(expected),
+                    'csv_bytes': csv_bytes,
+                    'wall_s': round(seconds, 4),
+                    'rows_per_s': round(len(expected) / seconds, 1) if seconds > 0 else None,
+                    'speedup': round(baseline_s / seconds, 2) if seconds > 0 else None,
+                    'identical': identical,
+                }
+                runs.append(run)
+                print(f"  {engine:<11} {seconds:8.3f}s  {run['rows_per_s'] or 0:>10.0f} rows/s  "
+                      f"{run['speedup'] or 0:5.2f}x  {'OK' if identical else 'MISMATCH'}")
+
+    results = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'script': SCRIPTS[args.script],
+        'runs': runs,
+    }
+    output_path = args.output or RESULTS_DIR / f"csv-reader-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {output_path}")
+
+    if mismatches:
+        print(f"ERROR: {mismatches} engine run(s) differ from the DictReader output")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
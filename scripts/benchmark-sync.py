@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Python sync scripts end-to-end against the Firestore emulator
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+
+from synclib import PROJECT_ROOT
+from synclib.synthetic import write_synthetic_export
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = PROJECT_ROOT / '.sync' / 'bench'
+
+# name -> (script, args builder); run in this order so later scripts find documents to update
+SCRIPTS = {
+    'full': ('sync-woocommerce-full.py', lambda ctx: [ctx['export'], '--full', '--products-json', ctx['products_json']]),
+    'csv': ('sync-woocommerce-csv.py', lambda ctx: [ctx['export']]),
+    'products': ('sync-products-firestore.py', lambda ctx: ['--products-json', ctx['products_json']]),
+    'prices': ('sync-prices-from-csv.py', lambda ctx: [ctx['price_export']]),
+}
+
+
+def reset_emulator(host, project):
+    """Delete every document in the emulator's default database"""
+    url = f"http://{host}/emulator/v1/projects/{project}/databases/(default)/documents"
+    urllib.request.urlopen(urllib.request.Request(url, method='DELETE'), timeout=30).read()
+
+
+def check_emulator(host):
+    try:
+        urllib.request.urlopen(f"http://{host}/", timeout=5).read()
+    except OSError as e:
+        print(f"Error: Firestore emulator not reachable at {host}: {e}")
+        print("  Start it with: gcloud emulators firestore start --host-port=localhost:8080")
+        sys.exit(1)
+
+
+def run_script(script, script_args, env, log_path):
+    """Run one sync script; returns (exit code, wall seconds, peak RSS MB, output)"""
+    with open(log_path, 'w', encoding='utf-8') as log:
+        started = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, str(SCRIPTS_DIR / script), *script_args],
+                                stdout=log, stderr=subprocess.STDOUT, env=env, cwd=PROJECT_ROOT)
+        # wait4 gives this child's own rusage (RUSAGE_CHILDREN would be the max over all runs)
+        _, status, usage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - started
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak_rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return proc.returncode, wall, peak_rss_mb, Path(log_path).read_text(encoding='utf-8')
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous_path, runs):
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = {(r['script'], r['rows']): r for r in json.load(f)['runs']}
+
+    print("\n" + "-" * 60)
+    print(f"COMPARED WITH {previous_path}")
+    print("-" * 60)
+    for run in runs:
+        before = previous.get((run['script'], run['rows']))
+        if not before or not before['wall_s']:
+            continue
+        change = (run['wall_s'] - before['wall_s']) / before['wall_s'] * 100
+        print(f"  {run['script']:<9} {run['rows']:>7} rows: {before['wall_s']:.2f}s -> {run['wall_s']:.2f}s ({change:+.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync scripts against the Firestore emulator")
+    parser.add_argument('--rows', default='400,5000,20000,100000', help="Comma-separated catalog sizes (CSV rows)")
+    parser.add_argument('--scripts', default=','.join(SCRIPTS), help=f"Comma-separated subset of: {', '.join(SCRIPTS)}")
+    parser.add_argument('--emulator-host', default=os.environ.get('FIRESTORE_EMULATOR_HOST', 'localhost:8080'))
+    parser.add_argument('--project', default='demo-bebias-bench', help="Emulator project ID")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, help="Results JSON (default: .sync/bench/sync-<timestamp>.json)")
+    parser.add_argument('--compare', type=Path, help="Previous results JSON to compare wall times against")
+    parser.add_argument('script_args', nargs='*', help="Extra arguments passed to every script (after --)")
+    args = parser.parse_args()
+
+    sizes = [int(n) for n in args.rows.split(',') if n.strip()]
+    selected = [name.strip() for name in args.scripts.split(',') if name.strip()]
+    unknown = [name for name in selected if name not in SCRIPTS]
+    if unknown:
+        parser.error(f"unknown scripts: {', '.join(unknown)}")
+    selected = [name for name in SCRIPTS if name in selected]
+
+    check_emulator(args.emulator_host)
+
+    env = dict(os.environ)
+    env.update({
+        'FIRESTORE_EMULATOR_HOST': args.emulator_host,
+        'GOOGLE_CLOUD_PROJECT_ID': args.project,
+        'SYNC_ENV_FILE': os.devnull,  # never pick up real credentials from .env.local
+        'PYTHONUNBUFFERED': '1',
+    })
+
+    print("=" * 60)
+    print("SYNC BENCHMARK (Firestore emulator)")
+    print("=" * 60)
+    print(f"Emulator: {args.emulator_host}  Project: {args.project}")
+    print(f"Sizes: {sizes}  Scripts: {selected}  Extra args: {args.script_args}")
+
+    runs = []
+    with tempfile.TemporaryDirectory(prefix='bebias-bench-') as workdir:
+        workdir = Path(workdir)
+        for size in sizes:
+            ctx = {
+                'export': str(workdir / f'export-{size}.csv'),
+                'price_export': str(workdir / f'export-{size}-prices.csv'),
+                'products_json': str(workdir / f'products-{size}.json'),
+            }
+            rows = write_synthetic_export(ctx['export'], size, seed=args.seed)
+            write_synthetic_export(ctx['price_export'], size, seed=args.seed, price_shift=5)
+            csv_bytes = os.path.getsize(ctx['export'])
+            print(f"\n{rows} rows ({csv_bytes / 1024:.0f} KB export)")
+
+            reset_emulator(args.emulator_host, args.project)
+
+            for name in selected:
+                script, build_args = SCRIPTS[name]
+                log_path = workdir / f'{name}-{size}.log'
+                report_path = workdir / f'{name}-{size}.report.json'
+                script_args = build_args(ctx) + ['--report', str(report_path)] + args.script_args
+                code, wall, rss, output = run_script(script, script_args, env, log_path)
+                report = json.loads(report_path.read_text(encoding='utf-8')) if report_path.exists() else {}
+                writes = report.get('counters', {}).get('firestore_writes', 0)
+                run = {
+                    'script': name,
+                    'rows': rows,
+                    'csv_bytes': csv_bytes,
+                    'exit_code': code,
+                    'wall_s': round(wall, 3),
+                    'peak_rss_mb': round(rss, 1),
+                    'writes': writes,
+                    'rows_per_s': round(rows / wall, 1) if wall > 0 else None,
+                    'stages': {stage: v['seconds'] for stage, v in report.get('stages', {}).items()},
+                    'commit_latency_ms': report.get('histograms', {}).get('firestore_commit'),
+                }
+                runs.append(run)
+                status = 'OK' if code == 0 else f'FAILED (exit {code})'
+                print(f"  {name:<9} {wall:7.2f}s  {rss:7.1f} MB  {writes:>7} writes  "
+                      f"{run['rows_per_s'] or 0:>9.0f} rows/s  {status}")
+                if code != 0:
+                    print("    " + "\n    ".join(output.strip().splitlines()[-5:]))
+
+    results = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'emulator_host': args.emulator_host,
+        'script_args': args.script_args,
+        'runs': runs,
+    }
+
+    output_path = args.output or RESULTS_DIR / f"sync-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {output_path}")
+
+    if args.compare:
+        compare(args.compare, runs)
+
+    if any(run['exit_code'] != 0 for run in runs):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Keep products.json in step with the Firestore products collection through one snapshot listener
+"""
+
+import argparse
+import signal
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from pathlib import Path
+
+from synclib import (
+    MANIFEST_DIR, PROJECT_ROOT, ProductsJsonSink, RunReport, add_report_arguments, build_prompt_lines,
+    build_search_index, firestore_client, load_encoding, load_env, run_sinks,
+)
+from synclib.live_catalog import LiveCatalog
+from synclib.watch import HealthFile
+
+DEFAULT_PRODUCTS_JSON = PROJECT_ROOT / 'data' / 'products.json'
+HEALTH_PATH = MANIFEST_DIR / 'listen-health.json'
+TICK = 0.2  # seconds between checks of the catalog and the listener
+
+
+class Listener:
+    def __init__(self, args):
+        self.args = args
+        self.catalog = LiveCatalog()
+        self.stop = threading.Event()
+        self.health = HealthFile(args.health_file, mode='listen', collection=args.collection)
+        self.db = None
+        self.watch = None
+        self.encoding = None
+        self.emit_pending = True  # the first complete snapshot is always written
+        self.retry_at = None  # time.monotonic() at which to attach a new listener
+
+    # Lifecycle
+
+    def handle_signal(self, signum, frame):
+        if self.stop.is_set():
+            raise KeyboardInterrupt
+        print(f"\n{signal.Signals(signum).name}: writing pending changes, then stopping")
+        self.stop.set()
+
+    def run(self):
+        load_env()
+        self.db = firestore_client()
+        if self.db is None:
+            sys.exit(1)
+        print(f"Project: {self.db.project}  Collection: {self.args.collection}")
+        print(f"Targets: {', '.join(str(path) for path in self.args.products_json)}")
+
+        self.encoding, reason = load_encoding()
+        if self.encoding is None:
+            print(f"Note: prompt lines written without token counts: {reason}")
+
+        self.attach()
+        try:
+            self.loop()
+            # Don't drop a burst that arrived during the debounce
+            if self.stop.is_set() and self.catalog.ready.is_set() and (self.emit_pending
+                                                                         or self.catalog.dirty.is_set()):
+                self.emit()
+        finally:
+            if self.watch is not None:
+                self.watch.unsubscribe()
+            self.health.update(state='stopped')
+            print("Stopped")
+
+    def attach(self):
+        """Start a snapshot listener; its first snapshot is the whole collection"""
+        self.catalog.reset()
+        self.watch = self.db.collection(self.args.collection).on_snapshot(self.catalog.on_snapshot)
+        self.retry_at = None
+        self.health.update(state='starting')
+
+    def loop(self):
+        print(f"Listening ({self.args.debounce:g}s debounce, {self.args.max_delay:g}s max delay; Ctrl+C to stop)")
+        catalog = self.catalog
+        heartbeat_at = time.monotonic()
+        while not self.stop.is_set():
+            now = time.monotonic()
+
+            if not self.watch.is_active:
+                if self.retry_at is None:
+                    self.retry_at = now + self.args.retry
+                    print(f"[{timestamp()}] Listener stopped; attaching a new one in {self.args.retry:g}s")
+                    self.health.update(state='reconnecting')
+                elif now >= self.retry_at:
+                    self.attach()
+            elif catalog.ready.is_set():
+                if self.emit_pending:
+                    self.emit()
+                    if self.args.once:
+                        break
+                    continue
+                # Debounce: the last change is --debounce old, or the first one --max-delay
+                first_change, last_change = catalog.first_change, catalog.last_change
+                if catalog.dirty.is_set() and (now - last_change >= self.args.debounce
+                                               or now - first_change >= self.args.max_delay):
+                    self.emit()
+                    continue
+
+            if now - heartbeat_at >= self.args.heartbeat:
+                self.health.update()
+                heartbeat_at = now
+            self.stop.wait(TICK)
+
+    # Emit
+
+    def emit(self):
+        """Write the current catalog to every products.json target"""
+        products, changed = self.catalog.take()
+        self.emit_pending = False
+        started = time.perf_counter()
+        started_at = timestamp()
+        print(f"\n[{started_at}] {len(changed)} products changed "
+              f"({self.catalog.events} document changes received so far)")
+        if not products:
+            # An empty collection (wrong project or collection name) must not wipe the bot's catalog
+            print(f"  No listable products in {self.args.collection}; files left as they are")
+            self.health.update(state='idle')
+            return
+
+        self.health.update(state='emitting')
+        result = {'started_at': started_at, 'changed': len(changed), 'ai_products': len(products)}
+        try:
+            with RunReport('listen-firestore-products', self.args) as report:
+                report.count('documents_changed', len(changed))
+                report.count('ai_products', len(products))
+                with report.stage('search_index'):
+                    search_index = build_search_index(products)
+                with report.stage('prompt_lines'):
+                    prompt_lines = build_prompt_lines(products, self.encoding)
+                sinks = [ProductsJsonSink(path, report, self.args.changes if i == 0 else None)
+                         for i, path in enumerate(self.args.products_json)]
+                for sink in sinks:
+                    sink.set_products(products, search_index, prompt_lines)
+                results = run_sinks(sinks)
+                for target in results:
+                    for line in target.pop('lines'):
+                        print(f"  {line}")
+                report.set('targets', results)
+                report.set('products_json', results[0]['products_json'])
+            result['status'] = 'ok'
+        except Exception as e:
+            traceback.print_exc()
+            result['status'] = f'error: {type(e).__name__}: {e}'
+            self.emit_pending = True  # the changes were taken; write them again after a pause
+            self.stop.wait(self.args.debounce)
+
+        result['duration_s'] = round(time.perf_counter() - started, 3)
+        self.health.record_sync(result)
+        self.health.update(state='idle')
+
+
+def timestamp():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate products.json from a Firestore snapshot listener")
+    parser.add_argument('--collection', default='products', help="Firestore collection (default: products)")
+    parser.add_argument('--products-json', type=Path, action='append', default=None, metavar='PATH',
+                        help="AI products.json to write (repeatable; default: data/products.json)")
+    parser.add_argument('--changes', type=Path, default=None, metavar='PATH',
+                        help="Write the first products.json's added/removed/changed ID summary here on every emit")
+    parser.add_argument('--debounce', type=float, default=2.0, metavar='SECONDS',
+                        help="Quiet period after the last change before writing (default: 2)")
+    parser.add_argument('--max-delay', type=float, default=30.0, metavar='SECONDS',
+                        help="Write at the latest this long after the first pending change (default: 30)")
+    parser.add_argument('--once', action='store_true', help="Write the current collection and exit")
+    parser.add_argument('--retry', type=float, default=10.0, metavar='SECONDS',
+                        help="Wait before attaching a new listener when the stream stops (default: 10)")
+    parser.add_argument('--heartbeat', type=float, default=30.0, metavar='SECONDS', help="Health file refresh interval")
+    parser.add_argument('--health-file', type=Path, default=HEALTH_PATH)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    args.products_json = args.products_json or [DEFAULT_PRODUCTS_JSON]
+
+    listener = Listener(args)
+    signal.signal(signal.SIGTERM, listener.handle_signal)
+    signal.signal(signal.SIGINT, listener.handle_signal)
+    listener.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the WooCommerce REST API and the update-stock endpoint, serving a CSV export
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from synclib import read_rows
+from synclib.synthetic import write_synthetic_export
+
+STATUS = {'1': 'publish', '-1': 'private'}
+ATTRIBUTE_SLOTS = range(1, 5)
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+
+
+class Catalog:
+    """The CSV export as API objects, reloaded when the file changes"""
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.hashes = {}  # ID -> row hash
+        self.modified = {}  # ID -> date_modified_gmt
+        self.products = []
+        self.variations = {}  # parent ID -> [variation]
+        self.by_sku = {}  # SKU -> product or variation
+        self.by_id = {}  # ID -> product
+        self.categories = []
+        self.reload()
+
+    def reload(self):
+        with self.lock:
+            mtime = os.path.getmtime(self.csv_path)
+            if mtime != self.mtime:
+                self._load()
+                self.mtime = mtime
+
+    def _load(self):
+        rows = list(read_rows(self.csv_path))
+        now = _now()
+
+        for row in rows:
+            digest = hashlib.sha256(json.dumps(row, sort_keys=True).encode('utf-8')).hexdigest()
+            wc_id = row['ID']
+            if self.hashes.get(wc_id) != digest:
+                self.hashes[wc_id] = digest
+                # New or edited rows are 'modified now' (on the first load, all of them)
+                self.modified[wc_id] = now
+
+        categories = {}
+        for row in rows:
+            for path in filter(None, (p.strip() for p in row.get('Categories', '').split(','))):
+                parent = 0
+                for name in (n.strip() for n in path.split('>')):
+                    key = (parent, name)
+                    if key not in categories:
+                        categories[key] = {'id': len(categories) + 1, 'name': name, 'slug': name, 'parent': parent}
+                    parent = categories[key]['id']
+        category_ids = {(c['parent'], c['name']): c['id'] for c in categories.values()}
+
+        def category_refs(value):
+            refs = []
+            for path in filter(None, (p.strip() for p in value.split(','))):
+                parent = 0
+                for name in (n.strip() for n in path.split('>')):
+                    parent = category_ids[(parent, name)]
+                refs.append({'id': parent, 'name': path.split('>')[-1].strip()})
+            return refs
+
+        products, variations, parent_ids = [], {}, {}
+        for row in rows:
+            if row.get('Type') == 'variable':
+                # The export's Parent column holds the parent's SKU, or its name when it has none
+                for key in filter(None, (row.get('SKU', '').strip(), row['Name'].strip())):
+                    parent_ids.setdefault(key, int(row['ID']))
+        for row in rows:
+            item = {
+                'id': int(row['ID']),
+                'sku': row.get('SKU', ''),
+                'status': STATUS.get(row.get('Published'), 'draft'),
+                'description': row.get('Description', ''),
+                'regular_price': row.get('Regular price', ''),
+                'sale_price': row.get('Sale price', ''),
+                'stock_quantity': int(row['Stock']) if row.get('Stock', '').strip() else None,
+                'stock_status': 'instock' if row.get('In stock?') == '1' else 'outofstock',
+                'date_modified_gmt': self.modified[row['ID']],
+            }
+            images = [{'src': src.strip()} for src in row.get('Images', '').split(',') if src.strip()]
+            if row.get('Type') == 'variation':
+                parent = row.get('Parent', '').strip()
+                parent_id = int(parent[3:]) if parent.startswith('id:') else parent_ids.get(parent)
+                item.update(name=row.get('Name', ''), parent_id=parent_id, image=images[0] if images else None,
+                            attributes=[{'name': row[f'Attribute {i} name'], 'option': row[f'Attribute {i} value(s)']}
+                                        for i in ATTRIBUTE_SLOTS if row.get(f'Attribute {i} value(s)')])
+                variations.setdefault(parent_id, []).append(item)
+            else:
+                item.update(name=row.get('Name', ''), type=row.get('Type', ''),
+                            short_description=row.get('Short description', ''),
+                            categories=category_refs(row.get('Categories', '')),
+                            tags=[{'name': t.strip()} for t in row.get('Tags', '').split(',') if t.strip()],
+                            images=images)
+                products.append(item)
+
+        # WooCommerce re-saves the parent whenever a variation is saved
+        by_id = {item['id']: item for item in products}
+        for parent_id, items in variations.items():
+            parent = by_id.get(parent_id)
+            newest = max(item['date_modified_gmt'] for item in items)
+            if parent is not None and newest > parent['date_modified_gmt']:
+                parent['date_modified_gmt'] = self.modified[str(parent_id)] = newest
+
+        self.products, self.variations, self.by_id = products, variations, by_id
+        self.by_sku = {item['sku']: item for item in products + [v for vs in variations.values() for v in vs]
+                       if item['sku']}
+        self.categories = sorted(categories.values(), key=lambda c: c['id'])
+        print(f"Loaded {len(products)} products, {sum(map(len, variations.values()))} variations "
+              f"from {self.csv_path}")
+
+
+class Handler(BaseHTTPRequestHandler):
+    catalog = None
+    latency = 0.0
+    api_key = ''
+    strict_json = False
+    no_batch = False
+    error_rate = 0.0
+    protocol_version = 'HTTP/1.1'  # keep-alive, like a real server
+    disable_nagle_algorithm = True  # headers and body are separate writes; don't stall on delayed ACKs
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.catalog.reload()
+        if self.latency:
+            time.sleep(self.latency)
+
+        path = url.path.rstrip('/')
+        if path == '/wp-json':
+            return self._send(200, {'name': 'Mock WooCommerce', 'url': f'http://{self.headers.get("Host", "")}',
+                                    'namespaces': ['wc/v3', 'wcdbh/v1']})
+        if path == '/wp-json/wc/v3/products':
+            items = self.catalog.products
+        elif path == '/wp-json/wc/v3/products/categories':
+            items = self.catalog.categories
+        elif match := re.fullmatch(r'/wp-json/wc/v3/products/(\d+)/variations', path):
+            parent_id = int(match.group(1))
+            if not any(p['id'] == parent_id for p in self.catalog.products):
+                return self._send(404, {'code': 'woocommerce_rest_product_invalid_id', 'message': 'Invalid ID.'})
+            items = self.catalog.variations.get(parent_id, [])
+        else:
+            return self._send(404, {'code': 'rest_no_route', 'message': 'No route was found.'})
+
+        if query.get('modified_after'):
+            items = [i for i in items if i.get('date_modified_gmt', '') > query['modified_after']]
+        per_page = min(int(query.get('per_page', 10)), 100)
+        page = int(query.get('page', 1))
+        total_pages = max(1, -(-len(items) // per_page))
+        self._send(200, items[(page - 1) * per_page:page * per_page],
+                   {'X-WP-Total': str(len(items)), 'X-WP-TotalPages': str(total_pages)})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        self.catalog.reload()
+        if self.latency:
+            time.sleep(self.latency)
+
+        if urlparse(self.path).path.rstrip('/') != '/wp-json/wcdbh/v1/update-stock':
+            return self._send(404, {'code': 'rest_no_route', 'message': 'No route was found.'})
+        if self.api_key and self.headers.get('Authorization') != f'Bearer {self.api_key}':
+            return self._send(401, {'code': 'rest_forbidden', 'message': 'Invalid API key.'})
+        content_type = self.headers.get('Content-Type', '')
+        if self.strict_json and (content_type.strip() != 'application/json' or not body.isascii()):
+            return self._send(415, {'code': 'unsupported_media_type', 'message': 'Unsupported Media Type'})
+        if self.error_rate and random.random() < self.error_rate:
+            return self._send(503, {'code': 'service_unavailable', 'message': 'Try again later.'})
+        try:
+            payload = json.loads(body)
+            if 'items' in payload and not self.no_batch:
+                updates = [(str(item['sku']), int(item['stock_qty'])) for item in payload['items']]
+            else:
+                updates = None
+                sku, stock_qty = str(payload['sku']), int(payload['stock_qty'])
+        except (ValueError, KeyError, TypeError):
+            return self._send(400, {'code': 'rest_invalid_param', 'message': 'Expected {"sku": ..., "stock_qty": N}.'})
+        if updates is None:
+            return self._send(*self._update_stock(sku, stock_qty))
+        self._send(200, {'results': [self._update_stock(sku, stock_qty)[1] for sku, stock_qty in updates]})
+
+    def _update_stock(self, sku, stock_qty):
+        """(status, body) of setting one SKU's stock"""
+        with self.catalog.lock:
+            item = self.catalog.by_sku.get(sku)
+            if item is None:
+                return 404, {'code': 'product_not_found', 'message': f'No product with SKU {sku}.', 'sku': sku}
+            if item['stock_quantity'] != stock_qty:
+                item['stock_quantity'] = stock_qty
+                item['stock_status'] = 'instock' if stock_qty > 0 else 'outofstock'
+                item['date_modified_gmt'] = _now()
+                parent = self.catalog.by_id.get(item.get('parent_id'))
+                if parent is not None:
+                    parent['date_modified_gmt'] = item['date_modified_gmt']
+        return 200, {'success': True, 'sku': sku, 'product_id': item['id'], 'stock_qty': stock_qty}
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a WooCommerce export CSV through the WooCommerce REST API")
+    parser.add_argument('csv_path', nargs='?', help="WooCommerce product export CSV")
+    parser.add_argument('--synthetic', type=int, metavar='ROWS', help="Serve a generated export of about ROWS rows instead")
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=0, help="Delay added to every response")
+    parser.add_argument('--api-key', default='', help="Bearer token update-stock requires (default: none)")
+    parser.add_argument('--strict-json', action='store_true',
+                        help="415 for update-stock bodies with raw non-ASCII bytes or a charset in Content-Type")
+    parser.add_argument('--no-batch', action='store_true', help="Reject batch update-stock payloads (single SKUs only)")
+    parser.add_argument('--error-rate', type=float, default=0, metavar='P',
+                        help="Answer this share of update-stock requests with 503")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        args.csv_path = os.path.join(tempfile.mkdtemp(prefix='mock-wc-'), 'export.csv')
+        write_synthetic_export(args.csv_path, args.synthetic)
+    elif not args.csv_path:
+        parser.error("pass an export CSV or --synthetic ROWS")
+
+    Handler.catalog = Catalog(args.csv_path)
+    Handler.latency = args.latency_ms / 1000
+    Handler.api_key = args.api_key
+    Handler.strict_json = args.strict_json
+    Handler.no_batch = args.no_batch
+    Handler.error_rate = args.error_rate
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), Handler)
+    print(f"Mock WooCommerce API on http://127.0.0.1:{args.port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
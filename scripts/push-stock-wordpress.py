@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Push Firestore stock levels to WordPress (wcdbh/v1/update-stock), only for SKUs changed since the last run
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+from synclib import MANIFEST_DIR, Manifest, RunReport, add_report_arguments, firestore_client, load_env
+from synclib.wp_stock import NOT_FOUND, OK, WordPressStockPusher, add_push_arguments
+
+DEFAULT_WP_URL = 'https://bebias.ge'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Push changed Firestore stock levels to WordPress")
+    parser.add_argument('--collection', default='products', help="Firestore collection (default: products)")
+    parser.add_argument('--wp-url', help=f"WordPress URL (default: WC_URL or {DEFAULT_WP_URL})")
+    parser.add_argument('--full', action='store_true', help="Push every SKU, not just the changed ones")
+    parser.add_argument('--dry-run', action='store_true', help="List what would be pushed; send nothing")
+    parser.add_argument('--mark-synced', action='store_true',
+                        help="Record the current stock as pushed without sending anything")
+    add_push_arguments(parser)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    with RunReport('push-stock-wordpress', args) as report:
+        push(args, report)
+
+
+STOCK_MARKERS = ('synced_at', 'timestamp')  # stamped by the syncs and by the chatbot's order path
+
+
+def changed_at(data):
+    """The newest of a document's stock markers as a UTC datetime; None if none has a known time zone"""
+    times = []
+    for marker in STOCK_MARKERS:
+        value = data.get(marker)
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                continue
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            times.append(value.astimezone(timezone.utc))
+    return max(times, default=None)
+
+
+def read_stock(db, collection):
+    """{sku: stock_qty} of the newest document per SKU; returns (stock, skipped, conflicts)"""
+    candidates, skipped = {}, 0  # sku -> [(changed_at, stock_qty, doc_id)]
+    for snapshot in db.collection(collection).select(['sku', 'stock_qty', *STOCK_MARKERS]).stream():
+        data = snapshot.to_dict() or {}
+        sku = str(data.get('sku') or '').strip()
+        value = data.get('stock_qty')
+        if not sku or isinstance(value, bool) or not isinstance(value, (int, float)):
+            skipped += 1
+            continue
+        candidates.setdefault(sku, []).append((changed_at(data), int(value), snapshot.id))
+
+    stock, conflicts = {}, {}  # conflicts: sku -> [(doc_id, stock_qty)] of SKUs left out
+    for sku, docs in candidates.items():
+        if len({value for _, value, _ in docs}) == 1:
+            stock[sku] = docs[0][1]
+            continue
+        dated = sorted((doc for doc in docs if doc[0] is not None), key=lambda doc: doc[0], reverse=True)
+        if dated and (len(dated) == 1 or dated[0][0] > dated[1][0]):
+            stock[sku] = dated[0][1]
+        else:
+            conflicts[sku] = [(doc_id, value) for _, value, doc_id in docs]
+    return stock, skipped, conflicts
+
+
+def push(args, report):
+    print("=" * 60)
+    print("STOCK PUSH: FIRESTORE -> WORDPRESS")
+    print("=" * 60)
+
+    with report.stage('credentials'):
+        load_env()
+        db = firestore_client()
+    if db is None:
+        sys.exit(1)
+    wp_url = (args.wp_url or os.environ.get('WC_URL', '').strip() or DEFAULT_WP_URL).rstrip('/')
+    api_key = os.environ.get('WCDBH_API_KEY', '').strip()
+    if not api_key and not (args.dry_run or args.mark_synced):
+        print("Error: WCDBH_API_KEY is not set (the DB Handler plugin's API key, in .env.local)")
+        sys.exit(1)
+    print(f"Project: {db.project}  Collection: {args.collection}  WordPress: {wp_url}")
+
+    with report.stage('firestore_read'):
+        stock, skipped, conflicts = read_stock(db, args.collection)
+    report.count('skus', len(stock))
+    report.count('sku_conflicts', len(conflicts))
+    print(f"Read {len(stock)} SKUs ({skipped} documents without a SKU or a numeric stock_qty)")
+    for sku, docs in list(conflicts.items())[:10]:
+        print(f"  Warning: not pushing SKU '{sku}': its documents disagree and none is newer: "
+              + ', '.join(f"{doc_id}={value}" for doc_id, value in docs))
+    if len(conflicts) > 10:
+        print(f"  ... and {len(conflicts) - 10} more conflicting SKUs")
+
+    with report.stage('manifest'):
+        manifest = Manifest(MANIFEST_DIR / f'wp-stock.{db.project}.{urlparse(wp_url).netloc}.json',
+                            db.project, args.collection)
+    pending = {}
+    for sku, value in stock.items():
+        manifest.record(sku, str(value))
+        if args.full or not manifest.is_unchanged(sku, str(value)):
+            pending[sku] = value
+    report.count('pending', len(pending))
+    print(f"Pending: {len(pending)} changed, {len(stock) - len(pending)} unchanged"
+          + (" (--full)" if args.full else ""))
+
+    if args.dry_run:
+        for sku, value in list(pending.items())[:50]:
+            print(f"  {sku}: {value}")
+        if len(pending) > 50:
+            print(f"  ... and {len(pending) - 50} more")
+        print("\nDry run: nothing sent, manifest not updated")
+        return
+    if args.mark_synced:
+        manifest.save()
+        print(f"\nRecorded {len(stock)} SKUs as pushed; nothing sent")
+        return
+    if not pending:
+        manifest.save()
+        print("\nNothing to push")
+        return
+
+    print("\n" + "-" * 60)
+    print(f"PUSHING {len(pending)} SKUs ({args.workers} workers"
+          + (f", up to {args.batch_size} per request)" if args.batch_size > 1 else ")"))
+    print("-" * 60)
+    pusher = WordPressStockPusher(wp_url, api_key, workers=args.workers, batch_size=args.batch_size,
+                                  retries=args.retries, report=report)
+    try:
+        with report.stage('push'):
+            results = pusher.push(pending)
+    finally:
+        pusher.close()
+
+    failed = {sku: result for sku, result in results.items() if result[0] != OK}
+    for sku in failed:
+        manifest.discard(sku)  # pushed again next run
+    with report.stage('manifest'):
+        manifest.save()
+
+    not_found = sum(1 for status, _ in failed.values() if status == NOT_FOUND)
+    for sku, (status, detail) in list(failed.items())[:20]:
+        print(f"  ERROR '{sku}' ({pending[sku]}): {status}: {detail}")
+    if len(failed) > 20:
+        print(f"  ... and {len(failed) - 20} more")
+
+    stats = {
+        'pushed': len(results) - len(failed),
+        'not_found': not_found,
+        'errors': len(failed) - not_found,
+        'requests': pusher.requests,
+        'retries': pusher.retries,
+        'batches': pusher.batches_supported,  # None: no batch was sent
+    }
+    report.count('pushed', stats['pushed'])
+    report.count('push_errors', len(failed))
+    report.set('push', stats)
+    print(f"\nPushed {stats['pushed']}, {not_found} unknown SKUs, {stats['errors']} errors "
+          f"in {pusher.requests} requests ({pusher.retries} retries"
+          + (f"; batches: { {True: 'yes', False: 'no', None: 'not tried'}[pusher.batches_supported]}"
+             if args.batch_size > 1 else "") + ")")
+
+
+if __name__ == "__main__":
+    main()
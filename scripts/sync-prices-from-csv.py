@@ -1,29 +1,42 @@
 #!/usr/bin/env python3
-import csv
-import json
-import firebase_admin
-from firebase_admin import credentials, firestore
-from datetime import datetime
-
-# Initialize Firebase
-cred = credentials.Certificate('bebias-chatbot-key.json')
-firebase_admin.initialize_app(cred)
-db = firestore.client()
-
-print('📥 Reading WooCommerce CSV export...\n')
-
-csv_path = '/Users/giorginozadze/Downloads/wc-product-export-20-11-2025-1763612693038.csv'
+"""
+Sync prices from a WooCommerce CSV export to Firestore products
 
-products_to_update = []
+Usage:
+    python3 scripts/sync-prices-from-csv.py /path/to/wc-product-export.csv
+"""
 
-with open(csv_path, 'r', encoding='utf-8') as f:
-    reader = csv.DictReader(f)
-
-    for row in reader:
+import argparse
+import os
+import sys
+import time
+import firebase_admin
+from firebase_admin import credentials, firestore
+from datetime import datetime, timezone
+from synclib import (
+    RunReport, WritePlan, add_mirror_arguments, add_report_arguments, add_writer_arguments, firestore_client,
+    forget_documents, make_writer, open_mirror, read_rows, writer_stats, writer_summary,
+)
+from synclib.mirror import NOOP, UPDATE
+
+
+def load_price_index(documents):
+    """Build name -> doc ID and doc ID -> price maps from (doc_id, fields) pairs"""
+    doc_ids_by_name = {}
+    prices = {}
+    for doc_id, data in documents:
+        prices[doc_id] = data.get('price', 0)
+        if 'name' in data:
+            doc_ids_by_name[data['name']] = doc_id
+    return doc_ids_by_name, prices
+
+
+def read_csv_prices(csv_path):
+    """Yield (id, name, price) for variations and simple products with a price"""
+    for row in read_rows(csv_path):
         product_type = row.get('Type', '').lower()
         name = row.get('Name', '').strip()
         price_str = row.get('Regular price', '').strip()
-        stock_str = row.get('Stock', '').strip()
         product_id = row.get('ID', '').strip()
 
         if not name:
@@ -33,88 +46,137 @@ with open(csv_path, 'r', encoding='utf-8') as f:
         if product_type not in ['variation', 'simple']:
             continue
 
-        # Parse price
         try:
             price = float(price_str) if price_str else 0
         except ValueError:
             price = 0
 
-        # Parse stock
-        try:
-            stock = int(stock_str) if stock_str else 0
-        except ValueError:
-            stock = 0
-
         if price > 0:
-            products_to_update.append({
-                'id': product_id,
-                'name': name,
-                'type': product_type,
-                'price': price,
-                'stock': stock
-            })
-
-print(f'Found {len(products_to_update)} products with prices in CSV\n')
-
-# Get all Firestore products
-firestore_products = {}
-products_ref = db.collection('products')
-docs = products_ref.stream()
-
-for doc in docs:
-    data = doc.to_dict()
-    firestore_products[doc.id] = {'id': doc.id, **data}
-
-    # Also index by name for easier matching
-    if 'name' in data:
-        firestore_products[data['name']] = {'id': doc.id, **data}
-
-print(f'Firestore products: {len(set([p["id"] for p in firestore_products.values()]))}\n')
-print('🔄 Updating prices...\n')
-
-updated = 0
-skipped = 0
-not_found = 0
-
-for csv_product in products_to_update:
-    name = csv_product['name']
-    price = csv_product['price']
-    csv_id = csv_product['id']
-
-    # Try to find in Firestore by name or ID
-    firestore_product = firestore_products.get(name) or firestore_products.get(csv_id)
-
-    if not firestore_product:
-        print(f'⚠️  Not found: {name}')
-        not_found += 1
-        continue
-
-    # Check if update needed
-    current_price = firestore_product.get('price', 0)
-
-    if current_price == price:
-        skipped += 1
-        continue
-
-    # Update price in Firestore
-    try:
-        doc_ref = products_ref.document(firestore_product['id'])
-        doc_ref.update({
+            yield product_id, name, price
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync WooCommerce CSV prices to Firestore")
+    parser.add_argument('csv_path', help="WooCommerce product export CSV")
+    parser.add_argument('--key', default='bebias-chatbot-key.json', help="Firebase service account key file")
+    add_writer_arguments(parser)
+    add_mirror_arguments(parser)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.csv_path):
+        print(f'❌ File not found: {args.csv_path}')
+        sys.exit(1)
+
+    with RunReport('sync-prices-from-csv', args) as report:
+        sync(args, report)
+
+
+def sync(args, report):
+    with report.stage('credentials'):
+        if os.environ.get('FIRESTORE_EMULATOR_HOST'):
+            # Local emulator needs no service account key
+            db = firestore_client()
+        else:
+            # Initialize Firebase
+            cred = credentials.Certificate(args.key)
+            firebase_admin.initialize_app(cred)
+            db = firestore.client()
+
+    products_ref = db.collection('products')
+
+    mirror = open_mirror(db, 'products', args, report)
+    if mirror is not None:
+        doc_ids_by_name, prices = load_price_index(mirror.documents())
+        mirror.close()
+    else:
+        print('📥 Loading Firestore name/price index...\n')
+        started = time.perf_counter()
+        with report.stage('firestore_read'):
+            doc_ids_by_name, prices = load_price_index(
+                (doc.id, doc.to_dict() or {}) for doc in products_ref.select(['name', 'price']).stream())
+        report.observe('firestore_read_index', time.perf_counter() - started)
+        report.count('firestore_reads', len(prices))
+    print(f'Firestore products: {len(prices)}\n')
+
+    print(f'🔄 Comparing prices from {args.csv_path}...\n')
+
+    csv_products = 0
+    not_found = 0
+    updates = []  # (doc_id, name, current price, new price)
+    plan = WritePlan()
+
+    report.count('csv_bytes', os.path.getsize(args.csv_path))
+    for csv_id, name, price in report.iter(read_csv_prices(args.csv_path), 'csv_parse'):
+        csv_products += 1
+
+        # Try to find in Firestore by name or ID
+        doc_id = doc_ids_by_name.get(name) or (csv_id if csv_id in prices else doc_ids_by_name.get(csv_id))
+
+        if not doc_id:
+            print(f'⚠️  Not found: {name}')
+            not_found += 1
+            continue
+
+        # Check if update needed
+        current_price = prices[doc_id]
+
+        if current_price == price:
+            plan.record(NOOP, doc_id)
+            continue
+
+        plan.record(UPDATE, doc_id)
+        updates.append((doc_id, name, current_price, price))
+        prices[doc_id] = price
+
+    skipped = plan.counts[NOOP]
+    report.count('csv_products', csv_products)
+    report.count('unchanged', skipped)
+    report.count('not_found', not_found)
+    report.set('plan', plan.to_dict())
+    print()
+    for line in plan.lines():
+        print(line)
+    print()
+
+    if args.plan:
+        print('Plan only: nothing written')
+        return
+
+    writer = make_writer(db, args, report=report,
+                         on_error=lambda name, e: print(f'❌ Failed to update {name}: {e}'))
+    written_ids = {}  # document path -> doc_id, to drop updated documents from the manifests
+    for doc_id, name, current_price, price in updates:
+        # Queue price update for Firestore
+        doc_ref = products_ref.document(doc_id)
+        written_ids[doc_ref.path] = doc_id
+        writer.update(doc_ref, {
             'price': price,
             'currency': 'GEL',
-            'last_updated': datetime.now().isoformat(),
+            'last_updated': datetime.now(timezone.utc).isoformat(),
             'last_updated_by': 'csv_price_sync'
-        })
+        }, label=name)
 
         print(f'✅ {name}: {current_price} → {price} GEL')
-        updated += 1
-    except Exception as e:
-        print(f'❌ Failed to update {name}: {e}')
-
-print(f'\n📊 Summary:')
-print(f'   Updated: {updated}')
-print(f'   Skipped (no change): {skipped}')
-print(f'   Not found: {not_found}')
-print(f'\n✅ Price sync complete!')
-print('\nNext step: Run sync to update products.json')
-print('  node scripts/sync-from-firestore.js')
+
+    # Commit remaining batches; failed updates are reported by the writer
+    writer.close()
+    updated = writer.written
+    forget_documents(db.project, 'products',
+                     [doc_id for path, doc_id in written_ids.items() if path not in writer.failed_paths])
+    report.set('writer', writer_stats(writer))
+
+    print(f'\n📊 Summary:')
+    print(f'   CSV products with prices: {csv_products}')
+    print(f'   Updated: {updated}')
+    print(f'   Skipped (no change): {skipped}')
+    print(f'   Not found: {not_found}')
+    print(f'   Failed: {writer.errors}')
+    print(f'   Writer: {writer_summary(writer)}')
+    print(f'\n✅ Price sync complete!')
+    print('\nNext step: update products.json (automatic while listen-firestore-products.py runs)')
+    print('  python3 scripts/listen-firestore-products.py --once')
+
+
+if __name__ == "__main__":
+    main()
@@ -9,98 +9,70 @@ Usage:
     python3 scripts/sync-products-firestore.py
 """
 
+import argparse
 import json
-import os
 from pathlib import Path
-from urllib.parse import urlparse, quote, urlunparse
 from google.cloud import firestore
-from google.oauth2 import service_account
-
-def encode_url(url):
-    """Encode Georgian characters in URL"""
-    if not url or not url.strip():
-        return url
-
-    try:
-        parsed = urlparse(url)
-        path_segments = parsed.path.split('/')
-        encoded_segments = []
-
-        for segment in path_segments:
-            if segment:
-                if any(ord(char) > 127 for char in segment):
-                    encoded_segment = quote(segment, safe='-._~')
-                    encoded_segments.append(encoded_segment)
-                else:
-                    encoded_segments.append(segment)
-            else:
-                encoded_segments.append('')
-
-        encoded_path = '/'.join(encoded_segments)
-        return urlunparse((parsed.scheme, parsed.netloc, encoded_path, parsed.params, parsed.query, parsed.fragment))
-    except Exception as e:
-        print(f"  Warning: Error encoding URL: {e}")
-        return url
-
-def load_env():
-    """Load .env.local file"""
-    env_path = Path(__file__).parent.parent / '.env.local'
-    if env_path.exists():
-        with open(env_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    # Remove quotes and handle \n
-                    value = value.strip('"').strip("'")
-                    value = value.replace('\\n', '\n')
-                    os.environ[key] = value
+from synclib import (
+    NOOP, PROJECT_ROOT, RunReport, StockSync, WritePlan, add_mirror_arguments, add_report_arguments,
+    add_stock_arguments, add_writer_arguments, encode_url, firestore_client, forget_documents, load_env, make_writer,
+    open_mirror, writer_stats, writer_summary,
+)
 
 def main():
+    parser = argparse.ArgumentParser(description="Sync products.json to Firestore")
+    parser.add_argument('--products-json', type=Path, default=PROJECT_ROOT / 'data' / 'products.json',
+                        help="products.json to read")
+    parser.add_argument('--full', action='store_true', help="With --stock-only: push every product's stock")
+    add_stock_arguments(parser)
+    add_writer_arguments(parser)
+    add_mirror_arguments(parser)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    if args.stock_only and (args.mirror or args.plan):
+        parser.error("--stock-only can't be combined with --mirror or --plan")
+
+    with RunReport('sync-products-firestore', args) as report:
+        sync(args, report)
+
+
+def sync(args, report):
     print("=" * 50)
     print("PRODUCTS SYNC TO FIRESTORE")
     print("=" * 50)
 
     # Load environment
-    load_env()
-
-    project_id = os.environ.get('GOOGLE_CLOUD_PROJECT_ID', '').strip()
-    client_email = os.environ.get('GOOGLE_CLOUD_CLIENT_EMAIL', '').strip()
-    private_key = os.environ.get('GOOGLE_CLOUD_PRIVATE_KEY', '').strip()
-
-    if not all([project_id, client_email, private_key]):
-        print("Error: Missing Firebase credentials")
-        print(f"  Project ID: {'OK' if project_id else 'MISSING'}")
-        print(f"  Client Email: {'OK' if client_email else 'MISSING'}")
-        print(f"  Private Key: {'OK' if private_key else 'MISSING'}")
+    with report.stage('credentials'):
+        load_env()
+        db = firestore_client()
+    if db is None:
         return
 
-    print(f"\nProject: {project_id}")
-    print(f"Service Account: {client_email}")
-
-    # Create credentials
-    credentials = service_account.Credentials.from_service_account_info({
-        'type': 'service_account',
-        'project_id': project_id,
-        'private_key': private_key,
-        'client_email': client_email,
-        'token_uri': 'https://oauth2.googleapis.com/token',
-    })
-
-    # Initialize Firestore
-    db = firestore.Client(project=project_id, credentials=credentials)
+    print(f"\nProject: {db.project}")
 
     # Load products.json
-    products_path = Path(__file__).parent.parent / 'data' / 'products.json'
-    with open(products_path, 'r', encoding='utf-8') as f:
-        products = json.load(f)
+    products_path = args.products_json
+    with report.stage('products_json'):
+        with open(products_path, 'r', encoding='utf-8') as f:
+            products = json.load(f)
+    report.count('products_json_bytes', products_path.stat().st_size)
 
     print(f"\nFound {len(products)} products in products.json")
-    print("\nSyncing to Firestore...")
+    if args.stock_only:
+        return sync_stock(args, report, db, products)
+
+    mirror = open_mirror(db, 'products', args, report)
+    plan = WritePlan(mirror) if mirror is not None else None
+
+    print("\nSyncing to Firestore..." if not args.plan else "\nPlanning against the mirror...")
     print("-" * 50)
 
-    synced = 0
+    queued = 0
+    unchanged = 0
     errors = 0
+    writer = None if args.plan else make_writer(db, args, report=report)
+    written_ids = {}  # document path -> doc_id, to drop written documents from the manifests
+    encode = report.wrap(encode_url, 'url_encode')
 
     for product in products:
         sku = product.get('id', '')
@@ -115,28 +87,86 @@ def main():
                 'price': product.get('price', 0),
                 'currency': product.get('currency', 'GEL'),
                 'category': product.get('category', ''),
-                'image': encode_url(product.get('image', '')),
+                'image': encode(product.get('image', '')),
                 'last_updated_by': 'sync_script',
                 'synced_at': firestore.SERVER_TIMESTAMP
             }
 
-            # Save to Firestore
-            db.collection('products').document(sku).set(firestore_product, merge=True)
+            # The mirror already holds this document as it would be written
+            if plan is not None and plan.add(sku, firestore_product) == NOOP:
+                unchanged += 1
+                continue
+            if writer is None:
+                queued += 1
+                continue
+
+            # Queue for Firestore
+            doc_ref = db.collection('products').document(sku)
+            writer.set(doc_ref, firestore_product, merge=True, label=sku)
+            written_ids[doc_ref.path] = sku
 
             stock = firestore_product['stock_qty']
             name = firestore_product['name'][:30]
             print(f"  OK {sku}: {name}... (stock: {stock})")
-            synced += 1
+            queued += 1
 
         except Exception as e:
             print(f"  ERROR {sku}: {e}")
             errors += 1
 
+    report.count('products_read', len(products))
+    report.count('transform_errors', errors)
+    report.count('unchanged', unchanged)
+    if plan is not None:
+        report.set('plan', plan.to_dict())
+        mirror.close()
+        print("-" * 50)
+        for line in plan.lines():
+            print(line)
+    if writer is None:
+        print("Plan only: nothing written")
+        print("=" * 50)
+        return
+
+    # Commit remaining batches; per-document failures are reported by the writer
+    writer.close()
+    synced = writer.written
+    errors += writer.errors
+    report.set('writer', writer_stats(writer))
+    forget_documents(db.project, 'products',
+                     [doc_id for path, doc_id in written_ids.items() if path not in writer.failed_paths])
+
     print("-" * 50)
     print(f"\nSYNC COMPLETE")
     print(f"  Synced: {synced}")
+    if plan is not None:
+        print(f"  Unchanged (mirror): {unchanged}")
     print(f"  Errors: {errors}")
+    print(f"  Writer: {writer_summary(writer)}")
     print("=" * 50)
 
+
+def sync_stock(args, report, db, products):
+    """--stock-only: masked stock_qty updates for products whose stock changed (no URL encoding)"""
+    print("\nSyncing stock to Firestore...")
+    print("-" * 50)
+
+    stock_sync = StockSync(db, 'products', 'sync-products-firestore', args, report)
+    for product in products:
+        sku = product.get('id', '')
+        if sku and stock_sync.add(sku, {'stock_qty': product.get('stock', 0)}):
+            print(f"  OK {sku}: {product.get('name', '')[:30]}... (stock: {product.get('stock', 0)})")
+    report.count('products_read', len(products))
+
+    result = stock_sync.finish()
+    print("-" * 50)
+    print(f"\nSTOCK SYNC COMPLETE")
+    print(f"  Updated: {result['written']}")
+    print(f"  Unchanged: {result['unchanged']}")
+    print(f"  Errors: {result['errors']}")
+    print(f"  Writer: {result['writer']}")
+    print("=" * 50)
+
+
 if __name__ == "__main__":
     main()
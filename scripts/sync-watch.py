@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Long-running sync daemon: sync each new WooCommerce export (or REST API change) within seconds
+"""
+
+import argparse
+import importlib.util
+import json
+import signal
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from synclib import RunReport, firestore_client, load_env
+from synclib.watch import HEALTH_PATH, DirectoryWatcher, HealthFile
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+
+def load_full_sync():
+    """Import sync-woocommerce-full.py (hyphenated, so not importable by name)"""
+    spec = importlib.util.spec_from_file_location('sync_woocommerce_full', SCRIPTS_DIR / 'sync-woocommerce-full.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class Daemon:
+    def __init__(self, args):
+        self.args = args
+        self.full_sync = load_full_sync()
+        self.stop = threading.Event()
+        self.last_synced = None  # (path, mtime_ns, size) of the last export synced
+        self.health = HealthFile(args.health_file, mode='api' if args.api else 'export',
+                                 watching=None if args.api else str(args.dir))
+        self.db = None
+
+    # Lifecycle
+
+    def handle_signal(self, signum, frame):
+        if self.stop.is_set():
+            raise KeyboardInterrupt
+        print(f"\n{signal.Signals(signum).name}: finishing the current sync, then stopping")
+        self.stop.set()
+
+    def run(self):
+        load_env()
+        self.db = firestore_client()
+        if self.db is None:
+            sys.exit(1)
+        print(f"Project: {self.db.project}")
+
+        if self.args.health_port:
+            serve_health(self.health, self.args.health_port)
+
+        try:
+            if self.args.api:
+                self.poll_api()
+            else:
+                self.watch_exports()
+        finally:
+            self.health.update(state='stopped')
+            print("Stopped")
+
+    def poll_api(self):
+        print(f"Polling the WooCommerce API every {self.args.interval:.0f}s (Ctrl+C to stop)")
+        while not self.stop.is_set():
+            self.sync(['--api'])
+            self.health.update(state='idle')
+            self.stop.wait(self.args.interval)
+
+    def watch_exports(self):
+        watcher = DirectoryWatcher(self.args.dir, self.args.pattern).start()
+        self.health.update(state='idle', backend=watcher.backend)
+        print(f"Watching {self.args.dir}/{self.args.pattern} ({watcher.backend}, "
+              f"{self.args.debounce:.0f}s debounce; Ctrl+C to stop)")
+        if not self.args.no_initial_sync:
+            watcher.notify()
+
+        try:
+            while not self.stop.is_set():
+                if not watcher.changed.wait(self.args.heartbeat):
+                    self.health.update()  # heartbeat
+                    continue
+                # Debounce: wait until the directory has been quiet for a while (exports arrive in chunks)
+                while not self.stop.is_set() and time.monotonic() - watcher.last_event < self.args.debounce:
+                    self.stop.wait(0.2)
+                watcher.changed.clear()
+                if self.stop.is_set():
+                    break
+
+                export = watcher.newest()
+                if export is None:
+                    continue
+                st = export.stat()
+                key = (str(export), st.st_mtime_ns, st.st_size)
+                if key == self.last_synced:
+                    continue
+                if self.sync([str(export)]):
+                    self.last_synced = key
+                self.health.update(state='idle')
+        finally:
+            watcher.stop()
+
+    # Sync
+
+    def sync(self, sync_argv):
+        """Run one in-process sync with the warm client; returns True on success"""
+        argv = sync_argv + self.args.sync_args
+        started = time.perf_counter()
+        started_at = datetime.now().isoformat(timespec='seconds')
+        self.health.update(state='syncing', current={'argv': argv, 'started_at': started_at})
+        print(f"\n[{started_at}] sync {' '.join(argv)}")
+
+        result = {'argv': argv, 'started_at': started_at}
+        try:
+            sync_args = self.full_sync.parse_args(argv)
+            with RunReport('sync-woocommerce-full', sync_args) as report:
+                result.update(self.full_sync.sync(sync_args, report, db=self.db) or {})
+            result['status'] = 'ok' if not result.get('errors') else f"{result['errors']} errors"
+        except SystemExit as e:
+            result['status'] = f'exit {e.code}'
+        except Exception as e:
+            traceback.print_exc()
+            result['status'] = f'error: {type(e).__name__}: {e}'
+
+        result['duration_s'] = round(time.perf_counter() - started, 3)
+        self.health.update(current=None)
+        self.health.record_sync(result)
+        print(f"[{datetime.now().isoformat(timespec='seconds')}] {result['status']} in {result['duration_s']:.1f}s")
+        return result['status'] == 'ok'
+
+
+def serve_health(health, port):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') not in ('', '/healthz'):
+                self.send_error(404)
+                return
+            body = json.dumps(health.state, ensure_ascii=False, default=str).encode('utf-8')
+            self.send_response(200 if health.healthy else 503)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, name='health', daemon=True).start()
+    print(f"Health: http://127.0.0.1:{port}/healthz")
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch exports (or poll the WooCommerce API) and sync changes")
+    parser.add_argument('--dir', type=Path, default=Path.home() / 'Downloads', help="Directory to watch for exports")
+    parser.add_argument('--pattern', default='wc-product-export*.csv', help="Export file name pattern")
+    parser.add_argument('--debounce', type=float, default=5.0, metavar='SECONDS',
+                        help="Quiet period after the last change before syncing (default: 5)")
+    parser.add_argument('--no-initial-sync', action='store_true', help="Don't sync the newest export at startup")
+    parser.add_argument('--api', action='store_true', help="Poll the WooCommerce REST API instead of watching files")
+    parser.add_argument('--interval', type=float, default=60.0, metavar='SECONDS',
+                        help="API poll interval (default: 60)")
+    parser.add_argument('--heartbeat', type=float, default=30.0, metavar='SECONDS', help="Health file refresh interval")
+    parser.add_argument('--health-file', type=Path, default=HEALTH_PATH)
+    parser.add_argument('--health-port', type=int, default=0, help="Serve health JSON on 127.0.0.1:PORT/healthz")
+    parser.add_argument('sync_args', nargs='*', help="Arguments for sync-woocommerce-full.py (after --)")
+    args = parser.parse_args()
+
+    if not args.api and not args.dir.is_dir():
+        parser.error(f"not a directory: {args.dir}")
+
+    daemon = Daemon(args)
+    signal.signal(signal.SIGTERM, daemon.handle_signal)
+    signal.signal(signal.SIGINT, daemon.handle_signal)
+    daemon.run()
+
+
+if __name__ == "__main__":
+    main()
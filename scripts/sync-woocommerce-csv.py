@@ -7,75 +7,64 @@ Usage:
     python3 scripts/sync-woocommerce-csv.py /path/to/export.csv
 """
 
-import csv
+import argparse
 import sys
 import os
-import re
-from pathlib import Path
-from urllib.parse import urlparse, quote, urlunparse
 from google.cloud import firestore
-from google.oauth2 import service_account
-from html import unescape
-
-def encode_url(url):
-    """Encode Georgian characters in URL for Facebook Messenger"""
-    if not url or not url.strip():
-        return url
-    try:
-        parsed = urlparse(url.strip())
-        path_segments = parsed.path.split('/')
-        encoded_segments = []
-        for segment in path_segments:
-            if segment:
-                if any(ord(char) > 127 for char in segment):
-                    encoded_segment = quote(segment, safe='-._~')
-                    encoded_segments.append(encoded_segment)
-                else:
-                    encoded_segments.append(segment)
-            else:
-                encoded_segments.append('')
-        encoded_path = '/'.join(encoded_segments)
-        return urlunparse((parsed.scheme, parsed.netloc, encoded_path, parsed.params, parsed.query, parsed.fragment))
-    except:
-        return url
-
-def clean_html(text):
-    """Remove HTML tags and clean up text"""
-    if not text:
-        return ""
-    # Remove HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
-    # Unescape HTML entities
-    text = unescape(text)
-    # Clean up whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
-
-def parse_images(images_str):
-    """Parse comma-separated image URLs and encode them"""
-    if not images_str:
-        return []
-    urls = [url.strip() for url in images_str.split(',') if url.strip()]
-    return [encode_url(url) for url in urls]
-
-def load_env():
-    """Load .env.local file"""
-    env_path = Path(__file__).parent.parent / '.env.local'
-    if env_path.exists():
-        with open(env_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    value = value.strip('"').strip("'").replace('\\n', '\n')
-                    os.environ[key] = value
+from synclib import (
+    NOOP, STOCK_FIELDS, DescriptionStore, Field, RunReport, StockSync, WritePlan, add_mirror_arguments,
+    add_reader_arguments, add_report_arguments, add_stock_arguments, add_writer_arguments, clean_html,
+    descriptions_collection, firestore_client, forget_documents, load_env, make_writer, open_mirror, parent_keys,
+    parse_images, read_records, writer_stats, writer_summary,
+)
+
+# The export columns this sync uses, parsed by the reader (see synclib/csv_reader.py)
+FIELDS = [
+    Field('id', 'ID'),
+    Field('stock', 'Stock', 'int', '0'),
+    Field('price', 'Regular price', 'float', '0'),
+    Field('sale_price', 'Sale price', 'float?'),
+    Field('images', 'Images', 'raw'),
+    Field('sku', 'SKU'),
+    Field('name', 'Name'),
+    Field('type', 'Type'),
+    Field('parent', 'Parent'),
+    Field('short_description', 'Short description', 'raw'),
+    Field('description', 'Description', 'raw'),
+    Field('in_stock', 'In stock?', 'raw', '0'),
+    Field('categories', 'Categories'),
+    Field('tags', 'Tags'),
+    Field('attr1_name', 'Attribute 1 name', 'raw'),
+    Field('attr1_value', 'Attribute 1 value(s)'),
+    Field('attr2_name', 'Attribute 2 name', 'raw'),
+    Field('attr2_value', 'Attribute 2 value(s)'),
+    Field('attr4_name', 'Attribute 4 name', 'raw'),
+    Field('attr4_value', 'Attribute 4 value(s)'),
+    Field('published', 'Published', 'raw', '0'),
+    Field('visibility', 'Visibility in catalog'),
+    Field('upsells', 'Upsells'),
+    Field('cross_sells', 'Cross-sells'),
+]
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 scripts/sync-woocommerce-csv.py /path/to/export.csv")
-        sys.exit(1)
-
-    csv_path = sys.argv[1]
+    parser = argparse.ArgumentParser(description="Sync WooCommerce CSV export to Firestore (doc ID = WooCommerce ID)")
+    parser.add_argument('csv_path', help="WooCommerce product export CSV")
+    parser.add_argument('--full', action='store_true', help="With --stock-only: push every row's stock")
+    add_reader_arguments(parser)
+    add_stock_arguments(parser)
+    add_writer_arguments(parser)
+    add_mirror_arguments(parser)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    if args.stock_only and (args.mirror or args.plan):
+        parser.error("--stock-only can't be combined with --mirror or --plan")
+
+    with RunReport('sync-woocommerce-csv', args) as report:
+        sync(args, report)
+
+
+def sync(args, report):
+    csv_path = args.csv_path
     if not os.path.exists(csv_path):
         print(f"Error: File not found: {csv_path}")
         sys.exit(1)
@@ -85,94 +74,95 @@ def main():
     print("=" * 60)
 
     # Load environment
-    load_env()
-
-    project_id = os.environ.get('GOOGLE_CLOUD_PROJECT_ID', '').strip()
-    client_email = os.environ.get('GOOGLE_CLOUD_CLIENT_EMAIL', '').strip()
-    private_key = os.environ.get('GOOGLE_CLOUD_PRIVATE_KEY', '').strip()
-
-    if not all([project_id, client_email, private_key]):
-        print("Error: Missing Firebase credentials")
+    with report.stage('credentials'):
+        load_env()
+        db = firestore_client()
+    if db is None:
         sys.exit(1)
 
-    print(f"\nProject: {project_id}")
-
-    # Create credentials
-    credentials = service_account.Credentials.from_service_account_info({
-        'type': 'service_account',
-        'project_id': project_id,
-        'private_key': private_key,
-        'client_email': client_email,
-        'token_uri': 'https://oauth2.googleapis.com/token',
-    })
+    print(f"\nProject: {db.project}")
 
-    db = firestore.Client(project=project_id, credentials=credentials)
+    if args.stock_only:
+        return sync_stock(args, report, db)
 
     # Read CSV
     print(f"\nReading: {csv_path}")
+    report.count('csv_bytes', os.path.getsize(csv_path))
 
-    products = []
-    with open(csv_path, 'r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            products.append(row)
+    mirror = open_mirror(db, 'products', args, report)
+    plan = WritePlan(mirror) if mirror is not None else None
 
-    print(f"Found {len(products)} products")
-    print("\nSyncing to Firestore...")
+    print("\nSyncing to Firestore..." if not args.plan else "\nPlanning against the mirror...")
     print("-" * 60)
 
-    synced = 0
+    queued = 0
     skipped = 0
+    unchanged = 0
     errors = 0
+    writer = None if args.plan else make_writer(db, args, report=report)
+    written_ids = {}  # document path -> doc_id, to drop written documents from the manifests
+    # Each distinct description is cleaned once and stored once, as in the full sync (see synclib/descriptions.py)
+    descriptions = DescriptionStore(report.wrap(clean_html, 'html_clean'))
+    parent_descriptions = {}  # parent key (name, SKU, id:<ID>) -> description ID
+    images_from = report.wrap(parse_images, 'url_encode')
+
+    rows_read = 0
 
-    for product in products:
-        product_id = product.get('ID', '').strip()
+    # Single pass: each row is transformed and queued as it is read
+    for product in report.iter(read_records(csv_path, FIELDS, args.csv_engine), 'csv_parse'):
+        rows_read += 1
+        product_id = product.id
 
         if not product_id:
             skipped += 1
             continue
 
         try:
-            # Parse stock - handle empty values
-            stock_str = product.get('Stock', '0').strip()
-            stock = int(stock_str) if stock_str else 0
-
-            # Parse price
-            price_str = product.get('Regular price', '0').strip()
-            price = float(price_str) if price_str else 0
-
-            sale_price_str = product.get('Sale price', '').strip()
-            sale_price = float(sale_price_str) if sale_price_str else None
+            # Stock and prices come parsed (empty -> 0 / None); a value that didn't parse fails the row
+            if product.error:
+                raise ValueError(product.error)
+            stock = product.stock
+            price = product.price
+            sale_price = product.sale_price
 
             # Parse images
-            images = parse_images(product.get('Images', ''))
+            images = images_from(product.images)
+
+            description_id = descriptions.add(product.description)
+            if product.type == 'variable':
+                for key in parent_keys(product):
+                    parent_descriptions[key] = description_id
+            elif product.type == 'variation' and not description_id:
+                # Variations reference their parent's description (parents precede them in the export)
+                description_id = parent_descriptions.get(product.parent)
 
             # Build Firestore document
             firestore_product = {
                 'wc_id': product_id,
-                'sku': product.get('SKU', '').strip(),
-                'name': product.get('Name', '').strip(),
-                'type': product.get('Type', '').strip(),
-                'short_description': clean_html(product.get('Short description', '')),
-                'description': clean_html(product.get('Description', '')),
+                'sku': product.sku,
+                'name': product.name,
+                'type': product.type,
+                'short_description': descriptions.clean(product.short_description),
+                'description_id': description_id,  # text in products_descriptions
+                'description': firestore.DELETE_FIELD,  # stored there now, not on every document
                 'stock_qty': stock,
-                'in_stock': product.get('In stock?', '0') == '1',
+                'in_stock': product.in_stock == '1',
                 'price': price,
                 'sale_price': sale_price,
                 'currency': 'GEL',
-                'categories': product.get('Categories', '').strip(),
-                'tags': product.get('Tags', '').strip(),
+                'categories': product.categories,
+                'tags': product.tags,
                 'images': images,
                 'image': images[0] if images else '',
                 # Attributes
-                'attr_size': product.get('Attribute 1 value(s)', '').strip() if product.get('Attribute 1 name', '') == 'ზომა' else '',
-                'attr_color': product.get('Attribute 2 value(s)', '').strip() if product.get('Attribute 2 name', '') == 'ფერი' else '',
-                'attr_material': product.get('Attribute 4 value(s)', '').strip() if product.get('Attribute 4 name', '') == 'მატერია' else '',
+                'attr_size': product.attr1_value if product.attr1_name == 'ზომა' else '',
+                'attr_color': product.attr2_value if product.attr2_name == 'ფერი' else '',
+                'attr_material': product.attr4_value if product.attr4_name == 'მატერია' else '',
                 # Meta
-                'published': product.get('Published', '0') == '1',
-                'visibility': product.get('Visibility in catalog', '').strip(),
-                'upsells': product.get('Upsells', '').strip(),
-                'cross_sells': product.get('Cross-sells', '').strip(),
+                'published': product.published == '1',
+                'visibility': product.visibility,
+                'upsells': product.upsells,
+                'cross_sells': product.cross_sells,
                 # Sync info
                 'last_updated_by': 'woocommerce_sync',
                 'synced_at': firestore.SERVER_TIMESTAMP
@@ -181,23 +171,104 @@ def main():
             # Remove None values
             firestore_product = {k: v for k, v in firestore_product.items() if v is not None}
 
-            # Save to Firestore with WooCommerce ID as document ID
-            db.collection('products').document(product_id).set(firestore_product, merge=True)
+            # The mirror already holds this document as the row would write it
+            if plan is not None and plan.add(product_id, firestore_product) == NOOP:
+                unchanged += 1
+                continue
+            if writer is None:
+                queued += 1
+                continue
+
+            # Queue for Firestore with WooCommerce ID as document ID
+            doc_ref = db.collection('products').document(product_id)
+            writer.set(doc_ref, firestore_product, merge=True, label=product_id)
+            written_ids[doc_ref.path] = product_id
 
             name = firestore_product.get('name', '')[:35]
             print(f"  OK {product_id}: {name}... (stock: {stock})")
-            synced += 1
+            queued += 1
 
         except Exception as e:
             print(f"  ERROR {product_id}: {e}")
             errors += 1
 
+    report.count('rows_read', rows_read)
+    report.count('descriptions_distinct', len(descriptions.texts))
+    report.count('description_cache_hits', descriptions.hits)
+    report.count('rows_skipped', skipped)
+    report.count('transform_errors', errors)
+    report.count('unchanged', unchanged)
+    if plan is not None:
+        report.set('plan', plan.to_dict())
+        mirror.close()
+        print("-" * 60)
+        for line in plan.lines():
+            print(line)
+    if writer is None:
+        print(f"\nRead {rows_read} products from CSV")
+        print(f"Descriptions: {len(descriptions.texts)} distinct ({descriptions_collection('products')})")
+        print("Plan only: nothing written")
+        print("=" * 60)
+        return
+
+    # One document per distinct description, keyed by its content hash
+    for description_id, text in descriptions.texts.items():
+        doc_ref = db.collection(descriptions_collection('products')).document(description_id)
+        writer.set(doc_ref, {'text': text, 'synced_at': firestore.SERVER_TIMESTAMP}, merge=True, label=description_id)
+    print(f"Descriptions: {len(descriptions.texts)} distinct, {descriptions.hits} of {descriptions.lookups} "
+          f"cleanings served from cache")
+
+    # Commit remaining batches; per-document failures are reported by the writer
+    writer.close()
+    synced = writer.written
+    errors += writer.errors
+    report.set('writer', writer_stats(writer))
+    forget_documents(db.project, 'products',
+                     [doc_id for path, doc_id in written_ids.items() if path not in writer.failed_paths])
+
     print("-" * 60)
+    print(f"\nRead {rows_read} products from CSV")
     print(f"\nSYNC COMPLETE")
     print(f"  Synced: {synced}")
     print(f"  Skipped: {skipped}")
+    if plan is not None:
+        print(f"  Unchanged (mirror): {unchanged}")
     print(f"  Errors: {errors}")
+    print(f"  Writer: {writer_summary(writer)}")
     print("=" * 60)
 
+
+def sync_stock(args, report, db):
+    """--stock-only: masked stock_qty/in_stock updates for rows whose stock changed"""
+    print(f"\nReading stock columns: {args.csv_path}")
+    report.count('csv_bytes', os.path.getsize(args.csv_path))
+    print("-" * 60)
+
+    stock_sync = StockSync(db, 'products', 'sync-woocommerce-csv', args, report)
+    rows_read = 0
+    errors = 0
+    for row in report.iter(read_records(args.csv_path, STOCK_FIELDS, args.csv_engine), 'csv_parse'):
+        rows_read += 1
+        if not row.id:
+            continue
+        if row.error:
+            print(f"  ERROR {row.id}: {row.error}")
+            errors += 1
+            continue
+        if stock_sync.add(row.id, {'stock_qty': row.stock, 'in_stock': row.in_stock == '1'}):
+            print(f"  OK {row.id}: {row.name[:35]}... (stock: {row.stock})")
+    report.count('rows_read', rows_read)
+    report.count('transform_errors', errors)
+
+    result = stock_sync.finish()
+    print("-" * 60)
+    print(f"\nSTOCK SYNC COMPLETE")
+    print(f"  Updated: {result['written']}")
+    print(f"  Unchanged: {result['unchanged']}")
+    print(f"  Errors: {errors + result['errors']}")
+    print(f"  Writer: {result['writer']}")
+    print("=" * 60)
+
+
 if __name__ == "__main__":
     main()
@@ -1,88 +1,103 @@
 #!/usr/bin/env python3
 """
-Sync WooCommerce CSV to:
-1. Firestore products collection (document ID = product name)
-2. AI products.json (id field = WooCommerce ID)
+Sync WooCommerce CSV (or the REST API) to Firestore products and the AI products.json
 
 Usage:
     python3 scripts/sync-woocommerce-full.py /path/to/export.csv
 """
 
-import csv
+import argparse
 import sys
 import os
-import re
 import json
 from pathlib import Path
-from urllib.parse import urlparse, quote, urlunparse
 from google.cloud import firestore
-from google.oauth2 import service_account
-from html import unescape
-
-def encode_url(url):
-    """Encode Georgian characters in URL for Facebook Messenger"""
-    if not url or not url.strip():
-        return url
-    try:
-        parsed = urlparse(url.strip())
-        path_segments = parsed.path.split('/')
-        encoded_segments = []
-        for segment in path_segments:
-            if segment:
-                if any(ord(char) > 127 for char in segment):
-                    encoded_segment = quote(segment, safe='-._~')
-                    encoded_segments.append(encoded_segment)
-                else:
-                    encoded_segments.append(segment)
-            else:
-                encoded_segments.append('')
-        encoded_path = '/'.join(encoded_segments)
-        return urlunparse((parsed.scheme, parsed.netloc, encoded_path, parsed.params, parsed.query, parsed.fragment))
-    except:
-        return url
-
-def clean_html(text):
-    """Remove HTML tags and clean up text"""
-    if not text:
-        return ""
-    text = re.sub(r'<[^>]+>', '', text)
-    text = unescape(text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
-
-def parse_images(images_str):
-    """Parse comma-separated image URLs and encode them"""
-    if not images_str:
-        return []
-    urls = [url.strip() for url in images_str.split(',') if url.strip()]
-    return [encode_url(url) for url in urls]
-
-def sanitize_doc_id(name):
-    """Sanitize product name for use as Firestore document ID"""
-    # Remove problematic characters for Firestore doc IDs
-    # Keep Georgian letters, alphanumeric, spaces, hyphens
-    sanitized = re.sub(r'[/\\.\[\]*`]', '', name)
-    return sanitized.strip()[:500]  # Firestore doc ID max 1500 bytes
-
-def load_env():
-    """Load .env.local file"""
-    env_path = Path(__file__).parent.parent / '.env.local'
-    if env_path.exists():
-        with open(env_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    value = value.strip('"').strip("'").replace('\\n', '\n')
-                    os.environ[key] = value
+from synclib import (
+    IMAGE_CACHE_PATH, MANIFEST_DIR, PROJECT_ROOT, DescriptionStore, FirestoreSink, ImageChecker, ParentImageResolver,
+    ProductsJsonSink, RunJournal, RunReport, WritePlan, add_journal_arguments, add_mirror_arguments,
+    add_report_arguments, add_writer_arguments, build_search_index, clean_html, STOCK_FIELDS, Field, StockSync,
+    add_reader_arguments, add_reconcile_arguments, add_stock_arguments, ai_product, build_prompt_lines,
+    describe_changes, describe_prompt_lines, descriptions_collection, fingerprint, firestore_client, input_hash,
+    load_encoding, load_env, open_mirror, parent_keys, parse_images, read_records, reconcile, records_from_dicts,
+    rows_hash, run_sinks, sanitize_doc_id, write_products_json, write_prompt_lines,
+)
+from synclib.mirror import WRITE_COST
+from synclib.woocommerce_api import API_PREFIX, WooCommerceSource
+
+DEFAULT_PRODUCTS_JSON = PROJECT_ROOT / 'data' / 'products.json'
+TEST_BOT_PRODUCTS_JSON = PROJECT_ROOT / 'test-bot' / 'data' / 'products.json'
+DEAD_IMAGES_PATH = MANIFEST_DIR / 'dead-images.json'
+
+# The export columns this sync uses, parsed by the reader (see synclib/csv_reader.py)
+FIELDS = [
+    Field('id', 'ID'),
+    Field('type', 'Type'),
+    Field('sku', 'SKU'),
+    Field('name', 'Name'),
+    Field('parent', 'Parent'),
+    Field('images', 'Images', 'raw'),
+    Field('stock', 'Stock', 'int', '0'),
+    Field('price', 'Regular price', 'float', '0'),
+    Field('sale_price', 'Sale price', 'float?'),
+    Field('in_stock', 'In stock?', 'raw', '0'),
+    Field('published', 'Published', 'raw', '0'),
+    Field('short_description', 'Short description', 'raw'),
+    Field('description', 'Description', 'raw'),
+    Field('categories', 'Categories'),
+    Field('tags', 'Tags'),
+]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sync WooCommerce CSV to Firestore and products.json")
+    parser.add_argument('csv_path', nargs='?', help="WooCommerce product export CSV")
+    parser.add_argument('--api', action='store_true', help="Pull from the WooCommerce REST API (WC_URL) instead of a CSV")
+    parser.add_argument('--api-workers', type=int, default=8, metavar='N', help="Parallel API requests (default: 8)")
+    parser.add_argument('--full', action='store_true', help="Rewrite every product, ignoring the last run's fingerprints")
+    parser.add_argument('--products-json', type=Path, action='append', default=None, metavar='PATH',
+                        help="AI products.json to write (repeatable; default: data/products.json); "
+                             "the search index and catalog go next to each")
+    parser.add_argument('--test-bot', action='store_true', help=f"Also write {TEST_BOT_PRODUCTS_JSON.relative_to(PROJECT_ROOT)}")
+    parser.add_argument('--collection', action='append', default=None, metavar='NAME',
+                        help="Firestore collection to sync (repeatable; default: products)")
+    parser.add_argument('--changes', type=Path, default=None, metavar='PATH',
+                        help="Write the first products.json's added/removed/changed ID summary here (for deploy steps)")
+    parser.add_argument('--check-images', action='store_true', help="Validate every image URL and list products with dead images")
+    parser.add_argument('--image-workers', type=int, default=16, metavar='N', help="Parallel image checks (default: 16)")
+    parser.add_argument('--image-cache', type=Path, default=IMAGE_CACHE_PATH, metavar='PATH',
+                        help="SQLite cache of image check results (default: .sync/image-cache.sqlite)")
+    add_reader_arguments(parser)
+    add_stock_arguments(parser)
+    add_journal_arguments(parser)
+    add_mirror_arguments(parser)
+    add_reconcile_arguments(parser)
+    add_writer_arguments(parser)
+    add_report_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if bool(args.csv_path) == args.api:
+        parser.error("pass either an export CSV or --api")
+    if args.stock_only and (args.reconcile or args.check_images or args.resume or args.mirror or args.plan):
+        parser.error("--stock-only can't be combined with --reconcile, --check-images, --resume, --mirror or --plan")
+    if args.api and args.reconcile and not args.full:
+        parser.error("--reconcile needs the whole catalog; with --api, add --full")
+
+    args.products_json = args.products_json or [DEFAULT_PRODUCTS_JSON]
+    if args.test_bot and TEST_BOT_PRODUCTS_JSON not in args.products_json:
+        args.products_json.append(TEST_BOT_PRODUCTS_JSON)
+    args.collection = list(dict.fromkeys(args.collection or ['products']))
+    return args
+
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 scripts/sync-woocommerce-full.py /path/to/export.csv")
-        sys.exit(1)
+    args = parse_args()
+    with RunReport('sync-woocommerce-full', args) as report:
+        sync(args, report)
+
 
-    csv_path = sys.argv[1]
-    if not os.path.exists(csv_path):
+def sync(args, report, db=None):
+    """Run one sync; db is an already-open Firestore client (scripts/sync-watch.py keeps one warm)"""
+    csv_path = args.csv_path
+    if csv_path and not os.path.exists(csv_path):
         print(f"Error: File not found: {csv_path}")
         sys.exit(1)
 
@@ -91,115 +106,142 @@ def main():
     print("=" * 60)
 
     # Load environment
-    load_env()
-
-    project_id = os.environ.get('GOOGLE_CLOUD_PROJECT_ID', '').strip()
-    client_email = os.environ.get('GOOGLE_CLOUD_CLIENT_EMAIL', '').strip()
-    private_key = os.environ.get('GOOGLE_CLOUD_PRIVATE_KEY', '').strip()
-
-    if not all([project_id, client_email, private_key]):
-        print("Error: Missing Firebase credentials")
-        sys.exit(1)
+    if db is None:
+        with report.stage('credentials'):
+            load_env()
+            db = firestore_client()
+        if db is None:
+            sys.exit(1)
+    project_id = db.project
 
     print(f"\nProject: {project_id}")
 
-    # Create credentials
-    credentials = service_account.Credentials.from_service_account_info({
-        'type': 'service_account',
-        'project_id': project_id,
-        'private_key': private_key,
-        'client_email': client_email,
-        'token_uri': 'https://oauth2.googleapis.com/token',
-    })
-
-    db = firestore.Client(project=project_id, credentials=credentials)
-
-    # Read CSV
-    print(f"\nReading: {csv_path}")
-
-    products_csv = []
-    with open(csv_path, 'r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            products_csv.append(row)
-
-    print(f"Found {len(products_csv)} rows in CSV")
-
-    # First pass: Build parent name -> images map
-    parent_images = {}
-    for product in products_csv:
-        name = product.get('Name', '').strip()
-        product_type = product.get('Type', '').strip()
-        images = parse_images(product.get('Images', ''))
-        if product_type == 'variable' and images:
-            parent_images[name] = images
-            print(f"  Parent images: '{name[:30]}...' has {len(images)} images")
-
-    print(f"\nFound {len(parent_images)} parent products with images")
+    if args.stock_only:
+        return sync_stock(args, report, db)
+
+    # Source: CSV export, or changed products from the REST API
+    source = None
+    incremental = False
+    if args.api:
+        source = api_source(args)
+        print(f"\nFetching: {source.base_url}{API_PREFIX}")
+        with report.stage('api_fetch'):
+            api_rows = source.fetch(full=args.full)
+        incremental = source.incremental
+        report.count('api_requests', source.requests)
+        print(f"  {len(api_rows)} rows in {source.requests} requests"
+              + (f" (modified after {source.modified_after} UTC)" if incremental else " (full pull)"))
+        rows = records_from_dicts(api_rows, FIELDS)
+        with report.stage('input_hash'):
+            input_sha256 = rows_hash(api_rows)
+    else:
+        print(f"\nReading: {csv_path}" + (f" ({args.csv_engine} engine)" if args.csv_engine != 'csv' else ''))
+        report.count('csv_bytes', os.path.getsize(csv_path))
+        rows = report.iter(read_records(csv_path, FIELDS, args.csv_engine), 'csv_parse')
+        with report.stage('input_hash'):
+            input_sha256 = input_hash(csv_path)
+
+    # --plan writes nothing, so it has no progress to journal
+    journal = None if args.plan else open_journal(args, project_id, input_sha256)
+    if journal is not None:
+        report.set('resume', {'input_sha256': input_sha256, 'resumed': journal.resumed,
+                              'journaled': journal.documents})
+    mirrors = {collection: open_mirror(db, collection, args, report) for collection in args.collection}
+    plans = {collection: WritePlan(mirror) for collection, mirror in mirrors.items() if mirror is not None}
+    firestore_sinks = [FirestoreSink(db, collection, args, report, incremental, journal, plans.get(collection),
+                                     args.plan)
+                       for collection in args.collection]
+    # Descriptions are content-addressed: the manifest already knows which exist
+    description_sinks = [FirestoreSink(db, descriptions_collection(collection), args, report, incremental, journal,
+                                       dry_run=args.plan)
+                         for collection in args.collection]
+    json_sinks = [ProductsJsonSink(path, report, args.changes if i == 0 else None)
+                  for i, path in enumerate(args.products_json)]
+    if args.full:
+        print("Mode: full rewrite (--full)")
+    elif plans:
+        print(f"Mode: delta against the mirror ({len(mirrors[args.collection[0]])} documents)")
+    else:
+        print(f"Mode: delta ({len(firestore_sinks[0].manifest.previous)} fingerprints from last run)")
+    print(f"Targets: {', '.join(sink.name for sink in firestore_sinks + description_sinks + json_sinks)}")
+
+    # Single pass: read -> transform -> queue for every collection, one row at a time
+    resolver = ParentImageResolver(report.wrap(parse_images, 'url_encode'))
+    # Each distinct description is cleaned once and stored once (see synclib/descriptions.py)
+    descriptions = DescriptionStore(report.wrap(clean_html, 'html_clean'))
+    parent_descriptions = {}  # parent key (name, SKU, id:<ID>) -> description ID
+    content_hash = report.wrap(fingerprint, 'fingerprint')
+    rows_read = 0
 
     # Process products
     ai_products = []  # For products.json
-    firestore_synced = 0
-    firestore_errors = 0
+    product_images = []  # (wc_id, name, images) for --check-images
+    csv_doc_ids = set()  # every document ID the export accounts for, for --reconcile
+    firestore_queued = 0
+    transform_errors = 0
 
     print("\n" + "-" * 60)
     print("SYNCING TO FIRESTORE (Document ID = Product Name)")
     print("-" * 60)
 
-    for product in products_csv:
-        wc_id = product.get('ID', '').strip()
-        name = product.get('Name', '').strip()
-        product_type = product.get('Type', '').strip()
+    for product, images in resolver.resolve(rows):
+        rows_read += 1
+        wc_id = product.id
+        name = product.name
+        product_type = product.type
 
         if not wc_id or not name:
             continue
 
+        # Document ID = sanitized product name
+        doc_id = sanitize_doc_id(name)
+        if args.reconcile:
+            csv_doc_ids.add(doc_id)
+
         # Skip variable parents for stock management (only variations have real stock)
         # But include them for product catalog
 
         try:
-            # Parse data
-            stock_str = product.get('Stock', '0').strip()
-            stock = int(stock_str) if stock_str else 0
-
-            price_str = product.get('Regular price', '0').strip()
-            price = float(price_str) if price_str else 0
-
-            sale_price_str = product.get('Sale price', '').strip()
-            sale_price = float(sale_price_str) if sale_price_str else None
-
-            images = parse_images(product.get('Images', ''))
-
-            # For variations, get image from parent product
-            if product_type == 'variation' and not images:
-                parent_name = product.get('Parent', '').strip()
-                if parent_name and parent_name in parent_images:
-                    images = parent_images[parent_name]
-
-            short_desc = clean_html(product.get('Short description', ''))
-            description = clean_html(product.get('Description', ''))
-
-            # Document ID = sanitized product name
-            doc_id = sanitize_doc_id(name)
+            # Stock and prices come parsed; a value that didn't parse fails the row
+            if product.error:
+                raise ValueError(product.error)
+            stock = product.stock
+            price = product.price
+            sale_price = product.sale_price
+
+            # images: own images, or the parent's for variations (see ParentImageResolver)
+            if args.check_images and images:
+                product_images.append((wc_id, name, images))
+
+            short_desc = descriptions.clean(product.short_description)
+            description_id = descriptions.add(product.description)
+            if product_type == 'variable':
+                for key in parent_keys(product):
+                    parent_descriptions[key] = description_id
+            elif product_type == 'variation' and not description_id:
+                # Variations reference their parent's description; if the parent isn't in this
+                # run (incremental pull), None leaves the stored reference as it is
+                description_id = parent_descriptions.get(product.parent)
 
             # Firestore document
             firestore_product = {
                 'id': wc_id,  # WooCommerce ID as field
-                'sku': product.get('SKU', '').strip(),
+                'sku': product.sku,
                 'name': name,
                 'type': product_type,
                 'short_description': short_desc,
-                'description': description,
+                'description_id': description_id,  # text in <collection>_descriptions
+                'description': firestore.DELETE_FIELD,  # stored there now, not on every document
                 'stock_qty': stock,
-                'in_stock': product.get('In stock?', '0') == '1',
+                'in_stock': product.in_stock == '1',
                 'price': price,
                 'sale_price': sale_price,
                 'currency': 'GEL',
-                'categories': product.get('Categories', '').strip(),
-                'tags': product.get('Tags', '').strip(),
+                'categories': product.categories,
+                'tags': product.tags,
                 'images': images,
                 'image': images[0] if images else '',
-                'published': product.get('Published', '0') == '1',
+                'published': product.published == '1',
                 'last_updated_by': 'woocommerce_sync',
                 'synced_at': firestore.SERVER_TIMESTAMP
             }
@@ -207,57 +249,335 @@ def main():
             # Remove None values
             firestore_product = {k: v for k, v in firestore_product.items() if v is not None}
 
-            # Save to Firestore with product name as document ID
-            db.collection('products').document(doc_id).set(firestore_product, merge=True)
-            firestore_synced += 1
-
-            if firestore_synced <= 10:
-                print(f"  OK '{doc_id[:40]}...' (ID: {wc_id}, stock: {stock})")
+            fp = content_hash(firestore_product)
+            queued = [sink.add(doc_id, firestore_product, fp, label=wc_id) for sink in firestore_sinks]
+            if any(queued):
+                firestore_queued += 1
+                if firestore_queued <= 10:
+                    print(f"  OK '{doc_id[:40]}...' (ID: {wc_id}, stock: {stock})")
 
             # Add to AI products list (only variations with price, or simple products)
-            if product_type in ['simple', 'variation'] and price > 0:
-                ai_product = {
-                    'id': wc_id,  # WooCommerce ID
-                    'name': name,
-                    'price': price,
-                    'currency': 'GEL',
-                    'category': product.get('Categories', '').split('>')[0].strip() if product.get('Categories') else '',
-                    'stock': stock,
-                    'image': images[0] if images else '',
-                    'short_description': short_desc[:200] if short_desc else ''
-                }
-                ai_products.append(ai_product)
+            entry = ai_product(firestore_product, doc_id)
+            if entry is not None:
+                ai_products.append(entry)
 
         except Exception as e:
             print(f"  ERROR {wc_id}: {e}")
-            firestore_errors += 1
+            transform_errors += 1
+
+    if firestore_queued > 10:
+        print(f"  ... and {firestore_queued - 10} more")
+
+    print(f"\nRead {rows_read} rows from {'API' if source else 'CSV'} ({resolver.parents_with_images} parent products with images, "
+          f"{resolver.buffered_max} variations buffered at most)")
+
+    # One document per distinct description, keyed (and fingerprinted) by its content hash
+    for description_id, text in descriptions.texts.items():
+        for sink in description_sinks:
+            sink.add(description_id, {'text': text, 'synced_at': firestore.SERVER_TIMESTAMP}, description_id)
+    print(f"Descriptions: {len(descriptions.texts)} distinct, {descriptions.hits} of {descriptions.lookups} "
+          f"cleanings served from cache")
+
+    report.count('rows_read', rows_read)
+    report.count('descriptions_distinct', len(descriptions.texts))
+    report.count('description_cache_hits', descriptions.hits)
+    report.count('firestore_unchanged', sum(sink.unchanged for sink in firestore_sinks))
+    report.count('firestore_resumed', sum(sink.resumed for sink in firestore_sinks + description_sinks))
+
+    for collection, plan in plans.items():
+        report.set(f'plan:{collection}', plan.to_dict())
+        if not args.plan:
+            print(f"Plan {collection}: {plan.describe()}")
+    if args.plan:
+        return show_plan(firestore_sinks, description_sinks, plans, mirrors, rows_read)
+    report.count('transform_errors', transform_errors)
+
+    if args.check_images:
+        check_images(args, report, product_images)
+
+    if incremental:
+        # Only changed products were pulled: update the existing products.json in place
+        ai_products = merge_products(args.products_json[0], ai_products, {row.get('ID', '').strip() for row in api_rows})
+
+    # Sort by name for easier reading (ID breaks ties so the output is stable)
+    ai_products.sort(key=lambda x: (x.get('name', ''), x.get('id', '')))
+    report.count('ai_products', len(ai_products))
+    with report.stage('search_index'):
+        search_index = build_search_index(ai_products)
+    with report.stage('prompt_lines'):
+        prompt_lines = build_prompt_lines(ai_products, prompt_encoding())
+    for sink in json_sinks:
+        sink.set_products(ai_products, search_index, prompt_lines)
+
+    # Every target gets the same snapshot; Firestore drains while the JSON files are written
+    print("\n" + "-" * 60)
+    print(f"WRITING {len(firestore_sinks) + len(description_sinks) + len(json_sinks)} TARGETS "
+          f"(Firestore + descriptions + products.json)")
+    print("-" * 60)
+
+    results = run_sinks(firestore_sinks + description_sinks + json_sinks)
+    if journal is not None:
+        journal.finish()  # every write is acknowledged (or failed and left out of the manifest)
+    for mirror in mirrors.values():
+        if mirror is not None:
+            mirror.close()
+    for result in results:
+        for line in result.pop('lines'):
+            print(f"  {line}")
+    print(f"  (products.json: only variations and simple products with price > 0)")
+
+    report.set('targets', results)
+    report.set('writer', results[0]['writer'])
+    report.set('products_json', results[len(firestore_sinks) + len(description_sinks)]['products_json'])
+
+    firestore_results = results[:len(firestore_sinks)]
+    description_results = results[len(firestore_sinks):len(firestore_sinks) + len(description_sinks)]
+    firestore_synced = sum(r['written'] for r in firestore_results)
+    firestore_unchanged = sum(r['unchanged'] for r in firestore_results)
+    firestore_errors = transform_errors + sum(r['errors'] for r in firestore_results + description_results)
+
+    if args.reconcile:
+        reconcile_collections(db, args, report, csv_doc_ids, set(descriptions.texts))
+
+    if source is not None:
+        # Failed writes would be skipped by the next incremental pull, so only then move on
+        if firestore_errors:
+            print(f"\nAPI checkpoint not advanced ({firestore_errors} errors); the next pull repeats this one")
+        else:
+            report.set('api_checkpoint', source.save_checkpoint())
+        source.close()
 
-    if firestore_synced > 10:
-        print(f"  ... and {firestore_synced - 10} more")
+    print("\n" + "=" * 60)
+    print("SYNC COMPLETE!")
+    print(f"  Firestore: {firestore_synced} written, {firestore_unchanged} unchanged, {firestore_errors} errors "
+          f"across {len(firestore_sinks)} collection(s) (doc ID = product name)")
+    print(f"  AI Database: {len(ai_products)} products in {len(json_sinks)} file(s) (id = WooCommerce ID)")
+    print("=" * 60)
 
-    print(f"\nFirestore: {firestore_synced} synced, {firestore_errors} errors")
+    return {'rows': rows_read, 'written': firestore_synced, 'unchanged': firestore_unchanged,
+            'errors': firestore_errors, 'ai_products': len(ai_products)}
+
+def sync_stock(args, report, db):
+    """--stock-only: masked stock updates and products.json stock patches, nothing else"""
+    if args.api:
+        source = api_source(args)
+        with report.stage('api_fetch'):
+            rows = list(records_from_dicts(source.fetch(full=args.full), STOCK_FIELDS))
+        report.count('api_requests', source.requests)
+        print(f"\nFetched {len(rows)} rows from {source.base_url} in {source.requests} requests")
+    else:
+        source = None
+        print(f"\nReading stock columns: {args.csv_path}")
+        report.count('csv_bytes', os.path.getsize(args.csv_path))
+        rows = report.iter(read_records(args.csv_path, STOCK_FIELDS, args.csv_engine), 'csv_parse')
 
-    # Save AI products.json
     print("\n" + "-" * 60)
-    print("SAVING AI PRODUCTS DATABASE (products.json)")
+    print("STOCK-ONLY SYNC (stock_qty, in_stock)")
     print("-" * 60)
 
-    products_json_path = Path(__file__).parent.parent / 'data' / 'products.json'
+    stock_syncs = [StockSync(db, collection, 'sync-woocommerce-full', args, report) for collection in args.collection]
+    stock_by_id = {}  # WooCommerce ID -> stock, for products.json
+    updates = {}  # doc_id -> (fields, wc_id); rows sharing a name share a document, the last one wins
+    rows_read = 0
+    for row in rows:
+        rows_read += 1
+        if not row.id or not row.name:
+            continue
+        if row.error:
+            print(f"  ERROR {row.id}: {row.error}")
+            continue
+        stock_by_id[row.id] = row.stock
+        updates[sanitize_doc_id(row.name)] = ({'stock_qty': row.stock, 'in_stock': row.in_stock == '1'}, row.id)
+    report.count('rows_read', rows_read)
+
+    for doc_id, (fields, wc_id) in updates.items():
+        if any([sync.add(doc_id, fields, label=wc_id) for sync in stock_syncs]):
+            print(f"  OK {wc_id} '{doc_id[:40]}': stock {fields['stock_qty']}")
+
+    results = [sync.finish() for sync in stock_syncs]
+    for collection, result in zip(args.collection, results):
+        print(f"\n{collection}: {result['written']} updated, {result['unchanged']} unchanged, {result['errors']} errors")
+        print(f"  Writer: {result['writer']}")
+
+    # products.json and its prompt lines carry stock too; patch them in place (only written if something changed)
+    encoding = prompt_encoding()
+    for path in args.products_json:
+        if not path.exists():
+            continue
+        with report.stage('products_json'):
+            with open(path, 'r', encoding='utf-8') as f:
+                products = json.load(f)
+            for product in products:
+                if product.get('id') in stock_by_id:
+                    product['stock'] = stock_by_id[product['id']]
+            changes = write_products_json(products, path, args.changes if path == args.products_json[0] else None)
+        print(f"  {path}: {describe_changes(changes)}")
+        with report.stage('prompt_lines'):
+            prompt_lines = build_prompt_lines(products, encoding)
+            prompt_path, written = write_prompt_lines(prompt_lines, path)
+        if written:
+            print(f"  {prompt_path}: {describe_prompt_lines(prompt_lines)}")
+
+    errors = sum(result['errors'] for result in results)
+    if source is not None:
+        if errors:
+            print(f"\nAPI checkpoint not advanced ({errors} errors)")
+        else:
+            report.set('api_checkpoint', source.save_checkpoint())
+        source.close()
+    report.set('stock', dict(zip(args.collection, results)))
+
+    return {'rows': rows_read, 'written': sum(r['written'] for r in results),
+            'unchanged': sum(r['unchanged'] for r in results), 'errors': errors, 'ai_products': None}
+
+
+def show_plan(firestore_sinks, description_sinks, plans, mirrors, rows_read):
+    """--plan: print what the run would write and what it would cost, then stop"""
+    print("\n" + "-" * 60)
+    print("PLAN (--plan: nothing written)")
+    print("-" * 60)
+    write_ops = 0
+    for sink in firestore_sinks:
+        plan = plans[sink.collection]
+        print(f"{sink.name}: {len(mirrors[sink.collection])} documents in the mirror")
+        for line in plan.lines():
+            print(f"  {line}")
+        write_ops += sink.queued
+    for sink in description_sinks:
+        print(f"{sink.name}: {sink.queued} to write, {sink.unchanged} unchanged (by manifest)")
+        write_ops += sink.queued
+    print(f"\nTotal: {write_ops} write ops (~${write_ops * WRITE_COST:.6f}); products.json is not written")
+
+    for sink in firestore_sinks + description_sinks:
+        sink.writer.close()
+    for mirror in mirrors.values():
+        mirror.close()
+    return {'rows': rows_read, 'written': 0, 'unchanged': sum(sink.unchanged for sink in firestore_sinks),
+            'errors': 0, 'ai_products': None, 'planned_writes': write_ops}
+
+
+def open_journal(args, project_id, input_sha256):
+    """This run's journal of committed batches; with --resume, the interrupted run's if the input is the same"""
+    journal = RunJournal(MANIFEST_DIR / f'journal.woocommerce-full.{project_id}.jsonl', input_sha256, args.resume)
+    previous = journal.previous
+    if journal.resumed:
+        print(f"Resuming the run started {previous['started_at']}: {journal.documents} documents already committed")
+    elif previous is not None and args.resume:
+        print(f"Input changed since the run started {previous['started_at']}; starting from the beginning")
+    elif previous is not None:
+        print(f"Note: the run started {previous['started_at']} did not finish; --resume would have skipped "
+              f"its {sum(len(docs) for docs in previous['collections'].values())} committed documents")
+    elif args.resume:
+        print("Nothing to resume; starting from the beginning")
+    return journal
+
+
+def prompt_encoding():
+    """Local tokenizer for the prompt line token counts, or None (lines are written without counts)"""
+    encoding, reason = load_encoding()
+    if encoding is None:
+        print(f"Note: prompt lines written without token counts: {reason}")
+    return encoding
+
+
+def api_source(args):
+    """WooCommerce REST source from WC_URL / WC_CONSUMER_KEY / WC_CONSUMER_SECRET"""
+    base_url = os.environ.get('WC_URL', '').strip()
+    if not base_url:
+        print("Error: WC_URL is not set (e.g. WC_URL=https://bebias.ge in .env.local)")
+        sys.exit(1)
+    return WooCommerceSource(base_url, os.environ.get('WC_CONSUMER_KEY', '').strip(),
+                             os.environ.get('WC_CONSUMER_SECRET', '').strip(), workers=args.api_workers)
 
-    # Sort by name for easier reading
-    ai_products.sort(key=lambda x: x.get('name', ''))
 
-    with open(products_json_path, 'w', encoding='utf-8') as f:
-        json.dump(ai_products, f, ensure_ascii=False, indent=2)
+def merge_products(products_json_path, changed, pulled_ids):
+    """Existing products.json with every pulled ID replaced by its new entry (or dropped if it no longer has one)"""
+    if not products_json_path.exists():
+        return changed
+    with open(products_json_path, 'r', encoding='utf-8') as f:
+        merged = {p['id']: p for p in json.load(f) if p['id'] not in pulled_ids}
+    for product in changed:
+        merged[product['id']] = product
+    return list(merged.values())
 
-    print(f"  Saved {len(ai_products)} products to {products_json_path}")
-    print(f"  (Only variations and simple products with price > 0)")
 
-    print("\n" + "=" * 60)
-    print("SYNC COMPLETE!")
-    print(f"  Firestore: {firestore_synced} products (doc ID = product name)")
-    print(f"  AI Database: {len(ai_products)} products (id = WooCommerce ID)")
-    print("=" * 60)
+def reconcile_collections(db, args, report, csv_doc_ids, description_ids):
+    """Report, tombstone or delete documents whose product is no longer in the export"""
+    print("\n" + "-" * 60)
+    print(f"RECONCILING (--reconcile {args.reconcile})")
+    print("-" * 60)
+
+    # Descriptions nothing references any more are only deleted (a tombstoned text is still dead weight)
+    targets = []
+    for collection in args.collection:
+        targets.append((collection, csv_doc_ids, args.reconcile))
+        targets.append((descriptions_collection(collection), description_ids,
+                        'delete' if args.reconcile == 'delete' else 'report'))
+
+    plans = {}
+    for collection, keep_ids, action in targets:
+        plan = reconcile(db, collection, keep_ids, action, args, report,
+                         tombstone_fields={'discontinued_at': firestore.SERVER_TIMESTAMP,
+                                           'last_updated_by': 'woocommerce_reconcile'})
+        plans[collection] = {k: v for k, v in plan.items() if k not in ('orphans', 'revived')}
+        plans[collection].update(orphans=len(plan['orphans']), revived=len(plan['revived']))
+
+        print(f"  {collection}: {plan['documents']} documents, {plan['kept']} in CSV, "
+              f"{len(plan['orphans'])} orphans" + (f", {len(plan['revived'])} back in CSV" if plan['revived'] else ""))
+        for doc_id in plan['orphans'][:10]:
+            print(f"    - {doc_id}")
+        if len(plan['orphans']) > 10:
+            print(f"    ... and {len(plan['orphans']) - 10} more")
+        if plan.get('refused'):
+            print(f"  NOT APPLIED: {plan['refused']}")
+        elif plan['applied']:
+            print(f"  {action}: {plan['written']} written, {plan['errors']} errors ({plan['writer']})")
+        elif plan['orphans']:
+            print(f"  Dry run; re-run with --reconcile tombstone or --reconcile delete to apply")
+        print(f"  Plan saved to {plan['path']}")
+
+    report.set('reconcile', plans)
+
+
+def check_images(args, report, product_images):
+    """Validate every image URL and save the products that have dead images"""
+    print("\n" + "-" * 60)
+    print("CHECKING IMAGE URLS")
+    print("-" * 60)
+
+    urls = [url for _, _, images in product_images for url in images]
+    with report.stage('image_check'):
+        with ImageChecker(args.image_cache, max_workers=args.image_workers) as checker:
+            results = checker.check(urls)
+
+    dead_products = []
+    for wc_id, name, images in product_images:
+        dead = [{'url': url, 'status': results[url].status, 'error': results[url].error}
+                for url in images if not results[url].ok]
+        if dead:
+            dead_products.append({'id': wc_id, 'name': name, 'dead_images': dead})
+
+    dead_urls = sum(1 for result in results.values() if not result.ok)
+    report.count('images_checked', checker.checked)
+    report.count('images_cached', checker.cached)
+    report.count('images_not_modified', checker.not_modified)
+    report.count('images_dead', dead_urls)
+    report.set('dead_images', dead_products)
+
+    DEAD_IMAGES_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(DEAD_IMAGES_PATH, 'w', encoding='utf-8') as f:
+        json.dump(dead_products, f, ensure_ascii=False, indent=2)
+
+    print(f"  {len(results)} URLs: {checker.checked} checked ({checker.not_modified} not modified), "
+          f"{checker.cached} from cache, {dead_urls} dead")
+    for entry in dead_products[:10]:
+        first = entry['dead_images'][0]
+        print(f"  DEAD {entry['id']} '{entry['name'][:40]}': {first['error']} {first['url']}")
+    if len(dead_products) > 10:
+        print(f"  ... and {len(dead_products) - 10} more")
+    if dead_products:
+        print(f"  Saved {len(dead_products)} products with dead images to {DEAD_IMAGES_PATH}")
+
 
 if __name__ == "__main__":
     main()
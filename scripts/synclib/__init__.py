@@ -0,0 +1,23 @@
+"""
+Shared helpers for the Python product sync scripts in scripts/ (imported as `synclib`)
+"""
+
+from .firestore_writer import BatchWriter, MAX_BATCH_SIZE
+from .manifest import Manifest, MANIFEST_DIR, fingerprint, forget_documents, manifest_suffix
+from .pipeline import ParentImageResolver, parent_keys, read_columns, read_rows
+from .csv_reader import Field, add_reader_arguments, read_records, records_from_dicts
+from .text import clean_html, encode_url, parse_images, sanitize_doc_id
+from .env import PROJECT_ROOT, firestore_client, load_env
+from .concurrent_writer import ConcurrentWriter, add_writer_arguments, make_writer, writer_stats, writer_summary
+from .search_index import build_search_index, extract_tokens
+from .catalog import build_catalog, write_catalog
+from .prompt_lines import build_prompt_lines, describe_prompt_lines, load_encoding, write_prompt_lines
+from .report import RunReport, add_report_arguments
+from .image_check import IMAGE_CACHE_PATH, ImageChecker
+from .products_json import ai_product, atomic_write_bytes, describe_changes, write_if_changed, write_products_json
+from .sinks import FirestoreSink, ProductsJsonSink, run_sinks
+from .reconcile import add_reconcile_arguments, reconcile
+from .stock import STOCK_FIELDS, StockSync, add_stock_arguments
+from .descriptions import DescriptionStore, descriptions_collection
+from .journal import RunJournal, add_journal_arguments, input_hash, rows_hash
+from .mirror import NOOP, ProductMirror, WritePlan, add_mirror_arguments, describe_refresh, open_mirror
@@ -0,0 +1,77 @@
+"""
+Sharded, compact product catalog for the bot (data/catalog/): one minified shard per category plus a manifest
+"""
+
+import hashlib
+import json
+
+from .search_index import CATEGORIES, extract_tokens
+from .products_json import write_if_changed
+
+CATALOG_VERSION = 1
+PROMPT_FIELDS = ('id', 'name', 'price', 'stock', 'category', 'image')
+DEFAULTS = {'currency': 'GEL'}
+OTHER_SHARD = 'other'
+
+
+def shard_key(product):
+    """First matching category (in CATEGORIES order), or 'other'"""
+    categories = extract_tokens(product)['category']
+    for key in CATEGORIES:
+        if key in categories:
+            return key
+    return OTHER_SHARD
+
+
+def compact_product(product):
+    """Keep prompt fields only, dropping values that equal the manifest defaults"""
+    compact = {field: product[field] for field in PROMPT_FIELDS if field in product}
+    for field, value in DEFAULTS.items():
+        if product.get(field, value) != value:
+            compact[field] = product[field]
+    return compact
+
+
+def build_catalog(products):
+    """Return (manifest, {shard file name: minified JSON bytes})"""
+    shards = {}
+    for product in products:
+        shards.setdefault(shard_key(product), []).append(compact_product(product))
+
+    files = {}
+    manifest_shards = {}
+    for key in sorted(shards):
+        data = json.dumps(shards[key], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        file_name = f"{key}.json"
+        files[file_name] = data
+        manifest_shards[key] = {
+            'file': file_name,
+            'count': len(shards[key]),
+            'bytes': len(data),
+            'sha256': hashlib.sha256(data).hexdigest(),
+        }
+
+    manifest = {
+        'version': CATALOG_VERSION,
+        'product_count': len(products),
+        'fields': list(PROMPT_FIELDS),
+        'defaults': DEFAULTS,
+        'shards': manifest_shards,
+    }
+    return manifest, files
+
+
+def write_catalog(products, out_dir):
+    """Write shards and manifest to out_dir; returns (manifest, names of files rewritten)"""
+    manifest, files = build_catalog(products)
+    files['manifest.json'] = json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rewritten = [file_name for file_name, data in files.items() if write_if_changed(out_dir / file_name, data)]
+
+    for stale in out_dir.glob('*.json'):
+        if stale.name not in files:
+            stale.unlink()
+            rewritten.append(stale.name)
+
+    return manifest, rewritten
@@ -0,0 +1,156 @@
+"""
+Concurrent Firestore writer with adaptive throttling and retry
+"""
+
+import random
+import threading
+import time
+
+from .firestore_writer import BatchWriter
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    TRANSIENT_ERRORS = (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.Aborted,
+    )
+except ImportError:  # google-cloud-firestore not installed (text-only callers)
+    TRANSIENT_ERRORS = ()
+
+DEFAULT_BATCH_SIZE = 100
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that ramps up on success and halves on throttling"""
+
+    def __init__(self, initial=1, maximum=8, ramp_after=3):
+        if not 1 <= initial <= maximum:
+            raise ValueError("need 1 <= initial <= maximum")
+        self.limit = initial
+        self.maximum = maximum
+        self.ramp_after = ramp_after
+        self.peak = initial
+        self._active = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self._active >= self.limit:
+                self._cond.wait()
+            self._active += 1
+
+    def release(self, ok):
+        with self._cond:
+            self._active -= 1
+            if ok:
+                self._successes += 1
+                if self._successes >= self.ramp_after and self.limit < self.maximum:
+                    self.limit += 1
+                    self.peak = max(self.peak, self.limit)
+                    self._successes = 0
+            else:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+            self._cond.notify_all()
+
+
+class ConcurrentWriter(BatchWriter):
+    """BatchWriter whose commits run concurrently under an AdaptiveLimiter"""
+
+    def __init__(self, db, batch_size=DEFAULT_BATCH_SIZE, max_concurrency=8, initial_concurrency=1,
+                 max_retries=6, base_delay=0.5, max_delay=30.0, **kwargs):
+        super().__init__(db, batch_size=batch_size, max_in_flight=max_concurrency, **kwargs)
+        self.limiter = AdaptiveLimiter(initial=min(initial_concurrency, max_concurrency), maximum=max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self.throttled = 0
+
+    def _commit(self, ops):
+        try:
+            self._commit_batch(ops)
+        except TRANSIENT_ERRORS as e:
+            # Still throttled after every retry: replaying op by op would only add load
+            for op in ops:
+                self._record_failure(op, e)
+            return
+        except Exception:
+            self._commit_individually(ops)
+            return
+        self._record_success(ops)
+
+    def _commit_batch(self, ops):
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            try:
+                super()._commit_batch(ops)
+            except TRANSIENT_ERRORS:
+                self.limiter.release(ok=False)
+                with self._lock:
+                    self.throttled += 1
+                if self.report is not None:
+                    self.report.count('firestore_throttled')
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+            except Exception:
+                self.limiter.release(ok=False)
+                raise
+            else:
+                self.limiter.release(ok=True)
+                return
+
+    def _backoff(self, attempt):
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+def add_writer_arguments(parser):
+    """Add the --concurrency/--batch-size options shared by the sync scripts"""
+    parser.add_argument('--concurrency', type=int, default=0, metavar='N',
+                        help="Use the concurrent writer with up to N commits in flight (adaptive, starts at 1)")
+    parser.add_argument('--batch-size', type=int, default=None, metavar='N',
+                        help="Writes per WriteBatch commit (max 500)")
+
+
+def make_writer(db, args, **kwargs):
+    """Build the writer selected by add_writer_arguments() options"""
+    if args.concurrency and args.concurrency > 0:
+        return ConcurrentWriter(db, batch_size=args.batch_size or DEFAULT_BATCH_SIZE,
+                                max_concurrency=args.concurrency, **kwargs)
+    if args.batch_size:
+        kwargs['batch_size'] = args.batch_size
+    return BatchWriter(db, **kwargs)
+
+
+def writer_stats(writer):
+    """Writer results for the run report"""
+    stats = {
+        'backend': type(writer).__name__,
+        'written': writer.written,
+        'errors': writer.errors,
+        'batches': writer.batches,
+        'elapsed_s': round(writer.elapsed, 3),
+        'docs_per_s': round(writer.throughput, 1),
+    }
+    if isinstance(writer, ConcurrentWriter):
+        stats.update(peak_concurrency=writer.limiter.peak, retries=writer.retries, throttled=writer.throttled)
+    return stats
+
+
+def writer_summary(writer):
+    """One-line throughput summary for the end-of-run report"""
+    line = (f"{writer.written} written in {writer.elapsed:.1f}s ({writer.throughput:.0f} docs/s, "
+            f"{writer.batches} batch commits")
+    if isinstance(writer, ConcurrentWriter):
+        line += (f", peak concurrency {writer.limiter.peak}, {writer.retries} retries, "
+                 f"{writer.throttled} throttled")
+    return line + ")"
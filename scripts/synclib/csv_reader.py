@@ -0,0 +1,142 @@
+"""
+Column-projected, typed reads of WooCommerce export CSVs (stdlib csv or pandas engine)
+"""
+
+import csv
+from collections import namedtuple
+
+from .pipeline import read_columns
+
+ENGINES = ('csv', 'pandas')
+
+# kind: 'raw' (as exported), 'str' (stripped), 'int' (empty -> 0), 'float' (empty -> 0), 'float?' (empty -> None);
+# default: the raw value when the export has no such column (what the old row.get(column, default) gave)
+Field = namedtuple('Field', 'name column kind default', defaults=('str', ''))
+
+# Characters str.strip() removes (str.isspace()), so the pandas engine trims exactly the same
+WHITESPACE = ('\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006'
+              '\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000')
+
+# Values the pandas engine parses as columns; anything else goes through int()/float() one by one
+INT_PATTERN = r'[+-]?[0-9]{1,18}'
+FLOAT_PATTERN = r'[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?'
+
+_EMPTY = {'int': 0, 'float': 0, 'float?': None}
+_PARSE = {'int': int, 'float': float, 'float?': float}
+
+
+def add_reader_arguments(parser):
+    """Add the --csv-engine option"""
+    parser.add_argument('--csv-engine', choices=ENGINES, default='csv',
+                        help="CSV reader: stdlib csv (streaming) or pandas/pyarrow (faster on large exports)")
+
+
+def record_type(fields):
+    return namedtuple('Record', [field.name for field in fields] + ['error'])
+
+
+def read_records(csv_path, fields, engine='csv'):
+    """Yield one record (namedtuple of fields + error) per export row"""
+    if engine == 'pandas':
+        return _read_pandas(csv_path, fields)
+    if engine != 'csv':
+        raise ValueError(f"unknown CSV engine: {engine}")
+    return convert_rows(read_columns(csv_path, [field.column for field in fields],
+                                     [field.default for field in fields]), fields)
+
+
+def records_from_dicts(rows, fields):
+    """Records from CSV-shaped dicts (e.g. WooCommerceSource rows), parsed like read_records()"""
+    return convert_rows((tuple(row.get(field.column, field.default) for field in fields) for row in rows), fields)
+
+
+def convert_rows(rows, fields):
+    """Trim and parse tuples of raw column values (in fields order) into records"""
+    make = record_type(fields)._make
+    strings = [i for i, field in enumerate(fields) if field.kind == 'str']
+    numbers = [(i, _PARSE[field.kind], _EMPTY[field.kind]) for i, field in enumerate(fields)
+               if field.kind not in ('raw', 'str')]
+    for raw in rows:
+        values = list(raw)
+        values.append(None)  # error
+        for i in strings:
+            values[i] = values[i].strip()
+        for i, parse, empty in numbers:
+            value = values[i].strip()
+            if not value:
+                values[i] = empty
+                continue
+            try:
+                values[i] = parse(value)
+            except ValueError as e:
+                values[i] = empty
+                values[-1] = values[-1] or str(e)
+        yield make(values)
+
+
+def _read_pandas(csv_path, fields):
+    try:
+        import pandas as pd
+    except ImportError:
+        raise RuntimeError("--csv-engine pandas needs pandas (pip install pandas pyarrow)") from None
+    try:
+        import pyarrow  # noqa: F401
+        parser = 'pyarrow'
+    except ImportError:
+        parser = 'c'
+
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        header = next(csv.reader(f), None)
+    if header is None:
+        return iter(())
+    # Same column resolution as read_columns(): last occurrence of a name wins, missing columns read as default
+    index = {name: i for i, name in enumerate(header)}
+    positions = sorted({index[field.column] for field in fields if field.column in index})
+    if len(set(header)) == len(header):
+        usecols = [header[position] for position in positions]
+    else:
+        # pandas renames duplicate headers ('Name.1'), so pick by position (the pyarrow parser can't)
+        usecols, parser = positions, 'c'
+    # Both parsers drop a UTF-8 BOM themselves; 'utf-8-sig' would make pandas transcode the file in Python first
+    frame = pd.read_csv(csv_path, encoding='utf-8', usecols=usecols, dtype=str, keep_default_na=False,
+                        engine=parser)
+    by_position = {position: frame.iloc[:, i] for i, position in enumerate(positions)}
+    size = len(frame)
+
+    errors = [None] * size
+    columns = []
+    for field in fields:
+        position = index.get(field.column)
+        if position is None:
+            value = next(convert_rows([(field.default,)], [field]))[0]
+            columns.append([value] * size)
+            continue
+        series = by_position[position]
+        if field.kind == 'raw':
+            columns.append(series.tolist())
+            continue
+        series = series.str.strip(WHITESPACE)
+        if field.kind == 'str':
+            columns.append(series.tolist())
+            continue
+        columns.append(_parse_column(series, field.kind, errors))
+
+    return map(record_type(fields)._make, zip(*columns, errors))
+
+
+def _parse_column(series, kind, errors):
+    """Parse a trimmed string column; unparseable cells get their int()/float() message in errors"""
+    empty = series == ''
+    fast = series.str.fullmatch(INT_PATTERN if kind == 'int' else FLOAT_PATTERN)
+    values = series.where(fast, '0').astype('int64' if kind == 'int' else 'float64').tolist()
+
+    # Empty cells: 0 (an int, even for prices) or None, as the per-row code gives
+    for i in empty[empty].index:
+        values[i] = _EMPTY[kind]
+    for i, text in series[~(fast | empty)].items():
+        try:
+            values[i] = _PARSE[kind](text)
+        except ValueError as e:
+            values[i] = _EMPTY[kind]
+            errors[i] = errors[i] or str(e)
+    return values
@@ -0,0 +1,50 @@
+"""
+Deduplicated product descriptions, stored once per distinct text in <collection>_descriptions
+"""
+
+import hashlib
+
+DESCRIPTIONS_SUFFIX = '_descriptions'
+
+
+def descriptions_collection(collection):
+    return f"{collection}{DESCRIPTIONS_SUFFIX}"
+
+
+def description_id(text):
+    """Content-hash document ID of a cleaned description"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class DescriptionStore:
+    """Clean each distinct description once and keep one copy per content hash"""
+
+    def __init__(self, clean):
+        self._clean = clean
+        self._cleaned = {}  # sha1 of the raw HTML -> cleaned text
+        self.texts = {}  # description ID -> cleaned text, for every description referenced this run
+        self.lookups = 0
+
+    @property
+    def hits(self):
+        return self.lookups - len(self._cleaned)
+
+    def clean(self, raw):
+        """clean(raw), computed once per distinct raw text"""
+        if not raw:
+            return ''
+        self.lookups += 1
+        key = hashlib.sha1(raw.encode('utf-8')).digest()
+        text = self._cleaned.get(key)
+        if text is None:
+            text = self._cleaned[key] = self._clean(raw)
+        return text
+
+    def add(self, raw):
+        """Clean raw and keep it for writing; returns its description ID ('' if it cleans to nothing)"""
+        text = self.clean(raw)
+        if not text:
+            return ''
+        key = description_id(text)
+        self.texts.setdefault(key, text)
+        return key
@@ -0,0 +1,61 @@
+"""
+Environment loading and Firestore client setup shared by the sync scripts.
+"""
+
+import os
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def load_env(env_path=None):
+    """Load .env.local file (or the file named by SYNC_ENV_FILE, e.g. /dev/null for benchmarks)"""
+    env_path = Path(env_path or os.environ.get('SYNC_ENV_FILE') or PROJECT_ROOT / '.env.local')
+    if not env_path.exists():
+        return
+    with open(env_path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#') and '=' in line:
+                key, value = line.split('=', 1)
+                # Remove quotes and handle \n
+                value = value.strip('"').strip("'").replace('\\n', '\n')
+                os.environ[key] = value
+
+
+def firestore_client():
+    """
+    Create a Firestore client from the GOOGLE_CLOUD_* service account vars.
+
+    When FIRESTORE_EMULATOR_HOST is set (e.g. localhost:8080 from
+    `gcloud emulators firestore start`) no credentials are needed and the
+    client talks to the local emulator instead. Returns None when
+    credentials are missing.
+    """
+    from google.cloud import firestore
+    from google.oauth2 import service_account
+
+    project_id = os.environ.get('GOOGLE_CLOUD_PROJECT_ID', '').strip()
+
+    if os.environ.get('FIRESTORE_EMULATOR_HOST'):
+        print(f"Using Firestore emulator at {os.environ['FIRESTORE_EMULATOR_HOST']}")
+        return firestore.Client(project=project_id or 'demo-bebias')
+
+    client_email = os.environ.get('GOOGLE_CLOUD_CLIENT_EMAIL', '').strip()
+    private_key = os.environ.get('GOOGLE_CLOUD_PRIVATE_KEY', '').strip()
+
+    if not all([project_id, client_email, private_key]):
+        print("Error: Missing Firebase credentials")
+        print(f"  Project ID: {'OK' if project_id else 'MISSING'}")
+        print(f"  Client Email: {'OK' if client_email else 'MISSING'}")
+        print(f"  Private Key: {'OK' if private_key else 'MISSING'}")
+        return None
+
+    credentials = service_account.Credentials.from_service_account_info({
+        'type': 'service_account',
+        'project_id': project_id,
+        'private_key': private_key,
+        'client_email': client_email,
+        'token_uri': 'https://oauth2.googleapis.com/token',
+    })
+    return firestore.Client(project=project_id, credentials=credentials)
@@ -0,0 +1,187 @@
+"""
+Batched Firestore writes for the sync scripts
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_BATCH_SIZE = 500
+
+
+def _print_error(label, error):
+    print(f"  ERROR {label}: {error}")
+
+
+class BatchWriter:
+    """Queue Firestore writes and commit them in pipelined WriteBatches"""
+
+    def __init__(self, db, batch_size=MAX_BATCH_SIZE, max_in_flight=4, on_error=_print_error, report=None,
+                 on_commit=None):
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_SIZE}")
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+        self.db = db
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.on_error = on_error
+        self.report = report  # optional RunReport: commit latencies, write counts, payload bytes
+        self.on_commit = on_commit  # optional callback with the ops of every committed batch (writer threads)
+
+        self.written = 0
+        self.errors = 0
+        self.batches = 0
+        self.failed = []  # (label, exception) for every document that failed
+        self.failed_paths = set()
+        self.started_at = None
+        self.finished_at = None
+
+        self._ops = []
+        self._paths = set()  # documents queued since the last drain
+        self._pending = []
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='firestore-batch')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    @property
+    def elapsed(self):
+        """Seconds from the first queued write until close() (or now)"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self):
+        """Documents written per second"""
+        elapsed = self.elapsed
+        return self.written / elapsed if elapsed > 0 else 0.0
+
+    # Queueing
+
+    def set(self, ref, data, merge=False, label=None):
+        self._add(('set', ref, data, merge, label))
+
+    def update(self, ref, data, label=None):
+        self._add(('update', ref, data, False, label))
+
+    def delete(self, ref, label=None):
+        self._add(('delete', ref, None, False, label))
+
+    def _add(self, op):
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        if self.report is not None and op[2] is not None:
+            self.report.count('firestore_write_bytes', len(json.dumps(op[2], ensure_ascii=False, default=str).encode('utf-8')))
+        path = op[1].path
+        if path in self._paths:
+            # Batches in flight commit in any order; drain them so a second
+            # write to the same document still lands last.
+            self.flush()
+        self._paths.add(path)
+        self._ops.append(op)
+        if len(self._ops) >= self.batch_size:
+            self._submit()
+
+    # Committing
+
+    def flush(self):
+        """Commit everything queued so far and wait for all in-flight batches"""
+        self._submit()
+        started = time.perf_counter()
+        while self._pending:
+            self._pending.pop(0).result()
+        self._record_wait(started)
+        self._paths.clear()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._pool.shutdown(wait=True)
+            if self.started_at is not None and self.finished_at is None:
+                self.finished_at = time.monotonic()
+
+    def _submit(self):
+        if not self._ops:
+            return
+        ops, self._ops = self._ops, []
+        started = time.perf_counter()
+        while len(self._pending) >= self.max_in_flight:
+            self._pending.pop(0).result()
+        self._record_wait(started)
+        self._pending.append(self._pool.submit(self._commit, ops))
+
+    def _commit(self, ops):
+        try:
+            self._commit_batch(ops)
+        except Exception:
+            # A WriteBatch is all-or-nothing: replay its ops one at a time so
+            # failures are attributed to the documents that caused them.
+            self._commit_individually(ops)
+            return
+        self._record_success(ops)
+
+    def _commit_individually(self, ops):
+        for op in ops:
+            try:
+                self._commit_batch([op])
+            except Exception as e:
+                self._record_failure(op, e)
+            else:
+                self._record_success([op])
+
+    def _commit_batch(self, ops):
+        batch = self.db.batch()
+        for op in ops:
+            _apply(batch, op)
+        started = time.perf_counter()
+        try:
+            batch.commit()
+        finally:
+            if self.report is not None:
+                self.report.observe('firestore_commit', time.perf_counter() - started)
+                self.report.count('firestore_commits')
+
+    def _record_wait(self, started):
+        """Time the caller spent blocked on in-flight commits"""
+        if self.report is not None:
+            self.report.add_time('firestore_wait', time.perf_counter() - started)
+
+    def _record_success(self, ops):
+        with self._lock:
+            self.written += len(ops)
+            self.batches += 1
+        if self.report is not None:
+            self.report.count('firestore_writes', len(ops))
+        if self.on_commit:
+            self.on_commit(ops)
+
+    def _record_failure(self, op, error):
+        label = op[4] or op[1].id
+        with self._lock:
+            self.errors += 1
+            self.failed.append((label, error))
+            self.failed_paths.add(op[1].path)
+        if self.report is not None:
+            self.report.count('firestore_write_errors')
+        if self.on_error:
+            self.on_error(label, error)
+
+
+def _apply(batch, op):
+    kind, ref, data, merge, _ = op
+    if kind == 'set':
+        batch.set(ref, data, merge=merge)
+    elif kind == 'update':
+        batch.update(ref, data)
+    else:
+        batch.delete(ref)
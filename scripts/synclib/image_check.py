@@ -0,0 +1,155 @@
+"""
+Concurrent image URL validation with a persistent SQLite result cache
+"""
+
+import sqlite3
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .env import PROJECT_ROOT
+
+IMAGE_CACHE_PATH = PROJECT_ROOT / '.sync' / 'image-cache.sqlite'
+DEFAULT_MAX_AGE = 7 * 24 * 3600  # re-check OK images weekly
+DEFAULT_FAILED_MAX_AGE = 3600  # re-check failures hourly
+
+ImageResult = namedtuple('ImageResult', 'url ok status content_type etag last_modified error checked_at')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    url TEXT PRIMARY KEY,
+    ok INTEGER NOT NULL,
+    status INTEGER,
+    content_type TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    error TEXT,
+    checked_at REAL NOT NULL
+)
+"""
+
+
+class ImageCache:
+    """SQLite-backed store of the last check result per URL (main thread only)"""
+
+    def __init__(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute(_SCHEMA)
+
+    def get_many(self, urls):
+        found = {}
+        urls = list(urls)
+        for start in range(0, len(urls), 500):
+            chunk = urls[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for row in self.conn.execute(
+                    f"SELECT url, ok, status, content_type, etag, last_modified, error, checked_at "
+                    f"FROM images WHERE url IN ({placeholders})", chunk):
+                found[row[0]] = ImageResult(row[0], bool(row[1]), *row[2:])
+        return found
+
+    def put_many(self, results):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO images (url, ok, status, content_type, etag, last_modified, error, checked_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(r.url, int(r.ok), r.status, r.content_type, r.etag, r.last_modified, r.error, r.checked_at)
+             for r in results])
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class ImageChecker:
+    """Check image URLs concurrently, reusing cached results while they are fresh"""
+
+    def __init__(self, cache_path=IMAGE_CACHE_PATH, max_workers=16, timeout=10,
+                 max_age=DEFAULT_MAX_AGE, failed_max_age=DEFAULT_FAILED_MAX_AGE):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.cache = ImageCache(cache_path)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_age = max_age
+        self.failed_max_age = failed_max_age
+        self.requests = requests
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = 'bebias-sync-image-check/1.0'
+
+        self.checked = 0
+        self.cached = 0
+        self.not_modified = 0
+
+    def close(self):
+        self.session.close()
+        self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def check(self, urls):
+        """Return url -> ImageResult for every URL, fetching only new or stale ones"""
+        unique = list(dict.fromkeys(u for u in urls if u))
+        now = time.time()
+        previous = self.cache.get_many(unique)
+
+        results = {}
+        to_fetch = []
+        for url in unique:
+            cached = previous.get(url)
+            if cached and now - cached.checked_at < (self.max_age if cached.ok else self.failed_max_age):
+                results[url] = cached
+            else:
+                to_fetch.append((url, cached))
+        self.cached += len(results)
+
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='image-check') as pool:
+                fetched = list(pool.map(lambda item: self._fetch(*item), to_fetch))
+            self.cache.put_many(fetched)
+            for result in fetched:
+                results[result.url] = result
+            self.checked += len(fetched)
+            self.not_modified += sum(1 for result in fetched if result.status == 304)
+
+        return results
+
+    def _fetch(self, url, cached):
+        headers = {}
+        if cached and cached.ok:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+
+        try:
+            resp = self.session.head(url, headers=headers, timeout=self.timeout, allow_redirects=True)
+            if resp.status_code in (403, 405, 501):
+                # Some hosts refuse HEAD; a streamed GET reads only the headers
+                resp = self.session.get(url, headers=headers, timeout=self.timeout, allow_redirects=True, stream=True)
+                resp.close()
+        except self.requests.RequestException as e:
+            return ImageResult(url, False, None, None, None, None, f"{type(e).__name__}: {e}", time.time())
+
+        if resp.status_code == 304 and cached:
+            return cached._replace(status=304, checked_at=time.time())
+
+        content_type = resp.headers.get('Content-Type', '')
+        ok = resp.status_code == 200 and content_type.startswith('image/')
+        error = None
+        if resp.status_code != 200:
+            error = f"HTTP {resp.status_code}"
+        elif not ok:
+            error = f"not an image ({content_type or 'no Content-Type'})"
+        return ImageResult(url, ok, resp.status_code, content_type, resp.headers.get('ETag'),
+                           resp.headers.get('Last-Modified'), error, time.time())
@@ -0,0 +1,121 @@
+"""
+Durable progress of a sync run, so an interrupted run can be resumed (--resume)
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+JOURNAL_VERSION = 1
+
+
+def add_journal_arguments(parser):
+    """Add the --resume option"""
+    parser.add_argument('--resume', action='store_true',
+                        help="Skip documents an interrupted run already committed (same input only)")
+
+
+def input_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def rows_hash(rows):
+    """SHA-256 of a list of row dicts (an API pull)"""
+    encoded = json.dumps(rows, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class RunJournal:
+    """Append-only record of the batches a run has committed"""
+
+    def __init__(self, path, input_sha256, resume=False):
+        self.path = Path(path)
+        self.input_sha256 = input_sha256
+        self.previous = self._load()  # header and committed documents of the interrupted run, or None
+        self.resumed = bool(resume and self.previous and self.previous['input_sha256'] == input_sha256)
+        self._committed = self.previous['collections'] if self.resumed else {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._open()
+
+    @property
+    def documents(self):
+        """Documents committed by the interrupted run (0 unless resumed)"""
+        return sum(len(docs) for docs in self._committed.values())
+
+    def committed(self, collection):
+        """doc_id -> fingerprint of the documents the interrupted run committed to collection"""
+        return self._committed.get(collection, {})
+
+    def record(self, collection, fingerprints):
+        """Durably note a committed batch; safe to call from writer threads"""
+        line = json.dumps({'collection': collection, 'documents': fingerprints},
+                          ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def finish(self):
+        """The run's writes are done and its manifests saved: the journal is no longer needed"""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lines = []
+        if self.resumed:
+            # Keep the interrupted run's batches (compacted, without a torn last line) so a second
+            # interruption still remembers them
+            header = {k: v for k, v in self.previous.items() if k != 'collections'}
+            lines = [{'collection': collection, 'documents': docs} for collection, docs in self._committed.items()]
+        else:
+            header = {'version': JOURNAL_VERSION, 'input_sha256': self.input_sha256,
+                      'started_at': datetime.now().isoformat(timespec='seconds')}
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in [header] + lines:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _load(self):
+        if not self.path.exists():
+            return None
+        collections = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline())
+                if header.get('version') != JOURNAL_VERSION:
+                    return None
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # torn last line: that batch's record never completed
+                    collections.setdefault(entry['collection'], {}).update(entry['documents'])
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            print(f"  Warning: ignoring unreadable journal {self.path}: {e}")
+            return None
+        return {**header, 'collections': collections}
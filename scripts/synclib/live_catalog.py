@@ -0,0 +1,73 @@
+"""
+In-memory products.json catalog kept current from a Firestore snapshot listener
+"""
+
+import threading
+import time
+
+from .products_json import ai_product
+
+
+class LiveCatalog:
+    """Document ID -> products.json entry, updated from on_snapshot deltas"""
+
+    def __init__(self):
+        self.entries = {}  # document ID -> products.json entry (documents the bot doesn't list are left out)
+        self.dirty = threading.Event()  # set when an entry changed since the last take()
+        self.ready = threading.Event()  # set once the first snapshot (every document) has arrived
+        self.first_change = None  # time.monotonic() of the oldest change not yet taken
+        self.last_change = None  # and of the newest
+        self.events = 0  # document changes received
+        self.relevant = 0  # of which changed an entry
+        self._pending = set()  # document IDs whose entry changed since the last take()
+        self._reset = True  # the next snapshot is a complete one (new listener)
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Treat the next snapshot as the complete collection (call before attaching a new listener)"""
+        with self._lock:
+            self._reset = True
+            self.ready.clear()
+
+    def on_snapshot(self, docs, changes, read_time):
+        """on_snapshot callback: apply the added/modified/removed documents"""
+        with self._lock:
+            if self._reset:
+                # A new listener starts with every document as ADDED; anything deleted while no
+                # listener was attached is only noticed by rebuilding from the full set
+                self._reset = False
+                seen = {snapshot.id for snapshot in docs}
+                for doc_id in [doc_id for doc_id in self.entries if doc_id not in seen]:
+                    self._apply(doc_id, None)
+            for change in changes:
+                self.events += 1
+                document = change.document
+                data = None if change.type.name == 'REMOVED' else document.to_dict()
+                self._apply(document.id, data)
+            self.ready.set()
+
+    def _apply(self, doc_id, data):
+        entry = ai_product(data, doc_id) if data is not None else None
+        if entry == self.entries.get(doc_id):
+            return
+        if entry is None:
+            del self.entries[doc_id]
+        else:
+            self.entries[doc_id] = entry
+        self.relevant += 1
+        self._pending.add(doc_id)
+        now = time.monotonic()
+        if self.first_change is None:
+            self.first_change = now
+        self.last_change = now
+        self.dirty.set()
+
+    def take(self):
+        """(products.json list sorted like sync-woocommerce-full.py, document IDs changed since the last take)"""
+        with self._lock:
+            products = [dict(entry) for entry in self.entries.values()]
+            pending, self._pending = self._pending, set()
+            self.first_change = self.last_change = None
+            self.dirty.clear()
+        products.sort(key=lambda x: (x.get('name', ''), x.get('id', '')))
+        return products, pending
@@ -0,0 +1,104 @@
+"""
+Content fingerprints for delta syncs
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from .env import PROJECT_ROOT
+
+MANIFEST_DIR = PROJECT_ROOT / '.sync'
+VOLATILE_FIELDS = frozenset({'synced_at'})
+
+
+def manifest_suffix(collection):
+    """Manifest file name suffix; the 'products' manifests keep their original names so fingerprints stay valid"""
+    return '' if collection == 'products' else f'.{collection}'
+
+
+def forget_documents(project_id, collection, doc_ids, keep=None):
+    """Drop doc_ids from the collection's manifests other than keep (they were just written); returns entries dropped"""
+    doc_ids = set(doc_ids)
+    if not doc_ids:
+        return 0
+    suffix = manifest_suffix(collection)
+    scopes = {f"{project_id}/{collection}", f"{project_id}/{collection}:stock"}
+    paths = [MANIFEST_DIR / f'woocommerce-full.{project_id}{suffix}.json',
+             *MANIFEST_DIR.glob(f'stock.*.{project_id}{suffix}.json')]
+    dropped = 0
+    for path in paths:
+        if keep is not None and path == Path(keep):
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        fingerprints = data.get('fingerprints', {})
+        stale = doc_ids & fingerprints.keys() if data.get('scope') in scopes else set()
+        if not stale:
+            continue
+        for doc_id in stale:
+            del fingerprints[doc_id]
+        _write_json(path, data)
+        dropped += len(stale)
+    return dropped
+
+
+def fingerprint(doc, exclude=VOLATILE_FIELDS):
+    """Stable SHA-256 of a document's fields, ignoring volatile ones"""
+    payload = {k: v for k, v in doc.items() if k not in exclude}
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class Manifest:
+    """doc_id -> fingerprint map from the previous run, scoped to one project/collection"""
+
+    def __init__(self, path, project_id, collection):
+        self.path = Path(path)
+        self.scope = f"{project_id}/{collection}"
+        self.previous = {}
+        self.current = {}
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"  Warning: ignoring unreadable manifest {self.path}: {e}")
+            return
+        # A manifest written for another project or collection says nothing about this one
+        if data.get('scope') == self.scope:
+            self.previous = data.get('fingerprints', {})
+
+    def is_unchanged(self, doc_id, fp):
+        return self.previous.get(doc_id) == fp
+
+    def record(self, doc_id, fp):
+        self.current[doc_id] = fp
+
+    def carry_over(self):
+        """Keep last run's fingerprints for documents this run won't see (incremental sources)"""
+        self.current = {**self.previous, **self.current}
+
+    def discard(self, doc_id):
+        """Forget a document so the next run writes it again (e.g. after a failed write)"""
+        self.current.pop(doc_id, None)
+
+    def save(self):
+        _write_json(self.path, {'scope': self.scope, 'fingerprints': self.current})
+
+
+def _write_json(path, data):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
@@ -0,0 +1,304 @@
+"""
+Local SQLite mirror of a Firestore collection, and write plans against it
+"""
+
+import json
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+
+from .manifest import MANIFEST_DIR
+
+# Fields writers stamp on every write: synced_at (the syncs), last_updated (the price syncs and fix-* scripts),
+# timestamp (the chatbot's stock updates on orders, lib/firestoreSync.ts)
+MARKER_FIELDS = ('synced_at', 'last_updated', 'timestamp')
+MARKER_TYPES = ('timestamp', 'string')
+PLAN_IGNORED_FIELDS = frozenset(MARKER_FIELDS) | {'last_updated_by'}
+# ISO string markers come from the writers' clocks and can land late, so they are re-read from this far back
+REFRESH_OVERLAP = timedelta(minutes=2)
+# Deletions and writes without a marker are only seen by a full refresh
+FULL_REFRESH_AFTER = timedelta(hours=24)
+
+# Firestore list prices in USD per 100,000 operations (multi-region; other locations differ)
+READ_COST = 0.06 / 100_000
+WRITE_COST = 0.18 / 100_000
+
+# Plan outcomes
+CREATE = 'create'
+UPDATE = 'update'
+NOOP = 'noop'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    refreshed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MISSING = object()
+
+
+def add_mirror_arguments(parser):
+    """Add the --mirror/--mirror-full/--plan options"""
+    parser.add_argument('--mirror', action='store_true',
+                        help="Plan writes against the local mirror (.sync/mirror.*.sqlite), refreshed incrementally")
+    parser.add_argument('--mirror-full', action='store_true', help="Re-read the whole collection into the mirror first")
+    parser.add_argument('--plan', action='store_true',
+                        help="Print the planned creates/updates/no-ops and their estimated cost; write nothing")
+
+
+def mirror_path(project, collection):
+    return MANIFEST_DIR / f'mirror.{project}.{collection}.sqlite'
+
+
+def open_mirror(db, collection, args, report=None):
+    """The collection's mirror, refreshed, if --mirror or --plan was given; otherwise None"""
+    if not (args.mirror or args.plan):
+        return None
+    mirror = ProductMirror(db, collection, report=report)
+    stats = mirror.refresh(full=args.mirror_full)
+    print(f"Mirror {collection}: {describe_refresh(stats)}")
+    if report is not None:
+        report.set(f'mirror:{collection}', stats)
+    return mirror
+
+
+class ProductMirror:
+    """SQLite copy of one collection, refreshed by change-marker queries (main thread only)"""
+
+    def __init__(self, db, collection='products', path=None, report=None):
+        self.collection = collection
+        self.collection_ref = db.collection(collection)
+        self.path = path or mirror_path(db.project, collection)
+        self.report = report
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # Reading
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def get(self, doc_id):
+        """Mirrored fields of a document, or None"""
+        row = self.conn.execute("SELECT data FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def documents(self):
+        """Yield (doc_id, fields) for every mirrored document"""
+        for doc_id, data in self.conn.execute("SELECT doc_id, data FROM documents ORDER BY doc_id"):
+            yield doc_id, json.loads(data)
+
+    # Refreshing
+
+    def needs_full_refresh(self):
+        last_full = self._meta('full_refresh_at')
+        return last_full is None or time.time() - float(last_full) > FULL_REFRESH_AFTER.total_seconds()
+
+    def refresh(self, full=False):
+        """Bring the mirror up to date; returns {'mode', 'reads', 'changed', 'deleted', 'documents'}"""
+        full = full or self.needs_full_refresh()
+        started = time.perf_counter()
+        stats = self._full_refresh() if full else self._incremental_refresh()
+        stats['documents'] = len(self)
+        stats['seconds'] = round(time.perf_counter() - started, 3)
+        if self.report is not None:
+            self.report.count('mirror_reads', stats['reads'])
+            self.report.add_time('mirror_refresh', stats['seconds'])
+        return stats
+
+    def _full_refresh(self):
+        high_water = {}
+        documents = {}
+        for snapshot in self.collection_ref.stream():
+            data = snapshot.to_dict() or {}
+            documents[snapshot.id] = data
+            _advance(high_water, data)
+
+        previous = {row[0] for row in self.conn.execute("SELECT doc_id FROM documents")}
+        now = time.time()
+        with self.conn:
+            self.conn.execute("DELETE FROM documents")
+            self.conn.executemany("INSERT INTO documents (doc_id, data, refreshed_at) VALUES (?, ?, ?)",
+                                  [(doc_id, _encode(data), now) for doc_id, data in documents.items()])
+            self._set_meta('high_water', json.dumps(high_water))
+            self._set_meta('full_refresh_at', str(now))
+            self._set_meta('refreshed_at', str(now))
+        return {'mode': 'full', 'reads': max(1, len(documents)), 'changed': len(documents),
+                'deleted': len(previous - documents.keys())}
+
+    def _incremental_refresh(self):
+        from google.cloud.firestore_v1.base_query import FieldFilter
+
+        high_water = json.loads(self._meta('high_water') or '{}')
+        changed = {}
+        reads = 0
+        # Every (marker, type) pair is queried, so a marker that first appears after the last full refresh is seen
+        for marker in MARKER_FIELDS:
+            for kind in MARKER_TYPES:
+                op, bound = _lower_bound(kind, high_water.get(f'{marker}:{kind}'))
+                found = 0
+                for snapshot in self.collection_ref.where(filter=FieldFilter(marker, op, bound)).stream():
+                    changed[snapshot.id] = snapshot.to_dict() or {}
+                    found += 1
+                reads += max(1, found)  # an empty query is billed one read
+
+        for data in changed.values():
+            _advance(high_water, data)
+        now = time.time()
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO documents (doc_id, data, refreshed_at) VALUES (?, ?, ?)",
+                                  [(doc_id, _encode(data), now) for doc_id, data in changed.items()])
+            self._set_meta('high_water', json.dumps(high_water))
+            self._set_meta('refreshed_at', str(now))
+        return {'mode': 'incremental', 'reads': reads, 'changed': len(changed), 'deleted': 0}
+
+    def _meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+class WritePlan:
+    """Creates, updates and no-ops of a sync's intended writes, judged against a mirror"""
+
+    def __init__(self, mirror=None):
+        from google.cloud import firestore
+
+        self.mirror = mirror  # None: the script classifies its writes itself and record()s them
+        self.delete_field = firestore.DELETE_FIELD
+        self.counts = {CREATE: 0, UPDATE: 0, NOOP: 0}
+        self.changes = {CREATE: [], UPDATE: []}  # doc IDs, for printing
+
+    def add(self, doc_id, fields, merge=True):
+        """Classify a set(merge=True)/update() of fields (merge=False: a full set); returns CREATE, UPDATE or NOOP"""
+        current = self.mirror.get(doc_id)
+        if current is None:
+            outcome = CREATE
+        elif self._same(current, fields, merge):
+            outcome = NOOP
+        else:
+            outcome = UPDATE
+        return self.record(outcome, doc_id)
+
+    def record(self, outcome, doc_id):
+        self.counts[outcome] += 1
+        if outcome != NOOP:
+            self.changes[outcome].append(doc_id)
+        return outcome
+
+    def _same(self, current, fields, merge):
+        for key, value in fields.items():
+            if key in PLAN_IGNORED_FIELDS:
+                continue
+            if value is self.delete_field:
+                if key in current:
+                    return False
+            elif _comparable(value) != current.get(key, _MISSING):
+                return False
+        if not merge:
+            return all(key in fields or key in PLAN_IGNORED_FIELDS for key in current)
+        return True
+
+    @property
+    def write_ops(self):
+        return self.counts[CREATE] + self.counts[UPDATE]
+
+    @property
+    def cost(self):
+        return self.write_ops * WRITE_COST
+
+    def to_dict(self):
+        return {**self.counts, 'write_ops': self.write_ops, 'estimated_cost_usd': round(self.cost, 6)}
+
+    def describe(self):
+        return (f"{self.counts[CREATE]} creates, {self.counts[UPDATE]} updates, {self.counts[NOOP]} no-ops: "
+                f"{self.write_ops} write ops (~${self.cost:.6f})")
+
+    def lines(self, limit=20):
+        """The plan's summary and up to limit document IDs per kind of write"""
+        lines = [f"Plan: {self.describe()}"]
+        for outcome in (CREATE, UPDATE):
+            for doc_id in self.changes[outcome][:limit]:
+                lines.append(f"  {outcome} {doc_id}")
+            if len(self.changes[outcome]) > limit:
+                lines.append(f"  ... and {len(self.changes[outcome]) - limit} more {outcome}s")
+        return lines
+
+
+def describe_refresh(stats):
+    return (f"{stats['mode']} refresh: {stats['changed']} documents read ({stats['reads']} billed reads, "
+            f"~${stats['reads'] * READ_COST:.6f}), {stats['deleted']} deleted, {stats['documents']} mirrored "
+            f"in {stats['seconds']:.1f}s")
+
+
+def _kind(value):
+    if isinstance(value, datetime):
+        return 'timestamp'
+    if isinstance(value, str):
+        return 'string'
+    return None
+
+
+def _advance(high_water, data):
+    """Raise the (marker, type) high-water marks to a document's marker values"""
+    for marker in MARKER_FIELDS:
+        value = data.get(marker)
+        kind = _kind(value)
+        if kind == 'string':
+            value = _utc(value)  # naive or unparseable strings don't move the mark
+        if value is None:
+            continue
+        key = f'{marker}:{kind}'
+        previous = _utc(high_water.get(key))
+        if previous is None or value > previous:
+            high_water[key] = value.isoformat()
+
+
+def _lower_bound(kind, high_water):
+    """(operator, value) of a marker range query from a high-water mark"""
+    if kind == 'timestamp':
+        return ('>', datetime.fromisoformat(high_water)) if high_water else ('>=', _EPOCH)
+    mark = _utc(high_water)
+    if mark is None:
+        return '>=', ''  # no mark yet, or one saved before marks were normalized: read them all once
+    return '>=', (mark - REFRESH_OVERLAP).isoformat()
+
+
+def _utc(value):
+    """An ISO 8601 string or datetime with a UTC offset, as a UTC datetime; None if naive or unparseable"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime) or value.tzinfo is None:
+        return None
+    return value.astimezone(timezone.utc)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=True, default=_json_default)
+
+
+def _comparable(value):
+    """value as it reads back from the mirror's JSON"""
+    return json.loads(json.dumps(value, ensure_ascii=False, default=_json_default))
@@ -0,0 +1,109 @@
+"""
+Streaming CSV helpers for the WooCommerce sync scripts
+"""
+
+import csv
+from collections import defaultdict
+
+
+def read_rows(csv_path):
+    """Yield WooCommerce export rows one at a time"""
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        yield from csv.DictReader(f)
+
+
+def read_columns(csv_path, columns, defaults=None):
+    """
+    Yield a tuple of just the named columns per row, in the order given.
+
+    Column positions are looked up once from the header instead of building
+    a dict for all 57 columns of every row. Columns the export doesn't have
+    (and cells past the end of a short row) read as defaults[i], or ''.
+    """
+    defaults = tuple(defaults) if defaults is not None else ('',) * len(columns)
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        index = {name: i for i, name in enumerate(header)}
+        positions = [index.get(column) for column in columns]
+        width = len(header)
+        for row in reader:
+            if not row:
+                continue
+            if len(row) >= width and None not in positions:
+                yield tuple(row[i] for i in positions)
+            else:
+                yield tuple(row[i] if i is not None and i < len(row) else default
+                            for i, default in zip(positions, defaults))
+
+
+def parent_keys(row):
+    """Keys a variation's Parent column may use for this row: SKU (WooCommerce's export), name, or id:<ID>"""
+    keys = [row.name, row.sku, f"id:{row.id}" if row.id else '']
+    return [key for key in keys if key]
+
+
+class ParentImageResolver:
+    """
+    Give image-less variations their parent's images in a single pass.
+
+    WooCommerce exports usually list a variable product before its
+    variations, but nothing guarantees it. Variations that show up before
+    their parent are held back and released as soon as the parent row is
+    seen; anything still waiting when the input ends is released with no
+    images. Only parent image lists and out-of-order variations are kept
+    in memory.
+
+    Rows are csv_reader records with (trimmed) id, name, sku, type, parent
+    and raw images fields.
+    """
+
+    def __init__(self, parse_images):
+        self.parse_images = parse_images
+        self.parent_images = {}  # parent key -> images (possibly empty)
+        self.parents_with_images = 0
+        self.buffered_max = 0
+        self._waiting = defaultdict(list)
+        self._waiting_count = 0
+
+    def resolve(self, rows):
+        """Yield (row, images) for every row, parents before their buffered variations"""
+        for row in rows:
+            product_type = row.type
+            images = self.parse_images(row.images)
+
+            if product_type == 'variable':
+                yield row, images
+                yield from self._register_parent(row, images)
+                continue
+
+            if product_type == 'variation' and not images:
+                parent = row.parent
+                if parent:
+                    if parent in self.parent_images:
+                        images = self.parent_images[parent]
+                    else:
+                        self._waiting[parent].append(row)
+                        self._waiting_count += 1
+                        self.buffered_max = max(self.buffered_max, self._waiting_count)
+                        continue
+
+            yield row, images
+
+        # Parents that never appeared: release their variations without images
+        for rows_left in self._waiting.values():
+            for row in rows_left:
+                yield row, []
+        self._waiting.clear()
+        self._waiting_count = 0
+
+    def _register_parent(self, row, images):
+        if images:
+            self.parents_with_images += 1
+        for key in parent_keys(row):
+            self.parent_images[key] = images
+            for waiting in self._waiting.pop(key, []):
+                self._waiting_count -= 1
+                yield waiting, images
@@ -0,0 +1,128 @@
+"""
+Atomic, change-aware writer for the AI products.json
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+
+AI_PRODUCT_TYPES = ('simple', 'variation')  # variable parents have no price or stock of their own
+
+
+def ai_product(data, doc_id=None):
+    """products.json entry for a Firestore product document, or None if the bot doesn't list it"""
+    if data.get('discontinued') is True:  # tombstoned by --reconcile (revived documents get False)
+        return None
+    # A missing type counts as simple, as in the bot's own Firestore read (lib/bot-core.ts)
+    if (data.get('type') or 'simple') not in AI_PRODUCT_TYPES:
+        return None
+    try:
+        price = float(data.get('price') or 0)
+    except (TypeError, ValueError):
+        return None
+    if not price > 0:
+        return None
+
+    images = data.get('images') or []
+    short_description = data.get('short_description') or ''
+    return {
+        'id': data.get('id') or doc_id,  # WooCommerce ID
+        'name': data.get('name') or doc_id,
+        'price': price,
+        'currency': data.get('currency') or 'GEL',
+        'category': (data.get('categories') or '').split('>')[0].strip(),
+        'stock': data.get('stock_qty', 0),
+        'image': images[0] if images else data.get('image') or '',
+        'short_description': short_description[:200],
+    }
+
+
+def serialize_products(products):
+    """Canonical bytes for a products.json list"""
+    return json.dumps(products, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def atomic_write_bytes(path, data):
+    """Replace path with data via temp file + fsync + rename; readers never see a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{path.name}.', suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    # Persist the rename itself
+    try:
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def write_if_changed(path, data):
+    """Atomically write data unless path already holds exactly these bytes; returns True if written"""
+    if path.exists() and path.read_bytes() == data:
+        return False
+    atomic_write_bytes(path, data)
+    return True
+
+
+def diff_products(old, new, key='id'):
+    """Return (added, removed, changed) product IDs between two products lists"""
+    before = {str(p.get(key)): p for p in old}
+    after = {str(p.get(key)): p for p in new}
+    added = sorted(after.keys() - before.keys())
+    removed = sorted(before.keys() - after.keys())
+    changed = sorted(k for k in after.keys() & before.keys() if after[k] != before[k])
+    return added, removed, changed
+
+
+def write_products_json(products, path, changes_path=None):
+    """Write products to path only if its canonical form changed; returns the change summary"""
+    data = serialize_products(products)
+    previous = path.read_bytes() if path.exists() else None
+
+    summary = {
+        'path': str(path),
+        'written': previous != data,
+        'count': len(products),
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'added': [],
+        'removed': [],
+        'changed': [],
+    }
+
+    if summary['written']:
+        try:
+            old = json.loads(previous) if previous is not None else []
+        except ValueError:
+            old = []  # unreadable (e.g. truncated by an older writer): everything counts as added
+        summary['added'], summary['removed'], summary['changed'] = diff_products(old, products)
+        atomic_write_bytes(path, data)
+
+    if changes_path is not None:
+        atomic_write_bytes(changes_path, json.dumps(summary, ensure_ascii=False, indent=2).encode('utf-8'))
+    return summary
+
+
+def describe_changes(summary):
+    """One-line description of a write_products_json summary"""
+    if not summary['written']:
+        return f"unchanged ({summary['count']} products), not rewritten"
+    return (f"{summary['count']} products: {len(summary['added'])} added, {len(summary['removed'])} removed, "
+            f"{len(summary['changed'])} changed")
@@ -0,0 +1,150 @@
+"""
+Precomputed prompt lines and token counts (products.prompt.json)
+"""
+
+import hashlib
+import json
+import math
+import os
+from decimal import Decimal
+
+from .env import PROJECT_ROOT
+from .products_json import write_if_changed
+
+PROMPT_VERSION = 1
+PROMPT_MODEL = 'gpt-4o'  # the model the bot routes call
+# A line's token count includes the separator after it, so any selection of lines costs the sum of their tokens
+SEPARATOR = '\n'
+TIKTOKEN_DIR = PROJECT_ROOT / '.sync' / 'tiktoken'
+
+# tiktoken's source URL (its cache key) and SHA-256 per encoding
+ENCODING_FILES = {
+    'o200k_base': ('https://openaipublic.blob.core.windows.net/encodings/o200k_base.tiktoken',
+                   '446a9538cb6c348e3516120d7c08b09f57c36495e2acfffe59a5bf8b0cfb1a2d'),
+    'cl100k_base': ('https://openaipublic.blob.core.windows.net/encodings/cl100k_base.tiktoken',
+                    '223921b76ee99bde995b7ff738513eef100fb51d18c93597a113bcffe865b2a7'),
+}
+
+_MISSING = object()
+
+
+def js_string(value=_MISSING):
+    """String(value) as JavaScript template literals format it"""
+    if value is _MISSING:
+        return 'undefined'
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float):
+        if math.isnan(value):
+            return 'NaN'
+        if math.isinf(value):
+            return 'Infinity' if value > 0 else '-Infinity'
+        return _js_number(value)
+    return str(value)
+
+
+def _js_number(value):
+    """Number.prototype.toString() of a finite float (shortest round-trip digits, JS exponent rules)"""
+    if value == 0:
+        return '0'
+    sign, digits, exponent = Decimal(repr(value)).normalize().as_tuple()
+    digits = ''.join(map(str, digits))
+    k = len(digits)
+    n = exponent + k  # decimal point position
+    if k <= n <= 21:
+        text = digits + '0' * (n - k)
+    elif 0 < n <= 21:
+        text = f"{digits[:n]}.{digits[n:]}"
+    elif -6 < n <= 0:
+        text = f"0.{'0' * -n}{digits}"
+    else:
+        mantissa = digits if k == 1 else f"{digits[0]}.{digits[1:]}"
+        text = f"{mantissa}e{'+' if n > 0 else '-'}{abs(n - 1)}"
+    return f"-{text}" if sign else text
+
+
+def has_image(image):
+    """The routes' hasImage check"""
+    return (isinstance(image, str) and image != '' and image != 'IMAGE_URL_HERE'
+            and 'facebook.com' not in image and image.startswith('http'))
+
+
+def prompt_line(product):
+    """The product's line in the bot's product context"""
+    def field(name):
+        return js_string(product.get(name, _MISSING))
+
+    return (f"{field('name')} (ID: {field('id')}) - Price: {field('price')} {js_string(product.get('currency') or '')}, "
+            f"Stock: {field('stock')}, Category: {js_string(product.get('category') or 'N/A')}"
+            f"{' [HAS_IMAGE]' if has_image(product.get('image')) else ''}")
+
+
+def load_encoding(model=PROMPT_MODEL):
+    """Return (tiktoken encoding, None), or (None, reason) if it can't be loaded without the network"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None, "tiktoken not installed (pip install tiktoken)"
+
+    try:
+        name = tiktoken.encoding_name_for_model(model)
+    except KeyError:
+        return None, f"tiktoken has no encoding for model {model}"
+    if name not in ENCODING_FILES:
+        return None, f"no known BPE file for encoding {name}"
+
+    # tiktoken downloads anything missing from its cache; only call it when the verified file is already there
+    url, sha256 = ENCODING_FILES[name]
+    cache_dir = os.environ.get('TIKTOKEN_CACHE_DIR') or str(TIKTOKEN_DIR)
+    cache_path = os.path.join(cache_dir, hashlib.sha1(url.encode()).hexdigest())
+    try:
+        with open(cache_path, 'rb') as f:
+            valid = hashlib.sha256(f.read()).hexdigest() == sha256
+    except OSError:
+        valid = False
+    if not valid:
+        return None, (f"{name} BPE file not in the local tiktoken cache; fetch it once with:\n"
+                      f"    mkdir -p {cache_dir} && curl -sSfo {cache_path} {url}")
+
+    os.environ['TIKTOKEN_CACHE_DIR'] = cache_dir
+    return tiktoken.get_encoding(name), None
+
+
+def build_prompt_lines(products, encoding=None, model=PROMPT_MODEL):
+    """products.prompt.json content for products (in their order); tokens are None without an encoding"""
+    lines = [prompt_line(product) for product in products]
+    if encoding is not None:
+        counts = [len(tokens) for tokens in encoding.encode_ordinary_batch([line + SEPARATOR for line in lines])]
+        total_tokens = len(encoding.encode_ordinary(SEPARATOR.join(lines)))
+    else:
+        counts = [None] * len(lines)
+        total_tokens = None
+
+    return {
+        'version': PROMPT_VERSION,
+        'model': model,
+        'encoding': encoding.name if encoding is not None else None,
+        'separator': SEPARATOR,
+        'total_tokens': total_tokens,
+        'products': [{'id': product.get('id'), 'line': line, 'tokens': count}
+                     for product, line, count in zip(products, lines, counts)],
+    }
+
+
+def prompt_lines_path(products_json_path):
+    return products_json_path.with_name('products.prompt.json')
+
+
+def write_prompt_lines(content, products_json_path):
+    """Write build_prompt_lines() output next to products.json; returns (path, written)"""
+    path = prompt_lines_path(products_json_path)
+    data = json.dumps(content, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return path, write_if_changed(path, data)
+
+
+def describe_prompt_lines(content):
+    if content['encoding'] is None:
+        return f"{len(content['products'])} lines, no token counts"
+    return f"{len(content['products'])} lines, {content['total_tokens']} {content['encoding']} tokens"
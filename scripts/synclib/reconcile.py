@@ -0,0 +1,97 @@
+"""
+Key-only reconciliation: find Firestore documents whose product is gone from the WooCommerce export
+"""
+
+import json
+import os
+
+from .concurrent_writer import make_writer, writer_summary
+from .manifest import MANIFEST_DIR
+
+ACTIONS = ('report', 'tombstone', 'delete')
+DOCUMENT_ID_FIELD = '__name__'
+TOMBSTONE_FIELD = 'discontinued'
+DEFAULT_MAX_FRACTION = 0.5
+
+
+def add_reconcile_arguments(parser):
+    """Add the --reconcile options"""
+    parser.add_argument('--reconcile', choices=ACTIONS, default=None,
+                        help="After syncing, find documents no longer in the CSV: 'report' (dry run), "
+                             "'tombstone' (mark discontinued) or 'delete'")
+    parser.add_argument('--reconcile-force', action='store_true',
+                        help=f"Apply even if more than {DEFAULT_MAX_FRACTION:.0%} of the collection would be removed")
+
+
+def list_doc_ids(collection_ref, field=DOCUMENT_ID_FIELD):
+    """Map doc ID -> projected field value for every document, transferring no other fields"""
+    ids = {}
+    for snapshot in collection_ref.select([field]).stream():
+        ids[snapshot.id] = None if field == DOCUMENT_ID_FIELD else (snapshot.to_dict() or {}).get(field)
+    return ids
+
+
+def find_orphans(collection_ref, keep_ids, action='report'):
+    """Return (total documents, orphan IDs, tombstoned IDs back in keep_ids)"""
+    if action != 'tombstone':
+        existing = list_doc_ids(collection_ref)
+        return len(existing), sorted(existing.keys() - keep_ids), []
+
+    existing = list_doc_ids(collection_ref, TOMBSTONE_FIELD)
+    orphans = sorted(doc_id for doc_id, value in existing.items() if doc_id not in keep_ids and value is not True)
+    revived = sorted(doc_id for doc_id, value in existing.items() if doc_id in keep_ids and value is True)
+    return len(existing), orphans, revived
+
+
+def reconcile(db, collection, keep_ids, action, args, report=None, tombstone_fields=None):
+    """Diff collection against keep_ids and apply action; returns the saved plan"""
+    collection_ref = db.collection(collection)
+    if report is not None:
+        with report.stage('reconcile_list'):
+            total, orphans, revived = find_orphans(collection_ref, keep_ids, action)
+        report.count('reconcile_listed', total)
+        report.count('reconcile_orphans', len(orphans))
+    else:
+        total, orphans, revived = find_orphans(collection_ref, keep_ids, action)
+
+    fraction = len(orphans) / total if total else 0.0
+    plan = {
+        'project': db.project,
+        'collection': collection,
+        'action': action,
+        'documents': total,
+        'kept': len(keep_ids),
+        'orphans': orphans,
+        'revived': revived,
+        'applied': False,
+        'written': 0,
+        'errors': 0,
+    }
+
+    if action != 'report' and (orphans or revived):
+        if fraction > DEFAULT_MAX_FRACTION and not getattr(args, 'reconcile_force', False):
+            plan['refused'] = (f"{len(orphans)} of {total} documents ({fraction:.0%}) would be removed; "
+                               f"pass --reconcile-force if the export really is complete")
+        else:
+            writer = make_writer(db, args, report=report)
+            for doc_id in orphans:
+                doc_ref = collection_ref.document(doc_id)
+                if action == 'delete':
+                    writer.delete(doc_ref, label=doc_id)
+                else:
+                    writer.set(doc_ref, {TOMBSTONE_FIELD: True, **(tombstone_fields or {})}, merge=True, label=doc_id)
+            for doc_id in revived:
+                writer.set(collection_ref.document(doc_id), {TOMBSTONE_FIELD: False}, merge=True, label=doc_id)
+            writer.close()
+            plan.update(applied=True, written=writer.written, errors=writer.errors,
+                        failed=sorted(path.rsplit('/', 1)[-1] for path in writer.failed_paths),
+                        writer=writer_summary(writer))
+
+    path = MANIFEST_DIR / f'reconcile.{db.project}.{collection}.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    plan['path'] = str(path)
+    return plan
@@ -0,0 +1,245 @@
+"""
+Per-stage timing, counters and a machine-readable run report for syncs
+"""
+
+import bisect
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from .env import PROJECT_ROOT
+
+REPORTS_DIR = PROJECT_ROOT / '.sync' / 'reports'
+REPORT_VERSION = 1
+
+# Histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+
+def add_report_arguments(parser):
+    """Add the --report/--profile/--trace-memory options shared by the sync scripts"""
+    parser.add_argument('--report', type=Path, default=None, metavar='PATH',
+                        help="Run report JSON (default: .sync/reports/<script>.json)")
+    parser.add_argument('--profile', action='store_true', help="Include cProfile hot spots in the run report")
+    parser.add_argument('--trace-memory', action='store_true', help="Include tracemalloc peak/top allocations")
+
+
+class LatencyHistogram:
+    """Bucketed latency histogram with exact percentiles over kept samples"""
+
+    MAX_SAMPLES = 100_000
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = None
+        self._samples = []
+
+    def observe(self, ms):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = ms if self.min_ms is None else min(self.min_ms, ms)
+        self.max_ms = ms if self.max_ms is None else max(self.max_ms, ms)
+        if len(self._samples) < self.MAX_SAMPLES:
+            self._samples.append(ms)
+
+    def percentile(self, p):
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    def to_dict(self):
+        labels = [f"<={b}" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 2) if self.count else None,
+            'min_ms': _round(self.min_ms),
+            'p50_ms': _round(self.percentile(50)),
+            'p95_ms': _round(self.percentile(95)),
+            'p99_ms': _round(self.percentile(99)),
+            'max_ms': _round(self.max_ms),
+            'buckets_ms': {label: n for label, n in zip(labels, self.buckets) if n},
+        }
+
+
+class RunReport:
+    """Stage timers, counters and latency histograms for one sync run"""
+
+    def __init__(self, script, args=None):
+        self.script = script
+        self.args = args
+        self.path = getattr(args, 'report', None) or REPORTS_DIR / f"{script}.json"
+        self.stages = {}  # name -> [seconds, calls]
+        self.counters = {}
+        self.histograms = {}
+        self.extra = {}
+        self.status = 'running'
+        self.started_at = None
+        self._started = None
+        self._lock = threading.Lock()
+        self._profiler = None
+
+    # Lifecycle
+
+    def __enter__(self):
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self._started = time.perf_counter()
+        if getattr(self.args, 'trace_memory', False):
+            tracemalloc.start()
+        if getattr(self.args, 'profile', False):
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.status = 'ok'
+        elif issubclass(exc_type, SystemExit):
+            self.status = 'ok' if exc.code in (None, 0) else f'exit {exc.code}'
+        elif issubclass(exc_type, KeyboardInterrupt):
+            self.status = 'interrupted'
+        else:
+            self.status = f'error: {exc_type.__name__}: {exc}'
+        try:
+            self.save()
+        except OSError as e:
+            print(f"  Warning: could not write run report {self.path}: {e}")
+        return False
+
+    # Recording
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name, seconds, calls=1):
+        with self._lock:
+            entry = self.stages.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += calls
+
+    def wrap(self, fn, stage_name):
+        """Return fn with every call timed into stage_name"""
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add_time(stage_name, time.perf_counter() - started)
+        timed.__wrapped__ = fn
+        return timed
+
+    def iter(self, iterable, stage_name):
+        """Yield from iterable, timing only the time spent producing items"""
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_time(stage_name, time.perf_counter() - started, calls=0)
+                return
+            self.add_time(stage_name, time.perf_counter() - started)
+            yield item
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, seconds):
+        """Record one latency sample (seconds) in the named histogram"""
+        with self._lock:
+            self.histograms.setdefault(name, LatencyHistogram()).observe(seconds * 1000)
+
+    def set(self, key, value):
+        """Attach an extra JSON-serializable value (e.g. writer summary) to the report"""
+        self.extra[key] = value
+
+    # Output
+
+    def to_dict(self):
+        duration = time.perf_counter() - self._started if self._started else 0.0
+        stages = {
+            name: {'seconds': round(seconds, 4), 'calls': calls,
+                   'share': round(seconds / duration, 3) if duration else None}
+            for name, (seconds, calls) in sorted(self.stages.items(), key=lambda item: -item[1][0])
+        }
+        report = {
+            'version': REPORT_VERSION,
+            'script': self.script,
+            'status': self.status,
+            'started_at': self.started_at,
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'duration_s': round(duration, 3),
+            'pid': os.getpid(),
+            'args': _jsonable_args(self.args),
+            'stages': stages,
+            'counters': dict(sorted(self.counters.items())),
+            'histograms': {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+        }
+        report.update(self.extra)
+        if self._profiler is not None:
+            report['profile'] = self._profile_summary()
+        if tracemalloc.is_tracing():
+            report['memory'] = _memory_summary()
+        return report
+
+    def save(self):
+        report = self.to_dict()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp_path, self.path)
+        print(f"\nRun report: {self.path}")
+
+    def _profile_summary(self, limit=25):
+        self._profiler.disable()
+        prof_path = self.path.with_suffix('.prof')
+        self._profiler.dump_stats(prof_path)
+        stats = pstats.Stats(self._profiler, stream=io.StringIO())
+        stats.sort_stats('cumulative')
+        top = []
+        for (filename, line, func), (_, ncalls, tottime, cumtime, _) in list(
+                sorted(stats.stats.items(), key=lambda item: -item[1][3]))[:limit]:
+            top.append({'function': f"{Path(filename).name}:{line}({func})", 'calls': ncalls,
+                        'tottime_s': round(tottime, 4), 'cumtime_s': round(cumtime, 4)})
+        return {'stats_file': str(prof_path), 'top_cumulative': top}
+
+
+def _memory_summary(limit=10):
+    current, peak = tracemalloc.get_traced_memory()
+    top = tracemalloc.take_snapshot().statistics('lineno')[:limit]
+    tracemalloc.stop()
+    return {
+        'current_bytes': current,
+        'peak_bytes': peak,
+        'top_allocations': [{'where': str(stat.traceback[0]), 'bytes': stat.size, 'count': stat.count}
+                            for stat in top],
+    }
+
+
+def _jsonable_args(args):
+    if args is None:
+        return None
+    return {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()}
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
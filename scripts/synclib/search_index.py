@@ -0,0 +1,120 @@
+"""
+Inverted search index for the AI product catalog (products.index.json)
+"""
+
+import re
+
+INDEX_VERSION = 1
+
+# Canonical key -> aliases. Georgian entries are stems so they match any case ending.
+CATEGORIES = {
+    'hat': ['ქუდ', 'შაპკა', 'hat', 'hats', 'beanie', 'cap'],
+    'sock': ['წინდ', 'sock', 'socks'],
+    'scarf': ['შარფ', 'მოწნული', 'scarf'],
+    'glove': ['ხელთათმან', 'გლუვ', 'glove', 'gloves'],
+    'set': ['ნაკრებ', 'set'],
+}
+
+COLORS = {
+    'black': ['შავ', 'black'],
+    'white': ['თეთრ', 'white'],
+    'red': ['წითელ', 'red'],
+    'blue': ['ლურჯ', 'blue'],
+    'light-blue': ['ცისფერ', 'sky'],
+    'green': ['მწვანე', 'green'],
+    'light-green': ['სალათისფერ'],
+    'emerald': ['ზურმუხტისფერ', 'emerald'],
+    'yellow': ['ყვითელ', 'yellow'],
+    'pink': ['ვარდისფერ', 'pink'],
+    'raspberry': ['ჟოლოსფერ', 'raspberry'],
+    'orange': ['ნარინჯისფერ', 'სტაფილოსფერ', 'orange'],
+    'turquoise': ['ფირუზისფერ', 'turquoise'],
+    'purple': ['იისფერ', 'იასამნისფერ', 'purple', 'lilac'],
+    'gray': ['ნაცრისფერ', 'რუხ', 'gray', 'grey'],
+    'brown': ['ყავისფერ', 'ყავის', 'გირჩისფერ', 'brown'],
+    'brick': ['აგურისფერ', 'brick'],
+    'burgundy': ['შინდისფერ', 'burgundy'],
+    'tea': ['ჩაისფერ'],
+    'heather': ['ენდროსფერ'],
+    'ginger': ['ჯინჯერისფერ', 'ginger'],
+    'undyed': ['შეუღებავ', 'undyed', 'natural'],
+    'dark': ['მუქ', 'dark'],
+    'light': ['ღია', 'light'],
+}
+
+MATERIALS = {
+    'cotton': ['ბამბ', 'cotton'],
+    'wool': ['შალ', 'მატყლ', 'wool'],
+    'cashmere': ['ქაშმირ', 'cashmere'],
+    'knit': ['ნაქსოვ', 'knit'],
+}
+
+SIZES = ('XXS', 'XS', 'S', 'M', 'L', 'XL', 'XXL')
+
+_SIZE_RE = re.compile(r'(?<![A-Za-z])(XXS|XS|S|M|L|XL|XXL)(?![A-Za-z])')
+_SOCK_SIZE_RE = re.compile(r'\b\d{2}-\d{2}\b')
+_WORD_RE = re.compile(r'[a-z0-9]+(?:-[a-z0-9]+)*')
+
+
+def _matches(alias, text, words):
+    """Georgian stems match as substrings, ASCII aliases as whole words"""
+    if alias.isascii():
+        return alias in words
+    return alias in text
+
+
+def _facet_keys(vocabulary, text, words):
+    return [key for key, aliases in vocabulary.items() if any(_matches(a, text, words) for a in aliases)]
+
+
+def extract_sizes(name):
+    """Sizes from a variation name suffix, e.g. 'ქუდი - M', 'სტანდარტი (M)', 'S/M', '36-39'"""
+    if ' - ' not in name:
+        return []
+    suffix = name.rsplit(' - ', 1)[1]
+    sizes = _SIZE_RE.findall(suffix)
+    sizes.extend(_SOCK_SIZE_RE.findall(suffix))
+    return list(dict.fromkeys(sizes))
+
+
+def extract_tokens(product):
+    """Facet -> canonical keys for one products.json entry"""
+    text = f"{product.get('name', '')} {product.get('category', '')}".lower()
+    words = set(_WORD_RE.findall(text))
+    return {
+        'category': _facet_keys(CATEGORIES, text, words),
+        'color': _facet_keys(COLORS, text, words),
+        'material': _facet_keys(MATERIALS, text, words),
+        'size': extract_sizes(product.get('name', '')),
+    }
+
+
+def build_search_index(products):
+    """Build the products.index.json structure from the AI products list"""
+    facets = {'category': {}, 'color': {}, 'material': {}, 'size': {}}
+    for product in products:
+        product_id = str(product.get('id', ''))
+        if not product_id:
+            continue
+        for facet, keys in extract_tokens(product).items():
+            for key in keys:
+                facets[facet].setdefault(key, []).append(product_id)
+
+    aliases = {}
+    for facet, vocabulary in (('category', CATEGORIES), ('color', COLORS), ('material', MATERIALS)):
+        for key, words in vocabulary.items():
+            for word in words:
+                aliases[word.lower()] = [facet, key]
+    for size in list(SIZES) + sorted(k for k in facets['size'] if k not in SIZES):
+        aliases[size.lower()] = ['size', size]
+
+    return {
+        'version': INDEX_VERSION,
+        'product_count': len(products),
+        'match': {'non_ascii': 'substring', 'ascii': 'word'},
+        'aliases': aliases,
+        'facets': {
+            facet: {key: sorted(set(ids)) for key, ids in sorted(keys.items())}
+            for facet, keys in facets.items()
+        },
+    }
@@ -0,0 +1,163 @@
+"""
+Output targets for sync-woocommerce-full.py
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .catalog import write_catalog
+from .concurrent_writer import make_writer, writer_stats, writer_summary
+from .manifest import MANIFEST_DIR, Manifest, forget_documents, manifest_suffix
+from .mirror import NOOP
+from .products_json import describe_changes, write_if_changed, write_products_json
+from .prompt_lines import describe_prompt_lines, write_prompt_lines
+
+
+class FirestoreSink:
+    """Delta-sync documents into one Firestore collection"""
+
+    def __init__(self, db, collection, args, report, incremental=False, journal=None, plan=None, dry_run=False):
+        self.collection = collection
+        self.project = db.project
+        self.report = report
+        self.full = args.full
+        with report.stage('manifest'):
+            self.manifest = Manifest(MANIFEST_DIR / f'woocommerce-full.{db.project}{manifest_suffix(collection)}.json',
+                                     db.project, collection)
+            if incremental:
+                self.manifest.carry_over()
+        self.collection_ref = db.collection(collection)
+        self.journal = journal
+        self.plan = plan
+        self.dry_run = dry_run
+        self.writer = make_writer(db, args, report=report, on_commit=self._journal if journal else None)
+        self.queued = 0
+        self.unchanged = 0
+        self.resumed = 0
+        self.resumed_ids = []  # written by the interrupted run, which never got to forget_documents()
+        self.written_ids = {}  # document path -> doc_id, to drop failed writes from the manifest
+        self.fingerprints = {}  # document path -> fingerprint, for the journal
+        # doc_id -> fingerprint committed by the interrupted run this one resumes
+        self.committed = dict(journal.committed(collection)) if journal else {}
+
+    @property
+    def name(self):
+        return f"firestore:{self.collection}"
+
+    def add(self, doc_id, doc, fp, label=None):
+        """Queue doc unless it matches the mirror (or, without one, the last run); returns True if queued"""
+        self.manifest.record(doc_id, fp)
+        if self.plan is not None:
+            if self.plan.add(doc_id, doc) == NOOP and not self.full:
+                self.unchanged += 1
+                return False
+        elif not self.full and self.manifest.is_unchanged(doc_id, fp):
+            self.unchanged += 1
+            return False
+        if self.committed.get(doc_id) == fp:
+            self.resumed += 1
+            self.resumed_ids.append(doc_id)
+            return False
+        # A later row for the same document may match the journal, but this write lands after it
+        self.committed.pop(doc_id, None)
+        self.queued += 1
+        if self.dry_run:
+            return True
+        doc_ref = self.collection_ref.document(doc_id)
+        self.written_ids[doc_ref.path] = doc_id
+        self.fingerprints[doc_ref.path] = fp
+        self.writer.set(doc_ref, doc, merge=True, label=label)
+        return True
+
+    def _journal(self, ops):
+        self.journal.record(self.collection,
+                            {self.written_ids[op[1].path]: self.fingerprints[op[1].path] for op in ops})
+
+    def finish(self):
+        # Commit remaining batches; per-document failures are reported by the writer
+        self.writer.close()
+        with self.report.stage('manifest'):
+            for path in self.writer.failed_paths:
+                self.manifest.discard(self.written_ids[path])
+            self.manifest.save()
+            written = [doc_id for path, doc_id in self.written_ids.items() if path not in self.writer.failed_paths]
+            forget_documents(self.project, self.collection, written + self.resumed_ids, keep=self.manifest.path)
+
+        return {
+            'target': self.name,
+            'written': self.writer.written,
+            'unchanged': self.unchanged,
+            'resumed': self.resumed,
+            'errors': self.writer.errors,
+            'writer': writer_stats(self.writer),
+            'lines': [f"{self.name}: {self.writer.written} synced, {self.unchanged} unchanged, "
+                      f"{self.writer.errors} errors"
+                      + (f", {self.resumed} committed by the interrupted run" if self.resumed else ""),
+                      f"  Writer: {writer_summary(self.writer)}"],
+        }
+
+
+class ProductsJsonSink:
+    """Write products.json plus its search index, prompt lines and catalog shards into one directory"""
+
+    def __init__(self, path, report, changes_path=None):
+        self.path = path
+        self.report = report
+        self.changes_path = changes_path
+        self.products = None
+        self.search_index = None
+        self.prompt_lines = None
+
+    @property
+    def name(self):
+        return f"json:{self.path}"
+
+    def set_products(self, products, search_index, prompt_lines):
+        """Give the sink the final (sorted) products, their search index and prompt lines"""
+        self.products = products
+        self.search_index = search_index
+        self.prompt_lines = prompt_lines
+
+    def finish(self):
+        report = self.report
+        with report.stage('products_json'):
+            changes = write_products_json(self.products, self.path, self.changes_path)
+        report.count('products_json_bytes', os.path.getsize(self.path))
+
+        with report.stage('search_index'):
+            index_path = self.path.with_name('products.index.json')
+            index_written = write_if_changed(
+                index_path, json.dumps(self.search_index, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+        with report.stage('prompt_lines'):
+            prompt_path, prompt_written = write_prompt_lines(self.prompt_lines, self.path)
+
+        # Compact per-category shards for the bot (products.json stays for humans)
+        catalog_dir = self.path.parent / 'catalog'
+        with report.stage('catalog'):
+            catalog_manifest, rewritten = write_catalog(self.products, catalog_dir)
+
+        facet_sizes = ', '.join(f"{facet}: {len(keys)}" for facet, keys in self.search_index['facets'].items())
+        shard_sizes = ', '.join(f"{key}: {shard['count']}" for key, shard in catalog_manifest['shards'].items())
+        return {
+            'target': self.name,
+            'products_json': changes,
+            'index_written': index_written,
+            'prompt_lines_written': prompt_written,
+            'catalog_rewritten': rewritten,
+            'lines': [f"{self.path}: {describe_changes(changes)}",
+                      f"  {'Saved' if index_written else 'Unchanged'} search index {index_path} ({facet_sizes})",
+                      f"  {'Saved' if prompt_written else 'Unchanged'} prompt lines {prompt_path} "
+                      f"({describe_prompt_lines(self.prompt_lines)})",
+                      f"  Catalog shards in {catalog_dir} ({shard_sizes}; {len(rewritten)} files changed)"],
+        }
+
+
+def run_sinks(sinks):
+    """Finish all sinks concurrently; returns their summaries in sink order"""
+    if len(sinks) == 1:
+        return [sinks[0].finish()]
+    with ThreadPoolExecutor(max_workers=len(sinks), thread_name_prefix='sink') as pool:
+        futures = [pool.submit(sink.finish) for sink in sinks]
+        return [future.result() for future in futures]
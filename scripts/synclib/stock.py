@@ -0,0 +1,73 @@
+"""
+Stock-only fast path for the sync scripts (--stock-only)
+"""
+
+import json
+
+from .concurrent_writer import make_writer, writer_summary
+from .csv_reader import Field
+from .manifest import MANIFEST_DIR, Manifest, forget_documents, manifest_suffix
+
+STOCK_FIELDS = [
+    Field('id', 'ID'),
+    Field('type', 'Type'),
+    Field('sku', 'SKU'),
+    Field('name', 'Name'),
+    Field('stock', 'Stock', 'int', '0'),
+    Field('in_stock', 'In stock?', 'raw', '0'),
+]
+
+
+def add_stock_arguments(parser):
+    """Add the --stock-only option"""
+    parser.add_argument('--stock-only', action='store_true',
+                        help="Only push changed stock (stock_qty/in_stock) with masked updates; skips HTML/URL work")
+
+
+class StockSync:
+    """Masked stock updates for documents whose stock changed since the last stock-only run"""
+
+    def __init__(self, db, collection, script, args, report):
+        from google.cloud import firestore
+
+        self.server_timestamp = firestore.SERVER_TIMESTAMP
+        self.full = getattr(args, 'full', False)
+        self.report = report
+        self.project = db.project
+        self.collection = collection
+        self.collection_ref = db.collection(collection)
+        with report.stage('manifest'):
+            self.manifest = Manifest(MANIFEST_DIR / f'stock.{script}.{db.project}{manifest_suffix(collection)}.json',
+                                     db.project, f'{collection}:stock')
+            # Documents missing from this run keep their last pushed stock
+            self.manifest.carry_over()
+        self.writer = make_writer(db, args, report=report)
+        self.queued = 0
+        self.unchanged = 0
+        self.written_ids = {}
+
+    def add(self, doc_id, fields, label=None):
+        """Queue a masked update of fields unless they match the last push; returns True if queued"""
+        key = json.dumps(fields, sort_keys=True)
+        self.manifest.record(doc_id, key)
+        if not self.full and self.manifest.is_unchanged(doc_id, key):
+            self.unchanged += 1
+            return False
+        doc_ref = self.collection_ref.document(doc_id)
+        self.writer.update(doc_ref, {**fields, 'synced_at': self.server_timestamp}, label=label or doc_id)
+        self.written_ids[doc_ref.path] = doc_id
+        self.queued += 1
+        return True
+
+    def finish(self):
+        self.writer.close()
+        with self.report.stage('manifest'):
+            for path in self.writer.failed_paths:
+                self.manifest.discard(self.written_ids[path])
+            self.manifest.save()
+            written = [doc_id for path, doc_id in self.written_ids.items() if path not in self.writer.failed_paths]
+            forget_documents(self.project, self.collection, written, keep=self.manifest.path)
+        self.report.count('stock_changed', self.queued)
+        self.report.count('stock_unchanged', self.unchanged)
+        return {'written': self.writer.written, 'unchanged': self.unchanged, 'errors': self.writer.errors,
+                'writer': writer_summary(self.writer)}
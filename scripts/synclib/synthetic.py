@@ -0,0 +1,129 @@
+"""
+Synthetic WooCommerce exports for benchmarking the sync scripts
+"""
+
+import csv
+import random
+
+WC_EXPORT_HEADER = [
+    'ID', 'Type', 'SKU', 'GTIN, UPC, EAN, or ISBN', 'Name', 'Published', 'Is featured?',
+    'Visibility in catalog', 'Short description', 'Description', 'Date sale price starts',
+    'Date sale price ends', 'Tax status', 'Tax class', 'In stock?', 'Stock', 'Low stock amount',
+    'Backorders allowed?', 'Sold individually?', 'Weight (kg)', 'Length (cm)', 'Width (cm)',
+    'Height (cm)', 'Allow customer reviews?', 'Purchase note', 'Sale price', 'Regular price',
+    'Categories', 'Tags', 'Shipping class', 'Images', 'Download limit', 'Download expiry days',
+    'Parent', 'Grouped products', 'Upsells', 'Cross-sells', 'External URL', 'Button text', 'Position',
+    'Brands', 'Attribute 1 name', 'Attribute 1 value(s)', 'Attribute 1 visible', 'Attribute 1 global',
+    'Attribute 2 name', 'Attribute 2 value(s)', 'Attribute 2 visible', 'Attribute 2 global',
+    'Attribute 3 name', 'Attribute 3 value(s)', 'Attribute 3 visible', 'Attribute 3 global',
+    'Attribute 4 name', 'Attribute 4 value(s)', 'Attribute 4 visible', 'Attribute 4 global',
+]
+
+COLORS = ['მწვანე', 'ლურჯი', 'წითელი', 'თეთრი', 'ყვითელი', 'რუხი', 'ფირუზისფერი', 'ყავისფერი',
+          'სტაფილოსფერი', 'ჩაისფერი', 'აგურისფერი', 'შინდისფერი', 'მუქი ლურჯი', 'ღია ცისფერი']
+STYLES = ['სადა', 'პომპონიანი', 'მოკლე', 'ორნამენტებიანი', 'რბილი']
+PRODUCTS = [
+    ('ქუდი', 'ქუდები', ['L', 'M', 'S', 'XS']),
+    ('წინდები', 'წინდები', ['36-39', '40-43']),
+    ('ხელთათმანები', 'ხელთათმანები', ['S/M', 'სტანდარტი (M)']),
+    ('შარფი', 'შარფები', ['160*25 სმ']),
+]
+MATERIALS = ['თუშური შალი', 'ბამბა', 'მატყლი']
+
+SHORT_DESCRIPTION = (
+    "• ქსოვილი: 100% ნატურალური {material}\\n• სარჩული: 100% ბამბით ნაქსოვი, შუბლის გარშემო\\n"
+    "• ნამდვილი ბებიების ხელით მოქსოვილი\\n• დამზადებულია საქართველოში\\n"
+    "• შეფუთვა: ბრენდირებული კრაფტის ქაღალდი და კრაფტის ჩანთა"
+)
+SIZE_ROW = '<tr>\\n\\n\\n\\n<td width="64">{size}</td>\\n\\n\\n\\n<td width="210">{range} სმ</td>\\n\\n\\n\\n</tr>\\n\\n\\n\\n'
+DESCRIPTION = (
+    'ზომის დასადგენად იხელმძღვანელეთ ქვემოთ მოცემული ცხრილით:\\n\\n\\n\\n<table width="375">\\n\\n\\n\\n'
+    '<tbody>\\n\\n\\n\\n{rows}</tbody>\\n\\n\\n\\n</table>\\n\\n\\n\\n'
+    '✓ შეძენამდე გთხოვთ, ყურადღებით გაეცნოთ ზომების ცხრილს &amp; მოვლის ინსტრუქციას'
+)
+
+
+def _row(**values):
+    row = dict.fromkeys(WC_EXPORT_HEADER, '')
+    row.update({'Published': '1', 'Is featured?': '0', 'Visibility in catalog': 'visible',
+                'Tax status': 'taxable', 'Backorders allowed?': '0', 'Sold individually?': '0',
+                'Allow customer reviews?': '0'})
+    row.update(values)
+    return row
+
+
+def generate_rows(total_rows, seed=0, price_shift=0):
+    """
+    Yield about total_rows export rows (whole parent groups, so it may run a few over).
+
+    price_shift adds that many GEL to every 10th product's price, to give
+    price syncs something to update.
+    """
+    rng = random.Random(seed)
+    next_id = 1000
+    emitted = 0
+    group = 0
+
+    while emitted < total_rows:
+        group += 1
+        color = rng.choice(COLORS)
+        style = rng.choice(STYLES)
+        noun, category, sizes = rng.choice(PRODUCTS)
+        material = rng.choice(MATERIALS)
+        name = f"{color} {style} {noun} №{group}"
+        slug = f"{color}-{noun}-{group}".replace(' ', '-')
+        price = rng.choice([39, 49, 54, 59, 69, 79, 89])
+        if price_shift and group % 10 == 0:
+            price += price_shift
+
+        if group % 25 == 0:
+            # Occasional simple product
+            next_id += 1
+            stock = rng.randint(0, 12)
+            yield _row(ID=str(next_id), Type='simple', SKU=name, Name=name,
+                       **{'Short description': SHORT_DESCRIPTION.format(material=material),
+                          'In stock?': '1' if stock else '0', 'Stock': str(stock),
+                          'Regular price': str(price), 'Categories': category,
+                          'Images': f"https://bebias.ge/wp-content/uploads/{slug}.jpg"})
+            emitted += 1
+            continue
+
+        next_id += 1
+        size_rows = ''.join(SIZE_ROW.format(size=s, range=f"{50 + 4 * i}-{53 + 4 * i}") for i, s in enumerate(sizes))
+        yield _row(ID=str(next_id), Type='variable', SKU=name, Name=name, Position='0', Brands='ბებიას',
+                   **{'Short description': SHORT_DESCRIPTION.format(material=material),
+                      'Description': DESCRIPTION.format(rows=size_rows),
+                      'In stock?': '0', 'Stock': '0',
+                      'Categories': f"{category} > {style} {category}",
+                      'Tags': f"ბებიას, {color} {noun}, ნაქსოვი {noun}, {style} {noun}",
+                      'Images': ', '.join(f"https://bebias.ge/wp-content/uploads/{slug}{suffix}.jpg"
+                                          for suffix in ('', '-2', '-3')),
+                      'Attribute 1 name': 'ზომა', 'Attribute 1 value(s)': ', '.join(sizes),
+                      'Attribute 1 visible': '1', 'Attribute 1 global': '0',
+                      'Attribute 2 name': 'ფერი', 'Attribute 2 value(s)': color,
+                      'Attribute 2 visible': '1', 'Attribute 2 global': '1',
+                      'Attribute 4 name': 'მატერია', 'Attribute 4 value(s)': material,
+                      'Attribute 4 visible': '1', 'Attribute 4 global': '1'})
+        emitted += 1
+
+        for position, size in enumerate(sizes, start=1):
+            next_id += 1
+            stock = rng.randint(0, 6)
+            yield _row(ID=str(next_id), Type='variation', SKU=f"{name} {size}", Name=f"{name} - {size}",
+                       Parent=name, Position=str(position),
+                       **{'Tax class': 'parent', 'In stock?': '1' if stock else '0', 'Stock': str(stock),
+                          'Regular price': str(price),
+                          'Attribute 1 name': 'ზომა', 'Attribute 1 value(s)': size, 'Attribute 1 global': '0'})
+            emitted += 1
+
+
+def write_synthetic_export(path, total_rows, seed=0, price_shift=0):
+    """Write a synthetic export CSV (UTF-8 with BOM, like WooCommerce); returns rows written"""
+    count = 0
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=WC_EXPORT_HEADER)
+        writer.writeheader()
+        for row in generate_rows(total_rows, seed=seed, price_shift=price_shift):
+            writer.writerow(row)
+            count += 1
+    return count
@@ -0,0 +1,65 @@
+"""
+Text and URL helpers shared by the sync scripts
+"""
+
+import re
+from functools import lru_cache
+from html import unescape
+from urllib.parse import urlparse, quote, urlunparse
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_WHITESPACE_RE = re.compile(r'\s+')
+_DOC_ID_UNSAFE_RE = re.compile(r'[/\\.\[\]*`]')
+
+
+def encode_url(url):
+    """
+    Encode Georgian characters in URL path segments
+
+    Example:
+        https://bebias.ge/wp-content/uploads/სტაფილოსფერი-ქუდი.jpg
+        -> https://bebias.ge/wp-content/uploads/%E1%83%A1%E1%83%A2%E1%83%90...
+    """
+    if not url or not url.strip():
+        return url
+    url = url.strip()
+    # Fast path: nothing to encode
+    if url.isascii():
+        return url
+    return _encode_non_ascii_url(url)
+
+
+@lru_cache(maxsize=8192)
+def _encode_non_ascii_url(url):
+    try:
+        parsed = urlparse(url)
+        encoded_path = '/'.join(
+            quote(segment, safe='-._~') if not segment.isascii() else segment
+            for segment in parsed.path.split('/')
+        )
+        return urlunparse((parsed.scheme, parsed.netloc, encoded_path, parsed.params, parsed.query, parsed.fragment))
+    except Exception as e:
+        print(f"  Warning: Error encoding URL {url}: {e}")
+        return url
+
+
+def parse_images(images_str):
+    """Parse comma-separated image URLs and encode them"""
+    if not images_str:
+        return []
+    return [encode_url(url) for url in images_str.split(',') if url.strip()]
+
+
+def clean_html(text):
+    """Remove HTML tags and clean up text"""
+    if not text:
+        return ""
+    text = _TAG_RE.sub('', text)
+    text = unescape(text)
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def sanitize_doc_id(name):
+    """Sanitize product name for use as Firestore document ID"""
+    # Keep Georgian letters, alphanumeric, spaces, hyphens
+    return _DOC_ID_UNSAFE_RE.sub('', name).strip()[:500]  # Firestore doc ID max 1500 bytes
@@ -0,0 +1,140 @@
+"""
+File watching and health reporting for the long-running sync daemon
+"""
+
+import fnmatch
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # polling fallback
+    FileSystemEventHandler = object
+    Observer = None
+
+from .manifest import MANIFEST_DIR
+
+HEALTH_PATH = MANIFEST_DIR / 'watch-health.json'
+
+
+class DirectoryWatcher:
+    """Set `changed` whenever a file matching pattern in directory is created, modified or moved in"""
+
+    def __init__(self, directory, pattern='*.csv', poll_interval=2.0):
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.poll_interval = poll_interval
+        self.changed = threading.Event()
+        self.last_event = 0.0  # time.monotonic() of the latest change
+        self.backend = 'watchdog' if Observer is not None else 'polling'
+        self._observer = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if Observer is not None:
+            self._observer = Observer()
+            self._observer.schedule(_Handler(self), str(self.directory), recursive=False)
+            self._observer.start()
+        else:
+            self._thread = threading.Thread(target=self._poll, name='watch-poll', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def matches(self, path):
+        return fnmatch.fnmatch(Path(path).name, self.pattern)
+
+    def notify(self):
+        self.last_event = time.monotonic()
+        self.changed.set()
+
+    def newest(self):
+        """Most recently modified matching file, or None"""
+        files = [p for p in self.directory.glob(self.pattern) if p.is_file()]
+        return max(files, key=lambda p: p.stat().st_mtime, default=None)
+
+    def _snapshot(self):
+        state = {}
+        for path in self.directory.glob(self.pattern):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            state[path.name] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    def _poll(self):
+        previous = self._snapshot()
+        while not self._stop.wait(self.poll_interval):
+            current = self._snapshot()
+            if current != previous:
+                previous = current
+                self.notify()
+
+
+class _Handler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        # Exports are often written under a temp name and renamed into place
+        for path in (getattr(event, 'src_path', ''), getattr(event, 'dest_path', '')):
+            if path and self.watcher.matches(path):
+                self.watcher.notify()
+                return
+
+
+class HealthFile:
+    """Daemon state written atomically to a JSON file"""
+
+    def __init__(self, path=HEALTH_PATH, **static):
+        self.path = Path(path)
+        self.state = {
+            'pid': os.getpid(),
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'state': 'starting',
+            'syncs': 0,
+            'failures': 0,
+            'consecutive_failures': 0,
+            'last_sync': None,
+            **static,
+        }
+        self._lock = threading.Lock()
+
+    @property
+    def healthy(self):
+        return self.state['state'] != 'stopped' and self.state['consecutive_failures'] == 0
+
+    def update(self, **values):
+        with self._lock:
+            self.state.update(values)
+            self.state['heartbeat_at'] = datetime.now().isoformat(timespec='seconds')
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, ensure_ascii=False, indent=2, default=str)
+            os.replace(tmp_path, self.path)
+
+    def record_sync(self, result):
+        """Record one sync's outcome (a dict with at least 'status')"""
+        ok = result.get('status') == 'ok'
+        self.update(syncs=self.state['syncs'] + 1,
+                    failures=self.state['failures'] + (0 if ok else 1),
+                    consecutive_failures=0 if ok else self.state['consecutive_failures'] + 1,
+                    last_sync=result,
+                    **({'last_success': result} if ok else {}))
@@ -0,0 +1,211 @@
+"""
+WooCommerce REST API as a sync source, in place of a manual CSV export
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from .manifest import MANIFEST_DIR
+
+API_PREFIX = '/wp-json/wc/v3'
+PER_PAGE = 100
+# Pull a little earlier than the last checkpoint so edits racing the previous pull aren't missed
+CHECKPOINT_OVERLAP = timedelta(minutes=2)
+
+PUBLISHED = {'publish': '1', 'private': '-1'}
+
+
+class WooCommerceSource:
+    """Fetch products and variations from the WooCommerce REST API as CSV-shaped rows"""
+
+    def __init__(self, base_url, consumer_key=None, consumer_secret=None, workers=8, timeout=30,
+                 checkpoint_path=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.base_url = base_url.rstrip('/')
+        self.workers = workers
+        self.timeout = timeout
+        self.checkpoint_path = checkpoint_path or MANIFEST_DIR / f"woocommerce-api.{urlparse(self.base_url).netloc}.json"
+        self.checkpoint = self._load_checkpoint()
+
+        self.session = requests.Session()
+        retry = Retry(total=5, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=('GET',))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if consumer_key and consumer_secret:
+            self.session.auth = (consumer_key, consumer_secret)
+
+        self.requests = 0
+        self.incremental = False
+        self.modified_after = None
+        self._server_time = None
+
+    def close(self):
+        self.session.close()
+
+    # HTTP
+
+    def _get(self, path, params):
+        resp = self.session.get(f"{self.base_url}{API_PREFIX}{path}", params=params, timeout=self.timeout)
+        self.requests += 1
+        resp.raise_for_status()
+        if self._server_time is None and resp.headers.get('Date'):
+            self._server_time = parsedate_to_datetime(resp.headers['Date'])
+        return resp
+
+    def _get_all(self, path, params=None, pool=None):
+        """
+        Every item of a paged listing. With a pool, pages after the first are
+        fetched in parallel; inside pool tasks pass none (waiting on the same
+        pool from its own workers can deadlock).
+        """
+        params = dict(params or {}, per_page=PER_PAGE)
+        first = self._get(path, dict(params, page=1))
+        items = first.json()
+        total_pages = int(first.headers.get('X-WP-TotalPages') or 1)
+
+        def fetch_page(page):
+            return self._get(path, dict(params, page=page)).json()
+
+        pages = range(2, total_pages + 1)
+        for page_items in (pool.map(fetch_page, pages) if pool else map(fetch_page, pages)):
+            items.extend(page_items)
+        return items
+
+    def _get_variations(self, parent_id, params):
+        try:
+            return self._get_all(f"/products/{parent_id}/variations", params)
+        except Exception as e:
+            # A parent deleted since the checkpoint answers 404; keep going with the rest
+            if getattr(getattr(e, 'response', None), 'status_code', None) == 404:
+                return []
+            raise
+
+    # Pull
+
+    def fetch(self, full=False):
+        """Pull changed (or, with full=True, all) products and variations; returns CSV-shaped rows"""
+        since = None if full else self.checkpoint.get('modified_after')
+        self.incremental = since is not None
+        self.modified_after = since
+        params = {'modified_after': since, 'dates_are_gmt': 'true'} if since else {}
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='wc-api') as pool:
+            # Categories load alongside the product pages, which are fetched in parallel
+            categories_future = pool.submit(self._get_all, '/products/categories')
+            products = self._get_all('/products', params, pool)
+            category_paths = _category_paths(categories_future.result())
+
+            # Saving a variation bumps its parent's date_modified, so the changed variations all
+            # belong to parents in this page. Their rows carry the parent's name and images, which
+            # may be what changed, so each parent's variations are fetched in full.
+            parents = [p for p in products if p.get('type') == 'variable']
+            variation_lists = list(pool.map(lambda p: self._get_variations(p['id'], {}), parents))
+
+        variations_by_parent = {str(p['id']): variations for p, variations in zip(parents, variation_lists)}
+        rows = []
+        for product in products:
+            rows.append(product_row(product, category_paths))
+            if product.get('type') == 'variable':
+                parent_id = str(product['id'])
+                parent = {'name': product.get('name', ''),
+                          'images': ', '.join(image.get('src', '') for image in product.get('images') or [])}
+                rows.extend(variation_row(v, parent_id, parent) for v in variations_by_parent[parent_id])
+        return rows
+
+    # Checkpoint
+
+    def _load_checkpoint(self):
+        if not self.checkpoint_path.exists():
+            return {}
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"  Warning: ignoring unreadable checkpoint {self.checkpoint_path}: {e}")
+            return {}
+        return data if data.get('base_url') == self.base_url else {}
+
+    def save_checkpoint(self):
+        """Record this pull's server time; call only once its rows were synced successfully"""
+        pulled_at = self._server_time or datetime.now(timezone.utc)
+        modified_after = (pulled_at.astimezone(timezone.utc) - CHECKPOINT_OVERLAP).strftime('%Y-%m-%dT%H:%M:%S')
+        data = {'base_url': self.base_url, 'modified_after': modified_after}
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_suffix(self.checkpoint_path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp_path, self.checkpoint_path)
+        return modified_after
+
+
+def _category_paths(categories):
+    """category ID -> 'Parent > Child' path, the way the CSV export writes categories"""
+    by_id = {c['id']: c for c in categories}
+    paths = {}
+    for category_id in by_id:
+        names = []
+        current = by_id.get(category_id)
+        while current is not None and len(names) < 10:
+            names.append(current.get('name', ''))
+            current = by_id.get(current.get('parent'))
+        paths[category_id] = ' > '.join(reversed(names))
+    return paths
+
+
+def _stock(item):
+    quantity = item.get('stock_quantity')
+    return '' if quantity is None else str(quantity)
+
+
+def product_row(product, category_paths):
+    """Map a /products item to a CSV export row"""
+    return {
+        'ID': str(product['id']),
+        'Type': product.get('type', ''),
+        'SKU': product.get('sku', ''),
+        'Name': product.get('name', ''),
+        'Published': PUBLISHED.get(product.get('status'), '0'),
+        'Short description': product.get('short_description', ''),
+        'Description': product.get('description', ''),
+        'In stock?': '1' if product.get('stock_status') == 'instock' else '0',
+        'Stock': _stock(product),
+        'Sale price': product.get('sale_price', ''),
+        'Regular price': product.get('regular_price', ''),
+        'Categories': ', '.join(category_paths.get(c['id'], c.get('name', '')) for c in product.get('categories') or []),
+        'Tags': ', '.join(t.get('name', '') for t in product.get('tags') or []),
+        'Images': ', '.join(image.get('src', '') for image in product.get('images') or []),
+        'Parent': '',
+    }
+
+
+def variation_row(variation, parent_id, parent):
+    """Map a /products/<id>/variations item to a CSV export row (parent images fill in missing ones)"""
+    options = ', '.join(a.get('option', '') for a in variation.get('attributes') or [])
+    name = variation.get('name') or (f"{parent['name']} - {options}" if options else parent['name'])
+    image = (variation.get('image') or {}).get('src', '')
+    return {
+        'ID': str(variation['id']),
+        'Type': 'variation',
+        'SKU': variation.get('sku', ''),
+        'Name': name,
+        'Published': PUBLISHED.get(variation.get('status'), '0'),
+        'Short description': '',
+        'Description': variation.get('description', ''),
+        'In stock?': '1' if variation.get('stock_status') == 'instock' else '0',
+        'Stock': _stock(variation),
+        'Sale price': variation.get('sale_price', ''),
+        'Regular price': variation.get('regular_price', ''),
+        'Categories': '',
+        'Tags': '',
+        'Images': image or parent['images'],
+        'Parent': f"id:{parent_id}",
+    }
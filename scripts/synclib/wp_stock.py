@@ -0,0 +1,146 @@
+"""
+Stock pushes to WordPress through the DB Handler plugin's update-stock endpoint
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+UPDATE_STOCK_PATH = '/wp-json/wcdbh/v1/update-stock'
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Result statuses
+OK = 'ok'
+NOT_FOUND = 'not_found'
+ERROR = 'error'
+
+
+def add_push_arguments(parser):
+    """Add the --workers/--batch-size/--retries options"""
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent requests (default: 8)")
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help="SKUs per request (default: 1, the plugin's single-SKU payload; more sends the "
+                             "{\"items\": [...]} batch payload, which the deployed plugin doesn't implement)")
+    parser.add_argument('--retries', type=int, default=5, help="Retries per request on 429/5xx/connection errors")
+
+
+class WordPressStockPusher:
+    """Set stock for many SKUs through wcdbh/v1/update-stock over a pooled session"""
+
+    def __init__(self, base_url, api_key, workers=8, batch_size=1, retries=5, timeout=15, report=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.url = f"{base_url.rstrip('/')}{UPDATE_STOCK_PATH}"
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self.report = report
+        self.request_errors = (requests.RequestException,)
+        # None until the first batch is answered
+        self.batches_supported = None if self.batch_size > 1 else False
+
+        self.session = requests.Session()
+        # POST is safe to retry here: every payload sets an absolute stock level
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=RETRY_STATUSES,
+                      allowed_methods=('POST',), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Authorization': f'Bearer {api_key}', 'Content-Type': 'application/json',
+                                     'Accept': 'application/json'})
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+
+    def close(self):
+        self.session.close()
+
+    def push(self, updates):
+        """Send {sku: stock_qty}; returns {sku: (status, detail)} with status ok, not_found or error"""
+        items = list(updates.items())
+        batches = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='wp-stock') as pool:
+            for batch_results in pool.map(self._push_batch, batches):
+                results.update(batch_results)
+        return results
+
+    # HTTP
+
+    def _post(self, payload):
+        # ensure_ascii: Georgian SKUs travel as \u escapes, so the body is plain ASCII
+        body = json.dumps(payload, ensure_ascii=True, separators=(',', ':')).encode('ascii')
+        started = time.perf_counter()
+        resp = self.session.post(self.url, data=body, timeout=self.timeout)
+        if self.report is not None:
+            self.report.observe('wp_update_stock', time.perf_counter() - started)
+        retry_state = getattr(resp.raw, 'retries', None)
+        with self._lock:
+            self.requests += 1
+            self.retries += len(getattr(retry_state, 'history', ()) or ())
+        return resp
+
+    def _push_one(self, sku, stock_qty):
+        try:
+            resp = self._post({'sku': sku, 'stock_qty': stock_qty})
+        except self.request_errors as e:
+            return ERROR, f"{type(e).__name__}: {e}"
+        body = _json(resp)
+        if resp.ok:
+            return OK, None
+        code = body.get('code') if isinstance(body, dict) else None
+        return (NOT_FOUND if resp.status_code == 404 and code != 'rest_no_route' else ERROR), _message(resp, body)
+
+    def _push_singles(self, items):
+        return {sku: self._push_one(sku, stock_qty) for sku, stock_qty in items}
+
+    def _push_batch(self, items):
+        if len(items) == 1 or self.batches_supported is False:
+            return self._push_singles(items)
+        try:
+            resp = self._post({'items': [{'sku': sku, 'stock_qty': stock_qty} for sku, stock_qty in items]})
+        except self.request_errors as e:
+            return {sku: (ERROR, f"{type(e).__name__}: {e}") for sku, _ in items}
+
+        body = _json(resp)
+        results = body.get('results') if isinstance(body, dict) else None
+        if resp.ok and isinstance(results, list) and len(results) == len(items):
+            self.batches_supported = True
+            return {sku: _item_result(result) for (sku, _), result in zip(items, results)}
+
+        # Retries exhausted or credentials refused: says nothing about batch support
+        if resp.status_code in RETRY_STATUSES or resp.status_code in (401, 403) or self.batches_supported:
+            return {sku: (ERROR, _message(resp, body)) for sku, _ in items}
+
+        with self._lock:
+            if self.batches_supported is None:
+                self.batches_supported = False
+                print(f"  Endpoint doesn't take batches (HTTP {resp.status_code}); sending one SKU per request")
+        return self._push_singles(items)
+
+
+def _json(resp):
+    try:
+        return resp.json()
+    except ValueError:
+        return None
+
+
+def _message(resp, body):
+    if isinstance(body, dict) and (body.get('message') or body.get('code')):
+        return f"HTTP {resp.status_code}: {body.get('message') or body.get('code')}"
+    return f"HTTP {resp.status_code}: {resp.text[:200]}"
+
+
+def _item_result(result):
+    """(status, detail) of one entry of a batch response"""
+    if not isinstance(result, dict):
+        return ERROR, f"unexpected result {result!r}"
+    if result.get('success'):
+        return OK, None
+    detail = result.get('message') or result.get('code') or 'failed'
+    return (NOT_FOUND if result.get('code') == 'product_not_found' else ERROR), detail
@@ -1,49 +1,224 @@
+"""
+WordPress reachability and load probe, run as a Cloud Function (entry point test_wp_connection)
+"""
+
+import argparse
+import hmac
+import json
+import math
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
 import functions_framework
 import requests
+from requests.adapters import HTTPAdapter
 
-@functions_framework.http
-def test_wp_connection(request):
-    """Test if we can reach WordPress from Google Cloud."""
-    results = {}
+WP_URL = os.environ.get('WP_URL', 'https://bebias.ge')
+API_KEY = os.environ.get('API_KEY', '')
+PROBE_TOKEN = os.environ.get('PROBE_TOKEN', '')  # HTTP callers must present it; unset refuses every call
+STOCK_WRITES = os.environ.get('PROBE_STOCK_WRITES') == '1'
+UPDATE_STOCK_PATH = '/wp-json/wcdbh/v1/update-stock'
 
-    # Test 1: Simple PHP file
-    try:
-        resp = requests.get('https://bebias.ge/test-gcp.php', timeout=10)
-        results['test_file'] = {'status': resp.status_code, 'response': resp.text[:300]}
-    except Exception as e:
-        results['test_file'] = {'error': str(e)}
+SCENARIOS = ('test_file', 'wp_json', 'ascii_sku', 'georgian_sku', 'georgian_sku_utf8')
+STOCK_SCENARIOS = ('ascii_sku', 'georgian_sku', 'georgian_sku_utf8')  # POST update-stock: set live stock
+DEFAULT_SCENARIOS = ('wp_json',) + (STOCK_SCENARIOS if STOCK_WRITES else ())
+ASCII_SKU, ASCII_STOCK = 'test-product', 10
+GEORGIAN_SKU, GEORGIAN_STOCK = 'აგურისფერი სადა ქუდი - M', 2
+
+DEFAULT_COUNT = 20
+DEFAULT_CONCURRENCY = 4
+MAX_COUNT = 100  # per scenario, for HTTP invocations
+MAX_CONCURRENCY = 8
+MAX_TIMEOUT = 30
+TIMEOUT = 10
+
+# One session (connection pool) per pool size, kept across warm invocations
+_sessions = {}
+
+
+def get_session(concurrency):
+    """Pooled keep-alive session with room for `concurrency` connections per host"""
+    session = _sessions.get(concurrency)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        if API_KEY:
+            session.headers['Authorization'] = f'Bearer {API_KEY}'
+        _sessions[concurrency] = session
+    return session
 
-    # Test 2: WordPress REST API base
+
+def scenario_request(scenario, base_url, ascii_sku, georgian_sku, stock_qty):
+    """(method, url, requests kwargs) of one request of a scenario"""
+    if scenario == 'test_file':
+        return 'GET', f'{base_url}/test-gcp.php', {}
+    if scenario == 'wp_json':
+        return 'GET', f'{base_url}/wp-json/', {}
+
+    url = f'{base_url}{UPDATE_STOCK_PATH}'
+    if scenario == 'ascii_sku':
+        return 'POST', url, {'json': {'sku': ascii_sku, 'stock_qty': ASCII_STOCK if stock_qty is None else stock_qty}}
+    payload = {'sku': georgian_sku, 'stock_qty': GEORGIAN_STOCK if stock_qty is None else stock_qty}
+    if scenario == 'georgian_sku':
+        return 'POST', url, {'json': payload}
+    if scenario == 'georgian_sku_utf8':
+        return 'POST', url, {'data': json.dumps(payload, ensure_ascii=False).encode('utf-8'),
+                             'headers': {'Content-Type': 'application/json; charset=utf-8'}}
+    raise ValueError(f"unknown scenario: {scenario}")
+
+
+def timed_request(session, method, url, kwargs, timeout):
+    """(seconds, status code or exception name, response text) of one request, body included"""
+    started = time.perf_counter()
     try:
-        resp = requests.get('https://bebias.ge/wp-json/', timeout=10)
-        results['wp_json_base'] = {'status': resp.status_code}
-    except Exception as e:
-        results['wp_json_base'] = {'error': str(e)}
-
-    # Test 3: ASCII SKU (should work)
-    import os
-    api_key = os.environ.get('API_KEY', 'wcdbh_live_9x8d7f6g5h4j3k2l')
+        resp = session.request(method, url, timeout=timeout, **kwargs)
+        text = resp.text
+        outcome = resp.status_code
+    except requests.RequestException as e:
+        text = str(e)
+        outcome = type(e).__name__
+    return time.perf_counter() - started, outcome, text
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def run_scenario(session, scenario, base_url, count, concurrency, timeout=TIMEOUT,
+                 ascii_sku=ASCII_SKU, georgian_sku=GEORGIAN_SKU, stock_qty=None):
+    """Send count requests with concurrency workers; returns latency/error/throughput stats"""
+    method, url, kwargs = scenario_request(scenario, base_url, ascii_sku, georgian_sku, stock_qty)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(lambda _: timed_request(session, method, url, kwargs, timeout), range(count)))
+        wall = time.perf_counter() - started
+
+    latencies = sorted(seconds * 1000 for seconds, _, _ in results)
+    outcomes = Counter(str(outcome) for _, outcome, _ in results)
+    errors = sum(1 for _, outcome, _ in results if not (isinstance(outcome, int) and outcome < 400))
+    samples = {}  # first response text per outcome, for diagnosing errors
+    for _, outcome, text in results:
+        samples.setdefault(str(outcome), text[:300])
+
+    return {
+        'request': f'{method} {url}',
+        'requests': count,
+        'concurrency': concurrency,
+        'errors': errors,
+        'error_rate': round(errors / count, 4) if count else 0,
+        'outcomes': dict(outcomes),
+        'wall_s': round(wall, 3),
+        'req_per_s': round(count / wall, 1) if wall > 0 else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 1) if latencies else None,
+            'p95': round(percentile(latencies, 95), 1) if latencies else None,
+            'p99': round(percentile(latencies, 99), 1) if latencies else None,
+            'mean': round(sum(latencies) / len(latencies), 1) if latencies else None,
+            'max': round(latencies[-1], 1) if latencies else None,
+        },
+        'samples': samples,
+    }
+
+
+def run_probe(base_url=WP_URL, count=DEFAULT_COUNT, concurrency=DEFAULT_CONCURRENCY, scenarios=DEFAULT_SCENARIOS,
+              **options):
+    """Run the scenarios one after another on one pooled session"""
+    session = get_session(concurrency)
+    base_url = base_url.rstrip('/')
+    return {
+        'base_url': base_url,
+        'scenarios': {scenario: run_scenario(session, scenario, base_url, count, concurrency, **options)
+                      for scenario in scenarios},
+    }
+
+
+def parse_scenarios(value):
+    scenarios = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown or not scenarios:
+        raise ValueError(f"scenarios must be a comma-separated subset of {','.join(SCENARIOS)}")
+    writes = [name for name in scenarios if name in STOCK_SCENARIOS]
+    if writes and not STOCK_WRITES:
+        raise ValueError(f"update-stock scenarios ({','.join(writes)}) set live stock and only run with "
+                         "PROBE_STOCK_WRITES=1")
+    if writes and not API_KEY:
+        raise ValueError(f"update-stock scenarios ({','.join(writes)}) need API_KEY (the DB Handler plugin's key)")
+    return scenarios
+
+
+def authorized(request):
+    """True if the caller sent "Authorization: Bearer <PROBE_TOKEN>" (never, when PROBE_TOKEN is unset)"""
+    supplied = request.headers.get('Authorization', '')
+    return bool(PROBE_TOKEN) and hmac.compare_digest(supplied.encode(), f'Bearer {PROBE_TOKEN}'.encode())
+
+
+@functions_framework.http
+def test_wp_connection(request):
+    """Probe WordPress from Google Cloud: latency percentiles, error rate and throughput per scenario"""
+    if not authorized(request):
+        return {'error': 'unauthorized'}, 401
+    params = {**request.args.to_dict(), **(request.get_json(silent=True) or {})}
     try:
-        resp = requests.post(
-            'https://bebias.ge/wp-json/wcdbh/v1/update-stock',
-            json={'sku': 'test-product', 'stock_qty': 10},
-            headers={'Authorization': f'Bearer {api_key}', 'Content-Type': 'application/json'},
-            timeout=10
-        )
-        results['ascii_sku'] = {'status': resp.status_code, 'response': resp.text[:300]}
-    except Exception as e:
-        results['ascii_sku'] = {'error': str(e)}
-
-    # Test 4: Georgian SKU (might fail with 415)
+        count = min(max(int(params.get('count', DEFAULT_COUNT)), 1), MAX_COUNT)
+        concurrency = min(max(int(params.get('concurrency', DEFAULT_CONCURRENCY)), 1), MAX_CONCURRENCY)
+        scenarios = parse_scenarios(str(params.get('scenarios', ','.join(DEFAULT_SCENARIOS))))
+        stock_qty = int(params['stock_qty']) if params.get('stock_qty') not in (None, '') else None
+        timeout = min(max(float(params.get('timeout', TIMEOUT)), 1), MAX_TIMEOUT)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+
+    # The target is fixed by WP_URL, so callers can't point the function at other hosts
+    return run_probe(WP_URL, count, concurrency, scenarios, timeout=timeout, stock_qty=stock_qty,
+                     ascii_sku=str(params.get('ascii_sku', ASCII_SKU)),
+                     georgian_sku=str(params.get('georgian_sku', GEORGIAN_SKU)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure WordPress latency, errors and throughput")
+    parser.add_argument('--base-url', default=WP_URL, help=f"WordPress URL (default: WP_URL or {WP_URL})")
+    parser.add_argument('--count', type=int, default=DEFAULT_COUNT, help="Requests per scenario")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="Concurrent requests")
+    parser.add_argument('--scenarios', default=','.join(DEFAULT_SCENARIOS),
+                        help=f"Comma-separated, from {','.join(SCENARIOS)} (update-stock ones need "
+                             "PROBE_STOCK_WRITES=1)")
+    parser.add_argument('--ascii-sku', default=ASCII_SKU)
+    parser.add_argument('--georgian-sku', default=GEORGIAN_SKU)
+    parser.add_argument('--stock-qty', type=int, help="stock_qty for update-stock (default: per-SKU test values)")
+    parser.add_argument('--timeout', type=float, default=TIMEOUT, help="Per-request timeout in seconds")
+    parser.add_argument('--json', action='store_true', help="Print the raw result JSON")
+    args = parser.parse_args()
     try:
-        resp = requests.post(
-            'https://bebias.ge/wp-json/wcdbh/v1/update-stock',
-            json={'sku': 'აგურისფერი სადა ქუდი - M', 'stock_qty': 2},
-            headers={'Authorization': f'Bearer {api_key}', 'Content-Type': 'application/json; charset=utf-8'},
-            timeout=10
-        )
-        results['georgian_sku'] = {'status': resp.status_code, 'response': resp.text[:300]}
-    except Exception as e:
-        results['georgian_sku'] = {'error': str(e)}
-
-    return results
+        args.scenarios = parse_scenarios(args.scenarios)
+    except ValueError as e:
+        parser.error(str(e))
+
+    result = run_probe(args.base_url, args.count, args.concurrency, args.scenarios, timeout=args.timeout,
+                       ascii_sku=args.ascii_sku, georgian_sku=args.georgian_sku, stock_qty=args.stock_qty)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+
+    print("=" * 60)
+    print(f"WORDPRESS PROBE: {result['base_url']} ({args.count} requests x {args.concurrency} concurrent)")
+    print("=" * 60)
+    print(f"{'scenario':<19} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'req/s':>7} {'errors':>7}  outcomes")
+    for scenario, stats in result['scenarios'].items():
+        latency = stats['latency_ms']
+        outcomes = ', '.join(f"{outcome} x{n}" for outcome, n in sorted(stats['outcomes'].items()))
+        print(f"{scenario:<19} {latency['p50']:>7} {latency['p95']:>7} {latency['p99']:>7} "
+              f"{stats['req_per_s']:>7} {stats['error_rate']:>7.1%}  {outcomes}")
+    for scenario, stats in result['scenarios'].items():
+        for outcome, text in stats['samples'].items():
+            if not outcome.startswith(('2', '3')):
+                print(f"  {scenario} {outcome}: {text[:120]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import importlib.util
+import threading
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from synclib.synthetic import write_synthetic_export
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+
+
+def load_script(name):
+    """Import scripts/<name>.py (hyphenated, so not importable by name) as a new module"""
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_').replace('/', '_'), SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class MockWooCommerce:
+    """scripts/mock-woocommerce.py serving a small synthetic export on a free local port"""
+
+    def __init__(self, csv_path, **options):
+        mock = load_script('mock-woocommerce')
+        self.catalog = mock.Catalog(str(csv_path))
+        self.handler = type('Handler', (mock.Handler,), {'catalog': self.catalog, **options})
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def mock_woocommerce(tmp_path):
+    """Start a mock on a synthetic export; call it with Handler options (no_batch=True, ...)"""
+    servers = []
+
+    def start(rows=30, **options):
+        csv_path = tmp_path / 'export.csv'
+        write_synthetic_export(csv_path, rows)
+        servers.append(MockWooCommerce(csv_path, **options))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
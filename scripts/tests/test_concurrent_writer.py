@@ -0,0 +1,39 @@
+import pytest
+
+from synclib.concurrent_writer import AdaptiveLimiter
+
+
+def test_limiter_ramps_up_after_successes_and_stops_at_maximum():
+    limiter = AdaptiveLimiter(initial=1, maximum=3, ramp_after=2)
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release(ok=True)
+    assert limiter.limit == 3
+    assert limiter.peak == 3
+
+
+def test_limiter_halves_on_throttling_but_not_below_one():
+    limiter = AdaptiveLimiter(initial=8, maximum=8)
+    limiter.acquire()
+    limiter.release(ok=False)
+    assert limiter.limit == 4
+    for _ in range(5):
+        limiter.acquire()
+        limiter.release(ok=False)
+    assert limiter.limit == 1
+    assert limiter.peak == 8
+
+
+def test_limiter_throttling_resets_the_ramp():
+    limiter = AdaptiveLimiter(initial=2, maximum=8, ramp_after=3)
+    for ok in (True, True, False, True, True):
+        limiter.acquire()
+        limiter.release(ok=ok)
+    assert limiter.limit == 1
+
+
+def test_limiter_rejects_bad_bounds():
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(initial=0)
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(initial=9, maximum=8)
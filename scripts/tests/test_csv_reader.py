@@ -0,0 +1,58 @@
+import csv
+
+import pytest
+
+from synclib import Field, read_records, records_from_dicts
+
+FIELDS = [
+    Field('id', 'ID'),
+    Field('stock', 'Stock', 'int', '0'),
+    Field('price', 'Regular price', 'float', '0'),
+    Field('sale_price', 'Sale price', 'float?'),
+    Field('description', 'Description', 'raw'),
+    Field('missing', 'No such column', 'str', 'fallback'),
+]
+
+HEADER = ['ID', 'Type', 'Stock', 'Regular price', 'Sale price', 'Description']
+ROWS = [
+    [' 4714 ', 'simple', ' 3 ', '59', '', '  <p>ქუდი</p> '],
+    ['4715', 'variation', '', '', '45.5', ''],
+    ['4716', 'simple', 'many', '1,5', 'x', ''],
+]
+
+
+@pytest.fixture
+def export(tmp_path):
+    path = tmp_path / 'export.csv'
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        csv.writer(f).writerows([HEADER] + ROWS)
+    return path
+
+
+def expected():
+    return [
+        ('4714', 3, 59.0, None, '  <p>ქუდი</p> ', 'fallback', None),
+        ('4715', 0, 0, 45.5, '', 'fallback', None),
+        ('4716', 0, 0, None, '', 'fallback', "invalid literal for int() with base 10: 'many'"),
+    ]
+
+
+def test_csv_engine_trims_parses_and_reports_errors(export):
+    assert [tuple(record) for record in read_records(export, FIELDS)] == expected()
+
+
+def test_records_from_dicts_match_the_csv_engine():
+    rows = [dict(zip(HEADER, row)) for row in ROWS]
+    assert [tuple(record) for record in records_from_dicts(rows, FIELDS)] == expected()
+
+
+def test_pandas_engine_matches_the_csv_engine(export):
+    pytest.importorskip('pandas')
+    records = list(read_records(export, FIELDS, engine='pandas'))
+    assert [tuple(record) for record in records] == expected()
+    assert [type(record.price) for record in records] == [float, int, int]
+
+
+def test_unknown_engine(export):
+    with pytest.raises(ValueError):
+        read_records(export, FIELDS, engine='polars')
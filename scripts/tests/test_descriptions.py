@@ -0,0 +1,37 @@
+from synclib import DescriptionStore, descriptions_collection
+from synclib.descriptions import description_id
+
+
+def test_each_distinct_text_is_cleaned_once_and_stored_once():
+    calls = []
+
+    def clean(raw):
+        calls.append(raw)
+        return raw.replace('<p>', '').replace('</p>', '').strip()
+
+    store = DescriptionStore(clean)
+    first = store.add('<p>ზომები</p>')
+    assert store.add('<p>ზომები</p>') == first
+    assert store.add(' ზომები ') == first  # different HTML, same cleaned text
+    assert calls == ['<p>ზომები</p>', ' ზომები ']
+    assert store.texts == {first: 'ზომები'}
+    assert first == description_id('ზომები')
+    assert (store.lookups, store.hits) == (3, 1)
+
+
+def test_empty_descriptions_get_no_id():
+    store = DescriptionStore(lambda raw: raw.strip())
+    assert store.add('') == ''
+    assert store.add('   ') == ''
+    assert store.clean('') == ''
+    assert store.texts == {}
+
+
+def test_clean_does_not_register_for_writing():
+    store = DescriptionStore(str.strip)
+    assert store.clean(' short ') == 'short'
+    assert store.texts == {}
+
+
+def test_descriptions_collection():
+    assert descriptions_collection('products') == 'products_descriptions'
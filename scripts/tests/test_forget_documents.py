@@ -0,0 +1,48 @@
+import pytest
+
+from synclib import Manifest, forget_documents
+from synclib import manifest as manifest_module
+
+
+@pytest.fixture
+def manifest_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest_module, 'MANIFEST_DIR', tmp_path)
+    return tmp_path
+
+
+def save(path, project, collection, fingerprints):
+    manifest = Manifest(path, project, collection)
+    for doc_id, fp in fingerprints.items():
+        manifest.record(doc_id, fp)
+    manifest.save()
+
+
+def test_drops_written_documents_from_content_and_stock_manifests(manifest_dir):
+    content = manifest_dir / 'woocommerce-full.proj.json'
+    stock = manifest_dir / 'stock.sync-woocommerce-csv.proj.json'
+    save(content, 'proj', 'products', {'1': 'a', '2': 'b'})
+    save(stock, 'proj', 'products:stock', {'1': 's1', '3': 's3'})
+
+    assert forget_documents('proj', 'products', ['1', '3'], keep=stock) == 1
+    assert Manifest(content, 'proj', 'products').previous == {'2': 'b'}
+    assert Manifest(stock, 'proj', 'products:stock').previous == {'1': 's1', '3': 's3'}
+
+    assert forget_documents('proj', 'products', ['1', '3']) == 2
+    assert Manifest(stock, 'proj', 'products:stock').previous == {}
+
+
+def test_leaves_other_collections_and_projects_alone(manifest_dir):
+    other_collection = manifest_dir / 'woocommerce-full.proj.test_products.json'
+    other_project = manifest_dir / 'woocommerce-full.other.json'
+    save(other_collection, 'proj', 'test_products', {'1': 'a'})
+    save(other_project, 'other', 'products', {'1': 'a'})
+
+    assert forget_documents('proj', 'products', ['1']) == 0
+    assert forget_documents('proj', 'test_products', ['1']) == 1
+    assert Manifest(other_project, 'other', 'products').previous == {'1': 'a'}
+
+
+def test_ignores_missing_and_unreadable_manifests(manifest_dir):
+    (manifest_dir / 'stock.sync-products-firestore.proj.json').write_text('{not json')
+    assert forget_documents('proj', 'products', ['1']) == 0
+    assert forget_documents('proj', 'products', []) == 0
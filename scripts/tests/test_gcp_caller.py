@@ -0,0 +1,89 @@
+import pytest
+
+pytest.importorskip('functions_framework')
+pytest.importorskip('requests')
+
+from conftest import load_script  # noqa: E402
+
+
+class Request:
+    """The parts of a Flask request the function reads"""
+
+    def __init__(self, args=None, headers=None, body=None):
+        self.args = Args(args or {})
+        self.headers = headers or {}
+        self.body = body
+
+    def get_json(self, silent=False):
+        return self.body
+
+
+class Args(dict):
+    def to_dict(self):
+        return dict(self)
+
+
+@pytest.fixture
+def probe(monkeypatch):
+    """Load the probe with the given environment (module constants are read at import)"""
+    def load(**env):
+        for key in ('API_KEY', 'PROBE_TOKEN', 'PROBE_STOCK_WRITES', 'WP_URL'):
+            monkeypatch.delenv(key, raising=False)
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
+        return load_script('test-gcp-caller/main')
+    return load
+
+
+def test_stock_scenarios_are_off_by_default(probe):
+    main = probe(API_KEY='key')
+    assert main.DEFAULT_SCENARIOS == ('wp_json',)
+    assert main.parse_scenarios('wp_json, test_file') == ['wp_json', 'test_file']
+    with pytest.raises(ValueError, match='PROBE_STOCK_WRITES'):
+        main.parse_scenarios('wp_json,ascii_sku')
+    with pytest.raises(ValueError):
+        main.parse_scenarios('wp_json,delete_everything')
+
+
+def test_stock_scenarios_need_the_flag_and_a_key(probe):
+    with pytest.raises(ValueError, match='API_KEY'):
+        probe(PROBE_STOCK_WRITES='1').parse_scenarios('georgian_sku')
+    main = probe(PROBE_STOCK_WRITES='1', API_KEY='key')
+    assert main.DEFAULT_SCENARIOS == ('wp_json', 'ascii_sku', 'georgian_sku', 'georgian_sku_utf8')
+    assert main.parse_scenarios('georgian_sku') == ['georgian_sku']
+
+
+def test_callers_must_present_the_probe_token(probe):
+    main = probe()
+    assert not main.authorized(Request(headers={'Authorization': 'Bearer '}))
+    assert main.test_wp_connection(Request()) == ({'error': 'unauthorized'}, 401)
+
+    main = probe(PROBE_TOKEN='secret')
+    assert main.authorized(Request(headers={'Authorization': 'Bearer secret'}))
+    assert not main.authorized(Request(headers={'Authorization': 'Bearer wrong'}))
+    assert not main.authorized(Request())
+
+
+def test_http_parameters_are_capped_and_the_target_is_fixed(probe, monkeypatch):
+    main = probe(PROBE_TOKEN='secret', WP_URL='https://wp.example')
+    calls = []
+    monkeypatch.setattr(main, 'run_probe', lambda *args, **options: calls.append((args, options)) or {})
+    request = Request(args={'count': '100000', 'concurrency': '500', 'timeout': '600', 'base_url': 'http://evil'},
+                      headers={'Authorization': 'Bearer secret'})
+    assert main.test_wp_connection(request) == {}
+    (base_url, count, concurrency, scenarios), options = calls[0]
+    assert (base_url, count, concurrency, scenarios) == ('https://wp.example', main.MAX_COUNT, main.MAX_CONCURRENCY,
+                                                         ['wp_json'])
+    assert options['timeout'] == main.MAX_TIMEOUT
+
+    request.body = {'scenarios': 'ascii_sku'}
+    body, status = main.test_wp_connection(request)
+    assert status == 400 and 'PROBE_STOCK_WRITES' in body['error']
+
+
+def test_probe_against_the_mock(probe, mock_woocommerce):
+    mock = mock_woocommerce()
+    result = probe().run_probe(mock.url, count=6, concurrency=3, scenarios=['wp_json'])
+    stats = result['scenarios']['wp_json']
+    assert (stats['requests'], stats['errors'], stats['outcomes']) == (6, 0, {'200': 6})
+    assert stats['latency_ms']['p50'] <= stats['latency_ms']['max']
@@ -0,0 +1,83 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('requests')
+
+from synclib import ImageChecker  # noqa: E402
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    hits = []
+
+    def do_HEAD(self):
+        self.hits.append(('HEAD', self.path))
+        if self.path == '/no-head.jpg':
+            return self._answer(405)
+        self._serve()
+
+    def do_GET(self):
+        self.hits.append(('GET', self.path))
+        self._serve()
+
+    def _serve(self):
+        if self.path in ('/ok.jpg', '/no-head.jpg'):
+            if self.headers.get('If-None-Match') == '"v1"':
+                return self._answer(304)
+            return self._answer(200, {'Content-Type': 'image/jpeg', 'ETag': '"v1"'})
+        if self.path == '/page.html':
+            return self._answer(200, {'Content-Type': 'text/html'})
+        self._answer(404)
+
+    def _answer(self, status, headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def image_server():
+    ImageHandler.hits = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ImageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_check_classifies_urls(tmp_path, image_server):
+    urls = [f"{image_server}/{name}" for name in ('ok.jpg', 'no-head.jpg', 'page.html', 'gone.jpg')]
+    with ImageChecker(tmp_path / 'cache.sqlite', max_workers=4) as checker:
+        results = checker.check(urls + urls[:1])
+    assert {url: result.ok for url, result in results.items()} == dict(zip(urls, (True, True, False, False)))
+    assert results[urls[2]].error == 'not an image (text/html)'
+    assert results[urls[3]].error == 'HTTP 404'
+    assert ('GET', '/no-head.jpg') in ImageHandler.hits
+
+
+def test_fresh_results_come_from_the_cache(tmp_path, image_server):
+    url = f"{image_server}/ok.jpg"
+    with ImageChecker(tmp_path / 'cache.sqlite') as checker:
+        checker.check([url])
+    ImageHandler.hits = []
+    with ImageChecker(tmp_path / 'cache.sqlite') as checker:
+        assert checker.check([url])[url].ok
+        assert (checker.cached, checker.checked) == (1, 0)
+    assert ImageHandler.hits == []
+
+
+def test_stale_results_are_revalidated(tmp_path, image_server):
+    url = f"{image_server}/ok.jpg"
+    with ImageChecker(tmp_path / 'cache.sqlite') as checker:
+        checker.check([url])
+    with ImageChecker(tmp_path / 'cache.sqlite', max_age=0) as checker:
+        result = checker.check([url])[url]
+        assert checker.not_modified == 1
+    assert result.ok and result.status == 304 and result.etag == '"v1"'
@@ -0,0 +1,68 @@
+from synclib import RunJournal, input_hash, rows_hash
+
+
+def interrupted_run(path, sha, batches):
+    journal = RunJournal(path, sha)
+    for collection, fingerprints in batches:
+        journal.record(collection, fingerprints)
+    journal.close()  # no finish(): the run died
+
+
+def test_resume_restores_committed_documents_for_the_same_input(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    interrupted_run(path, 'sha-1', [('products', {'1': 'a'}), ('products', {'2': 'b'}), ('test', {'1': 'c'})])
+
+    journal = RunJournal(path, 'sha-1', resume=True)
+    assert journal.resumed and journal.documents == 3
+    assert journal.committed('products') == {'1': 'a', '2': 'b'}
+    assert journal.committed('test') == {'1': 'c'}
+    journal.close()
+
+
+def test_another_input_or_no_resume_starts_over(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    interrupted_run(path, 'sha-1', [('products', {'1': 'a'})])
+    journal = RunJournal(path, 'sha-2', resume=True)
+    assert not journal.resumed and journal.committed('products') == {}
+    journal.close()
+    # ...and the new run's journal replaced the old one
+    journal = RunJournal(path, 'sha-1', resume=True)
+    assert not journal.resumed
+    journal.close()
+
+    interrupted_run(path, 'sha-1', [('products', {'1': 'a'})])
+    journal = RunJournal(path, 'sha-1')
+    assert not journal.resumed
+    journal.close()
+
+
+def test_a_torn_last_line_is_ignored(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    interrupted_run(path, 'sha-1', [('products', {'1': 'a'})])
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"collection":"products","documents":{"2":')
+    journal = RunJournal(path, 'sha-1', resume=True)
+    assert journal.committed('products') == {'1': 'a'}
+    journal.close()
+
+
+def test_a_second_interruption_keeps_both_runs_progress(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    interrupted_run(path, 'sha-1', [('products', {'1': 'a'})])
+    journal = RunJournal(path, 'sha-1', resume=True)
+    journal.record('products', {'2': 'b'})
+    journal.close()
+
+    journal = RunJournal(path, 'sha-1', resume=True)
+    assert journal.committed('products') == {'1': 'a', '2': 'b'}
+    journal.finish()
+    assert not path.exists()
+
+
+def test_input_hashes(tmp_path):
+    path = tmp_path / 'export.csv'
+    path.write_bytes(b'ID,Name\n1,x\n')
+    assert input_hash(path) == input_hash(path)
+    assert input_hash(path, chunk_size=3) == input_hash(path)
+    assert rows_hash([{'ID': '1', 'Name': 'x'}]) == rows_hash([{'Name': 'x', 'ID': '1'}])
+    assert rows_hash([{'ID': '1'}]) != rows_hash([{'ID': '2'}])
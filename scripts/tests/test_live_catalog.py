@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import pytest
+
+from synclib import ai_product
+from synclib.live_catalog import LiveCatalog
+
+HAT = {'id': '4714', 'name': 'მწვანე ქუდი', 'type': 'simple', 'price': 59.0, 'stock_qty': 2,
+       'categories': 'ქუდი > ბამბის ქუდი', 'images': ['https://bebias.ge/hat.jpg'], 'short_description': 'ბამბა'}
+
+
+def test_ai_product_shape():
+    assert ai_product(HAT) == {'id': '4714', 'name': 'მწვანე ქუდი', 'price': 59.0, 'currency': 'GEL',
+                               'category': 'ქუდი', 'stock': 2, 'image': 'https://bebias.ge/hat.jpg',
+                               'short_description': 'ბამბა'}
+
+
+def test_ai_product_falls_back_to_the_document_id():
+    entry = ai_product({'price': '25', 'image': 'https://bebias.ge/sock.jpg'}, 'წინდა')
+    assert (entry['id'], entry['name'], entry['price'], entry['stock'], entry['image']) == \
+        ('წინდა', 'წინდა', 25.0, 0, 'https://bebias.ge/sock.jpg')
+
+
+@pytest.mark.parametrize('type_', [None, '', 'simple', 'variation'])
+def test_ai_product_lists_simple_and_variation_and_untyped(type_):
+    assert ai_product({**HAT, 'type': type_}) is not None
+
+
+@pytest.mark.parametrize('changes', [
+    {'type': 'variable'},
+    {'price': 0},
+    {'price': None},
+    {'price': 'n/a'},
+    {'discontinued': True},
+])
+def test_ai_product_skips_what_the_bot_does_not_list(changes):
+    assert ai_product({**HAT, **changes}) is None
+
+
+def test_ai_product_keeps_revived_documents():
+    assert ai_product({**HAT, 'discontinued': False}) is not None
+
+
+def snapshot(doc_id, data):
+    return SimpleNamespace(id=doc_id, to_dict=lambda: dict(data))
+
+
+def change(kind, doc_id, data=None):
+    return SimpleNamespace(type=SimpleNamespace(name=kind), document=snapshot(doc_id, data or {}))
+
+
+def test_snapshots_update_the_catalog():
+    catalog = LiveCatalog()
+    docs = [snapshot('a', HAT), snapshot('b', {**HAT, 'id': '4715', 'name': 'ბამბის ქუდი'})]
+    catalog.on_snapshot(docs, [change('ADDED', d.id, d.to_dict()) for d in docs], None)
+    assert catalog.ready.is_set() and catalog.dirty.is_set()
+    products, changed = catalog.take()
+    assert [p['id'] for p in products] == ['4715', '4714']  # sorted by name
+    assert changed == {'a', 'b'} and not catalog.dirty.is_set()
+
+    # A write the bot can't see leaves the catalog clean
+    catalog.on_snapshot(docs, [change('MODIFIED', 'a', {**HAT, 'synced_at': 1, 'tags': 'x'})], None)
+    assert not catalog.dirty.is_set() and catalog.events == 3 and catalog.relevant == 2
+
+    catalog.on_snapshot(docs, [change('MODIFIED', 'a', {**HAT, 'stock_qty': 1}), change('REMOVED', 'b')], None)
+    products, changed = catalog.take()
+    assert [(p['id'], p['stock']) for p in products] == [('4714', 1)]
+    assert changed == {'a', 'b'}
+
+
+def test_a_new_listener_drops_documents_deleted_meanwhile():
+    catalog = LiveCatalog()
+    docs = [snapshot('a', HAT), snapshot('b', {**HAT, 'id': '4715'})]
+    catalog.on_snapshot(docs, [change('ADDED', d.id, d.to_dict()) for d in docs], None)
+    catalog.take()
+
+    catalog.reset()
+    assert not catalog.ready.is_set()
+    catalog.on_snapshot(docs[:1], [change('ADDED', 'a', HAT)], None)
+    products, changed = catalog.take()
+    assert [p['id'] for p in products] == ['4714'] and changed == {'b'}
@@ -0,0 +1,46 @@
+import json
+
+from synclib import Manifest, fingerprint
+
+
+def test_fingerprint_ignores_volatile_fields_and_key_order():
+    doc = {'name': 'მწვანე ქუდი', 'price': 59.0, 'stock_qty': 3}
+    assert fingerprint(doc) == fingerprint({'stock_qty': 3, 'price': 59.0, 'name': 'მწვანე ქუდი'})
+    assert fingerprint(doc) == fingerprint({**doc, 'synced_at': object()})
+    assert fingerprint(doc) != fingerprint({**doc, 'stock_qty': 2})
+
+
+def test_manifest_round_trip(tmp_path):
+    path = tmp_path / 'woocommerce-full.proj.json'
+    manifest = Manifest(path, 'proj', 'products')
+    assert manifest.previous == {}
+    manifest.record('4714', 'fp1')
+    manifest.save()
+
+    manifest = Manifest(path, 'proj', 'products')
+    assert manifest.is_unchanged('4714', 'fp1')
+    assert not manifest.is_unchanged('4714', 'fp2')
+    assert not manifest.is_unchanged('4715', 'fp1')
+
+
+def test_manifest_ignores_other_scope(tmp_path):
+    path = tmp_path / 'woocommerce-full.proj.json'
+    path.write_text(json.dumps({'scope': 'other/products', 'fingerprints': {'4714': 'fp1'}}))
+    assert Manifest(path, 'proj', 'products').previous == {}
+
+
+def test_manifest_ignores_unreadable_file(tmp_path):
+    path = tmp_path / 'woocommerce-full.proj.json'
+    path.write_text('{not json')
+    assert Manifest(path, 'proj', 'products').previous == {}
+
+
+def test_carry_over_and_discard(tmp_path):
+    path = tmp_path / 'woocommerce-full.proj.json'
+    path.write_text(json.dumps({'scope': 'proj/products', 'fingerprints': {'1': 'a', '2': 'b'}}))
+    manifest = Manifest(path, 'proj', 'products')
+    manifest.record('2', 'c')
+    manifest.record('3', 'd')
+    manifest.carry_over()
+    manifest.discard('3')
+    assert manifest.current == {'1': 'a', '2': 'c'}
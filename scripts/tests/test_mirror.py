@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from synclib import ProductMirror, WritePlan
+from synclib.mirror import CREATE, NOOP, REFRESH_OVERLAP, UPDATE, _advance, _lower_bound, _utc
+
+SYNCED = datetime(2025, 11, 25, 8, 0, tzinfo=timezone.utc)
+HAT = {'name': 'მწვანე ქუდი', 'price': 59.0, 'stock_qty': 2, 'images': ['https://bebias.ge/hat.jpg'],
+       'synced_at': SYNCED, 'last_updated_by': 'woocommerce_sync'}
+
+
+class Collection:
+    """stream() of a fixed set of documents, as a full refresh reads them"""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def stream(self):
+        return [SimpleNamespace(id=doc_id, to_dict=lambda data=data: dict(data))
+                for doc_id, data in self.documents.items()]
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    collection = Collection({'4714': HAT, '4715': {**HAT, 'name': 'შავი ქუდი', 'stock_qty': 0}})
+    db = SimpleNamespace(project='proj', collection=lambda name: collection)
+    mirror = ProductMirror(db, 'products', path=tmp_path / 'mirror.sqlite')
+    yield mirror
+    mirror.close()
+
+
+def test_full_refresh_mirrors_the_collection(mirror):
+    stats = mirror.refresh(full=True)
+    assert (stats['mode'], stats['changed'], stats['deleted'], stats['documents']) == ('full', 2, 0, 2)
+    assert mirror.get('4714')['synced_at'] == SYNCED.isoformat()
+    assert mirror.get('nope') is None
+    assert not mirror.needs_full_refresh()
+
+    mirror.collection_ref.documents.pop('4715')
+    assert mirror.refresh(full=True)['deleted'] == 1
+    assert [doc_id for doc_id, _ in mirror.documents()] == ['4714']
+
+
+def test_write_plan_classifies_writes(mirror):
+    firestore = pytest.importorskip('google.cloud.firestore')
+    mirror.refresh(full=True)
+    plan = WritePlan(mirror)
+    # Markers and last_updated_by change on every write and don't count
+    fields = {**HAT, 'synced_at': firestore.SERVER_TIMESTAMP, 'last_updated_by': 'price_sync'}
+    assert plan.add('4714', fields) == NOOP
+    assert plan.add('4714', {'price': 59}) == NOOP  # 59 and 59.0 read back the same
+    assert plan.add('4714', {'stock_qty': 1}) == UPDATE
+    assert plan.add('4714', {'images': ['https://bebias.ge/hat.jpg', 'https://bebias.ge/hat-2.jpg']}) == UPDATE
+    assert plan.add('4714', {'description': firestore.DELETE_FIELD}) == NOOP
+    assert plan.add('4714', {'name': HAT['name'], 'description': firestore.DELETE_FIELD}) == NOOP
+    assert plan.add('4714', {'stock_qty': 2, 'price': firestore.DELETE_FIELD}) == UPDATE
+    assert plan.add('4716', {'name': 'წინდა'}) == CREATE
+    # A full set (merge=False) also has to drop the fields it leaves out
+    assert plan.add('4714', {'name': HAT['name']}, merge=False) == UPDATE
+    assert plan.add('4714', dict(HAT), merge=False) == NOOP
+
+    assert plan.counts == {CREATE: 1, UPDATE: 4, NOOP: 5}
+    assert plan.changes[CREATE] == ['4716']
+    assert plan.to_dict()['write_ops'] == 5
+    assert plan.lines()[0].startswith('Plan: 1 creates, 4 updates, 5 no-ops: 5 write ops')
+
+
+def test_string_markers_are_normalized_to_utc():
+    assert _utc('2025-11-25T12:00:00+04:00') == datetime(2025, 11, 25, 8, 0, tzinfo=timezone.utc)
+    assert _utc('2025-11-25T08:00:00Z') == datetime(2025, 11, 25, 8, 0, tzinfo=timezone.utc)
+    assert _utc('2025-11-25T12:00:00') is None  # naive local time
+    assert _utc('yesterday') is None
+
+
+def test_high_water_marks_ignore_naive_strings():
+    high_water = {}
+    _advance(high_water, {'last_updated': '2025-11-25T12:00:00+04:00', 'synced_at': SYNCED})
+    _advance(high_water, {'last_updated': '2025-11-25T15:00:00'})  # naive: would be hours ahead of UTC stamps
+    _advance(high_water, {'timestamp': '2025-11-25T07:00:00.000Z', 'synced_at': SYNCED - timedelta(hours=1)})
+    assert high_water == {
+        'last_updated:string': '2025-11-25T08:00:00+00:00',
+        'synced_at:timestamp': SYNCED.isoformat(),
+        'timestamp:string': '2025-11-25T07:00:00+00:00',
+    }
+
+
+def test_query_bounds():
+    assert _lower_bound('timestamp', SYNCED.isoformat()) == ('>', SYNCED)
+    assert _lower_bound('string', '2025-11-25T08:00:00+00:00') == ('>=', (SYNCED - REFRESH_OVERLAP).isoformat())
+    assert _lower_bound('string', None) == ('>=', '')
+    assert _lower_bound('string', '2025-11-25T12:00:00') == ('>=', '')  # saved before marks were normalized
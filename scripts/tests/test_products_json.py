@@ -0,0 +1,39 @@
+import json
+
+from synclib import write_products_json
+
+PRODUCTS = [
+    {'id': '4714', 'name': 'მწვანე ქუდი', 'price': 59.0, 'stock': 2},
+    {'id': '4715', 'name': 'შავი ქუდი', 'price': 59.0, 'stock': 0},
+]
+
+
+def test_unchanged_content_is_not_rewritten(tmp_path):
+    path = tmp_path / 'products.json'
+    assert write_products_json(PRODUCTS, path)['written']
+    mtime = path.stat().st_mtime_ns
+    summary = write_products_json(PRODUCTS, path)
+    assert not summary['written']
+    assert path.stat().st_mtime_ns == mtime
+
+
+def test_summary_lists_added_removed_and_changed(tmp_path):
+    path = tmp_path / 'products.json'
+    write_products_json(PRODUCTS, path)
+    products = [{**PRODUCTS[0], 'stock': 1}, {'id': '4716', 'name': 'წინდა', 'price': 25.0, 'stock': 4}]
+    summary = write_products_json(products, path, changes_path=tmp_path / 'changes.json')
+    assert (summary['added'], summary['removed'], summary['changed']) == (['4716'], ['4715'], ['4714'])
+    assert json.loads(path.read_text(encoding='utf-8')) == products
+    assert json.loads((tmp_path / 'changes.json').read_text(encoding='utf-8')) == summary
+
+
+def test_keeps_the_files_layout(tmp_path):
+    path = tmp_path / 'products.json'
+    write_products_json(PRODUCTS, path)
+    assert path.read_text(encoding='utf-8') == json.dumps(PRODUCTS, ensure_ascii=False, indent=2)
+
+
+def test_truncated_file_counts_everything_as_added(tmp_path):
+    path = tmp_path / 'products.json'
+    path.write_text('[{"id": "47', encoding='utf-8')
+    assert write_products_json(PRODUCTS, path)['added'] == ['4714', '4715']
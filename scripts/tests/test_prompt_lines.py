@@ -0,0 +1,41 @@
+import pytest
+
+from synclib.prompt_lines import build_prompt_lines, js_string, prompt_line
+
+
+@pytest.mark.parametrize('value, expected', [
+    (59.0, '59'),
+    (45.5, '45.5'),
+    (-0.0, '0'),
+    (0.1 + 0.2, '0.30000000000000004'),
+    (1e20, '100000000000000000000'),
+    (1.2345678901234568e20, '123456789012345680000'),
+    (1e21, '1e+21'),
+    (1.5e-7, '1.5e-7'),
+    (0.000001, '0.000001'),
+    (float('nan'), 'NaN'),
+    (float('-inf'), '-Infinity'),
+    (3, '3'),
+    (None, 'null'),
+    (True, 'true'),
+])
+def test_js_string_matches_javascript(value, expected):
+    assert js_string(value) == expected
+
+
+def test_prompt_line_matches_the_bots_template():
+    product = {'id': '4714', 'name': 'მწვანე ქუდი', 'price': 59.0, 'currency': 'GEL', 'stock': 2,
+               'category': 'ქუდი', 'image': 'https://bebias.ge/wp-content/uploads/hat.jpg'}
+    assert prompt_line(product) == 'მწვანე ქუდი (ID: 4714) - Price: 59 GEL, Stock: 2, Category: ქუდი [HAS_IMAGE]'
+
+
+def test_prompt_line_defaults():
+    product = {'id': '1', 'name': 'x', 'price': 10.5, 'image': 'IMAGE_URL_HERE'}
+    assert prompt_line(product) == 'x (ID: 1) - Price: 10.5 , Stock: undefined, Category: N/A'
+
+
+def test_build_without_encoding_has_no_token_counts():
+    content = build_prompt_lines([{'id': '1', 'name': 'x', 'price': 1.0, 'stock': 0}])
+    assert content['encoding'] is None and content['total_tokens'] is None
+    assert content['products'] == [{'id': '1', 'line': 'x (ID: 1) - Price: 1 , Stock: 0, Category: N/A',
+                                    'tokens': None}]
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from synclib import read_rows  # noqa: E402
+from synclib.woocommerce_api import WooCommerceSource  # noqa: E402
+
+OLD = '2000-01-01T00:00:00'
+
+
+@pytest.fixture
+def mock(mock_woocommerce):
+    return mock_woocommerce()
+
+
+def source(mock, tmp_path):
+    return WooCommerceSource(mock.url, workers=4, checkpoint_path=tmp_path / 'woocommerce-api.json')
+
+
+def age_catalog(mock):
+    """Make every product look last modified long ago"""
+    for item in mock.catalog.products + [v for vs in mock.catalog.variations.values() for v in vs]:
+        item['date_modified_gmt'] = OLD
+
+
+def test_full_pull_returns_every_row_of_the_export(mock, tmp_path):
+    api = source(mock, tmp_path)
+    rows = api.fetch(full=True)
+    api.close()
+    exported = {row['ID']: row for row in read_rows(tmp_path / 'export.csv')}
+    assert sorted(row['ID'] for row in rows) == sorted(exported)
+    assert not api.incremental
+
+    variation = next(row for row in rows if row['Type'] == 'variation')
+    parent_id = variation['Parent'][3:]
+    assert variation['Parent'].startswith('id:')
+    assert exported[parent_id]['Type'] == 'variable'
+    assert variation['Images'] == next(row['Images'] for row in rows if row['ID'] == parent_id)
+
+
+def test_checkpoint_makes_the_next_pull_incremental(mock, tmp_path):
+    api = source(mock, tmp_path)
+    api.fetch()
+    modified_after = api.save_checkpoint()
+    api.close()
+    assert json.loads((tmp_path / 'woocommerce-api.json').read_text()) == {
+        'base_url': mock.url, 'modified_after': modified_after}
+
+    age_catalog(mock)
+    api = source(mock, tmp_path)
+    assert api.fetch() == []
+    assert api.incremental and api.modified_after == modified_after
+    assert api.requests == 2  # products and categories, no variation listings
+    api.close()
+
+
+def test_incremental_pull_fetches_variations_of_changed_parents_only(mock, tmp_path):
+    age_catalog(mock)
+    (tmp_path / 'woocommerce-api.json').write_text(json.dumps({'base_url': mock.url, 'modified_after': OLD}))
+    parent_id, variations = next(iter(mock.catalog.variations.items()))
+    sku = variations[0]['sku']
+    new_stock = variations[0]['stock_quantity'] + 5
+    resp = requests.post(f"{mock.url}/wp-json/wcdbh/v1/update-stock", json={'sku': sku, 'stock_qty': new_stock})
+    resp.raise_for_status()
+
+    api = source(mock, tmp_path)
+    rows = api.fetch()
+    api.close()
+    # The parent's date_modified moved with its variation: it comes back with all of its variations
+    assert [row['ID'] for row in rows] == [str(parent_id)] + [str(v['id']) for v in variations]
+    assert next(row['Stock'] for row in rows if row['SKU'] == sku) == str(new_stock)
+    assert api.requests == 3
+
+
+def test_checkpoint_for_another_site_or_unreadable_is_ignored(mock, tmp_path):
+    path = tmp_path / 'woocommerce-api.json'
+    path.write_text(json.dumps({'base_url': 'https://example.com', 'modified_after': OLD}))
+    api = source(mock, tmp_path)
+    assert api.checkpoint == {}
+    api.close()
+
+    path.write_text('{not json')
+    api = source(mock, tmp_path)
+    assert api.checkpoint == {}
+    api.fetch()
+    assert not api.incremental
+    api.close()
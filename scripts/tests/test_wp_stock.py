@@ -0,0 +1,67 @@
+import pytest
+
+pytest.importorskip('requests')
+
+from synclib.wp_stock import ERROR, NOT_FOUND, OK, WordPressStockPusher  # noqa: E402
+
+
+def variation_stock(mock, count=7):
+    """{sku: new stock_qty} for the first count variations (Georgian SKUs)"""
+    items = [v for vs in mock.catalog.variations.values() for v in vs][:count]
+    return {item['sku']: item['stock_quantity'] + 1 for item in items}
+
+
+def pushed_stock(mock, updates):
+    return {sku: mock.catalog.by_sku[sku]['stock_quantity'] for sku in updates}
+
+
+def push(mock, updates, **options):
+    pusher = WordPressStockPusher(mock.url, 'key', workers=4, **options)
+    try:
+        return pusher.push(updates), pusher
+    finally:
+        pusher.close()
+
+
+def test_single_sku_payloads_by_default(mock_woocommerce):
+    mock = mock_woocommerce(api_key='key', strict_json=True)
+    updates = variation_stock(mock)
+    results, pusher = push(mock, updates)
+    assert results == {sku: (OK, None) for sku in updates}
+    assert pusher.requests == len(updates)
+    assert pushed_stock(mock, updates) == updates
+
+
+def test_batches_when_opted_in_and_supported(mock_woocommerce):
+    mock = mock_woocommerce(api_key='key', strict_json=True)
+    updates = variation_stock(mock)
+    results, pusher = push(mock, updates, batch_size=3)
+    assert results == {sku: (OK, None) for sku in updates}
+    assert pusher.batches_supported and pusher.requests == 3
+    assert pushed_stock(mock, updates) == updates
+
+
+def test_falls_back_to_single_skus_when_batches_are_rejected(mock_woocommerce):
+    mock = mock_woocommerce(api_key='key', no_batch=True)
+    updates = variation_stock(mock)
+    results, pusher = push(mock, updates, batch_size=3)
+    assert results == {sku: (OK, None) for sku in updates}
+    assert pusher.batches_supported is False
+    assert pushed_stock(mock, updates) == updates
+
+
+@pytest.mark.parametrize('batch_size', [1, 3])
+def test_unknown_skus_are_not_found(mock_woocommerce, batch_size):
+    mock = mock_woocommerce(api_key='key')
+    updates = {**variation_stock(mock, 2), 'no-such-sku': 1}
+    results, _ = push(mock, updates, batch_size=batch_size)
+    assert results['no-such-sku'][0] == NOT_FOUND
+    assert [status for sku, (status, _) in results.items() if sku != 'no-such-sku'] == [OK, OK]
+
+
+def test_refused_credentials_are_errors_not_a_fallback(mock_woocommerce):
+    mock = mock_woocommerce(api_key='other')
+    updates = variation_stock(mock, 3)
+    results, pusher = push(mock, updates, batch_size=3, retries=0)
+    assert {status for status, _ in results.values()} == {ERROR}
+    assert pusher.batches_supported is None and pusher.requests == 1